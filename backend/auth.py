@@ -4,9 +4,12 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import User
-from database import get_db
+from database import get_async_db, session_scope
+from auth_cache import AuthCache, MISSING
+from password_pool import PasswordPool
 
 # 보안 설정
 SECRET_KEY = "your-secret-key-here"  # 실제 운영환경에서는 환경변수로 관리
@@ -14,8 +17,13 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 해시/검증은 이벤트 루프 밖의 제한된 스레드 풀에서 실행 (password_pool.run(verify_password, ...))
+password_pool = PasswordPool()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# 검증된 토큰과 사용자 레코드 캐시 (사용자 변경 시 invalidate_user 호출)
+auth_cache = AuthCache()
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -32,25 +40,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    username = auth_cache.get_token(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except JWTError:
+            raise credentials_exception
+        auth_cache.set_token(token, username, payload.get("exp"))
+
+    user = auth_cache.get_user(username)
+    if user is MISSING:
+        user = (await db.execute(select(User).where(User.username == username))).scalar_one_or_none()
+        if user is None:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
+        # 세션에서 분리해서 캐시 (다른 요청의 commit으로 속성이 만료되지 않게)
+        db.expunge(user)
+        auth_cache.set_user(username, user)
     return user
 
+async def get_websocket_user(token: str) -> Optional[User]:
+    """WebSocket 연결용 토큰 검증 - 연결 내내 세션을 잡고 있지 않도록 검증할 때만 짧게 사용
+    비활성화된 사용자는 None (HTTP의 get_current_active_user와 같은 기준)"""
+    try:
+        async with session_scope() as db:
+            user = await get_current_user(token, db)
+    except HTTPException:
+        return None
+    return user if user.is_active else None
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import time
+from datetime import timedelta
+
+import httpx
+from fastapi import Depends, FastAPI
+
+import main
+from auth_cache import AuthCache
+
+# 인증 캐시 벤치마크: get_current_user를 거치는 요청의 초당 처리량 (캐시 사용 vs 미사용)
+# MongoDB 없이 측정하도록 사용자 조회는 고정 지연(기본 1ms)을 가진 시뮬레이션으로 대체
+# 사용법: python auth_bench.py [요청 수] [동시 요청 수] [조회 지연(ms)]
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/me")
+async def read_me(user=Depends(main.get_current_user)):
+    return {"username": user.username}
+
+
+def simulated_get_user(latency: float):
+    async def get_user(username: str):
+        await asyncio.sleep(latency)  # DB 왕복 시간
+        return main.UserInDB(username=username, email=f"{username}@example.com", hashed_password="-")
+    return get_user
+
+
+async def run(requests: int, concurrency: int, token: str):
+    transport = httpx.ASGITransport(app=bench_app)
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/me", headers=headers)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+async def bench(requests: int, concurrency: int, latency_ms: float):
+    main.get_user = simulated_get_user(latency_ms / 1000)
+    token = main.create_access_token({"sub": "bench"}, expires_delta=timedelta(minutes=30))
+
+    print(f"인증 캐시 벤치마크 (요청 {requests}개, 동시 {concurrency}, 사용자 조회 지연 {latency_ms}ms)")
+    results = {}
+    # TTL 0이면 아무것도 캐시하지 않으므로 매 요청 jwt.decode + 사용자 조회
+    for name, cache in (("캐시 없음", AuthCache(token_ttl=0, user_ttl=0)), ("캐시 사용", AuthCache())):
+        main.auth_cache = cache
+        results[name] = await run(requests, concurrency, token)
+        stats = cache.get_stats()
+        print(f"{name:<8} {results[name]:>10.0f} req/s  "
+              f"토큰 적중 {stats['tokens']['hits']}, 사용자 적중 {stats['users']['hits']}, "
+              f"사용자 조회 {stats['users']['misses']}회")
+    print(f"처리량 향상: {results['캐시 사용'] / results['캐시 없음']:.1f}배")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 1.0,
+    ))
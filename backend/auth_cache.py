@@ -0,0 +1,136 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set
+
+# 캐시에 없음을 나타내는 값 (None도 캐시할 수 있도록 별도 객체 사용)
+MISSING = object()
+
+
+# 크기 제한(LRU)과 만료 시간(TTL)이 있는 캐시
+# on_remove(key, value)는 항목이 만료/밀려남/무효화로 빠질 때 호출 (역인덱스 정리용)
+class TTLCache:
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0,
+                 on_remove: Optional[Callable[[Any, Any], None]] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_remove = on_remove
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()  # key -> (만료 시각, 값)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, default=MISSING):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._removed(key, value)
+            self.expired += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        """ttl을 주면 기본 TTL보다 짧을 때만 적용 (예: 토큰 만료 시각)"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            evicted, (_, evicted_value) = self._entries.popitem(last=False)
+            self._removed(evicted, evicted_value)
+            self.evictions += 1
+
+    def __contains__(self, key):
+        # 통계에 영향을 주지 않는 존재 확인
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def invalidate(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._removed(key, entry[1])
+            self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        entries = list(self._entries.items())
+        self._entries.clear()
+        for key, (_, value) in entries:
+            self._removed(key, value)
+
+    def _removed(self, key, value):
+        if self.on_remove is not None:
+            self.on_remove(key, value)
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# get_current_user용 캐시 - 검증된 토큰(token -> username)과 사용자 레코드(username -> user)
+# 사용자 정보가 바뀌거나 비활성화되면 invalidate_user로 해당 사용자의 토큰과 레코드를 함께 제거
+class AuthCache:
+    def __init__(self, token_ttl: float = 60.0, user_ttl: float = 30.0,
+                 max_tokens: int = 4096, max_users: int = 1024):
+        self.tokens = TTLCache(max_tokens, token_ttl, on_remove=self._token_removed)
+        self.users = TTLCache(max_users, user_ttl)
+        # username -> 캐시된 토큰 (무효화용) - 토큰이 캐시에서 빠지면 함께 제거되므로 토큰 캐시 크기를 넘지 않음
+        self._user_tokens: Dict[str, Set[str]] = {}
+
+    def get_token(self, token: str) -> Optional[str]:
+        """캐시된 토큰의 username (없거나 만료되면 None)"""
+        username = self.tokens.get(token)
+        return None if username is MISSING else username
+
+    def set_token(self, token: str, username: str, expires_at: Optional[float] = None):
+        # 토큰 만료(exp, 유닉스 초)가 TTL보다 빠르면 그때까지만 캐시
+        ttl = expires_at - time.time() if expires_at is not None else None
+        # 캐시에 들어간 경우에만 역인덱스에 추가 (추가하면서 밀려난 토큰은 on_remove에서 정리됨)
+        self.tokens.set(token, username, ttl)
+        if token in self.tokens:
+            self._user_tokens.setdefault(username, set()).add(token)
+
+    def _token_removed(self, token: str, username: str):
+        tokens = self._user_tokens.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._user_tokens[username]
+
+    def get_user(self, username: str):
+        return self.users.get(username)
+
+    def set_user(self, username: str, user):
+        self.users.set(username, user)
+
+    def invalidate_user(self, username: str):
+        self.users.invalidate(username)
+        for token in list(self._user_tokens.get(username, ())):
+            self.tokens.invalidate(token)
+
+    def clear(self):
+        self.tokens.clear()
+        self.users.clear()
+        self._user_tokens.clear()
+
+    def get_stats(self):
+        return {"tokens": self.tokens.get_stats(), "users": self.users.get_stats()}
@@ -0,0 +1,307 @@
+import asyncio
+import io
+import pickle
+import struct
+import sys
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from metrics import counter
+from structured_log import log
+
+# 워커 간 메시지 버스 (WORKERS > 1일 때)
+# 버스 서버 하나에 uvicorn 워커들이 접속하고, 서버는 발행된 메시지를 채널 접두사를 구독한 다른 워커에게 그대로 전달
+# 먼저 접속한 워커가 owner가 되어 텔레메트리 생성/카메라 캡처를 맡고, owner가 끊기면 가장 오래된 워커가 이어받음
+# 프레임 (little-endian): magic(2) "RB", version(1), kind(1), 채널 길이(uint16), 페이로드 길이(uint32), 채널(utf-8), 페이로드
+# 단일 프로세스에서는 같은 인터페이스의 LocalBus를 사용 (다른 브로커로 바꿀 때도 이 인터페이스를 구현)
+
+BUS_MAGIC = b"RB"
+BUS_VERSION = 1
+FRAME_HEADER = struct.Struct("<2sBBHI")
+
+KIND_HELLO = 1      # 워커 -> 서버: 채널 = 워커 이름
+KIND_ROLE = 2       # 서버 -> 워커: 채널 = 역할
+KIND_SUBSCRIBE = 3  # 워커 -> 서버: 채널 = 구독할 접두사
+KIND_PUBLISH = 4    # 양방향: 보낸 워커를 제외한 구독자에게 전달
+
+ROLE_OWNER = "owner"
+ROLE_FOLLOWER = "follower"
+LEFT_CHANNEL = "bus/left"  # 워커가 끊기면 서버가 발행 (페이로드 = 워커 이름)
+
+# 연결별 전송 버퍼 상한 - 느린 워커 때문에 서버/owner 메모리가 계속 늘지 않도록 넘으면 버림
+MAX_BUFFERED_BYTES = 64 * 1024 * 1024
+
+MESSAGES = counter("bus_messages_total", "버스로 주고받은 메시지 수", ["direction"])
+DROPPED = counter("bus_dropped_total", "전송 버퍼가 가득 차서 버린 버스 메시지 수", ["side"])
+
+
+def pack_message(kind: int, channel: str, payload: bytes = b"") -> bytes:
+    encoded = channel.encode("utf-8")
+    return FRAME_HEADER.pack(BUS_MAGIC, BUS_VERSION, kind, len(encoded), len(payload)) + encoded + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[int, str, bytes]:
+    magic, version, kind, channel_length, payload_length = FRAME_HEADER.unpack(
+        await reader.readexactly(FRAME_HEADER.size))
+    if magic != BUS_MAGIC or version != BUS_VERSION:
+        raise ValueError("잘못된 버스 메시지 헤더입니다")
+    channel = (await reader.readexactly(channel_length)).decode("utf-8")
+    return kind, channel, await reader.readexactly(payload_length)
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+# 스냅샷 직렬화 - numpy 배열/스칼라와 datetime 외의 클래스는 거부하는 pickle
+_ALLOWED_CLASSES = {
+    (module, name)
+    for module in ("numpy.core.multiarray", "numpy._core.multiarray", "numpy.core.numeric", "numpy._core.numeric")
+    for name in ("_reconstruct", "_frombuffer", "scalar")
+} | {("numpy", "ndarray"), ("numpy", "dtype"), ("datetime", "datetime")}
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if (module, name) in _ALLOWED_CLASSES:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"허용되지 않은 타입입니다: {module}.{name}")
+
+
+def dumps(value) -> bytes:
+    return pickle.dumps(value, protocol=5)
+
+
+def loads(data: bytes):
+    return _SnapshotUnpickler(io.BytesIO(data)).load()
+
+
+def _send(writer: asyncio.StreamWriter, data: bytes, side: str) -> bool:
+    if writer.transport.get_write_buffer_size() > MAX_BUFFERED_BYTES:
+        DROPPED.labels(side).inc()
+        return False
+    writer.write(data)
+    return True
+
+
+class _Peer:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.name = ""
+        self.prefixes: List[str] = []
+
+    def wants(self, channel: str) -> bool:
+        return any(channel.startswith(prefix) for prefix in self.prefixes)
+
+
+# 버스 서버 - 같은 호스트의 워커끼리만 쓰도록 기본은 127.0.0.1에서만 받음
+class BusServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8091):
+        self.host = host
+        self.port = port
+        self.peers: List[_Peer] = []  # 접속 순서
+        self.owner: Optional[_Peer] = None
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        log.info("bus_started", "버스 서버 시작", host=self.host, port=self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = _Peer(writer)
+        self.peers.append(peer)
+        try:
+            while True:
+                kind, channel, payload = await read_message(reader)
+                if kind == KIND_PUBLISH:
+                    self._route(peer, channel, payload)
+                elif kind == KIND_SUBSCRIBE:
+                    peer.prefixes.append(channel)
+                elif kind == KIND_HELLO:
+                    peer.name = channel
+                    if self.owner is None:
+                        self.owner = peer
+                    writer.write(pack_message(KIND_ROLE, ROLE_OWNER if self.owner is peer else ROLE_FOLLOWER))
+                    log.info("bus_joined", "워커 접속", worker=peer.name, owner=self.owner is peer)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.peers.remove(peer)
+            writer.close()
+            log.info("bus_left", "워커 접속 해제", worker=peer.name)
+            self._route(peer, LEFT_CHANNEL, peer.name.encode("utf-8"))
+            if self.owner is peer:
+                # 가장 오래 접속해 있던 워커가 생성/캡처를 이어받음
+                self.owner = next((other for other in self.peers if other.name), None)
+                if self.owner is not None:
+                    self.owner.writer.write(pack_message(KIND_ROLE, ROLE_OWNER))
+                    log.info("bus_owner_changed", "owner 변경", worker=self.owner.name)
+
+    def _route(self, sender: _Peer, channel: str, payload: bytes):
+        data = None
+        for peer in self.peers:
+            if peer is not sender and peer.wants(channel):
+                data = data or pack_message(KIND_PUBLISH, channel, payload)
+                if _send(peer.writer, data, "server"):
+                    MESSAGES.labels("routed").inc()
+
+
+# 워커 쪽 버스 연결
+class BusClient:
+    def __init__(self, address: str, name: str):
+        self.host, self.port = parse_address(address)
+        self.name = name
+        self.role: Optional[str] = None
+        self.handlers: List[Tuple[str, Callable[[str, bytes], None]]] = []
+        self.role_listeners: List[Callable[[str], None]] = []
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._role_ready: Optional[asyncio.Event] = None
+
+    @property
+    def is_owner(self) -> bool:
+        return self.role == ROLE_OWNER
+
+    def on_role(self, listener: Callable[[str], None]):
+        self.role_listeners.append(listener)
+
+    def subscribe(self, prefix: str, handler: Callable[[str, bytes], None]):
+        """handler(channel, payload) - 이벤트 루프에서 바로 호출되므로 오래 걸리는 작업은 태스크로 넘김"""
+        self.handlers.append((prefix, handler))
+        if self._writer is not None:
+            self._writer.write(pack_message(KIND_SUBSCRIBE, prefix))
+
+    def publish(self, channel: str, payload: bytes):
+        if self._writer is None:
+            return
+        if _send(self._writer, pack_message(KIND_PUBLISH, channel, payload), "client"):
+            MESSAGES.labels("published").inc()
+
+    async def start(self, timeout: float = 5.0):
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._role_ready = asyncio.Event()
+        self._writer.write(pack_message(KIND_HELLO, self.name))
+        for prefix, _ in self.handlers:
+            self._writer.write(pack_message(KIND_SUBSCRIBE, prefix))
+        self._reader_task = asyncio.create_task(self._read(reader))
+        await asyncio.wait_for(self._role_ready.wait(), timeout)
+
+    async def stop(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                kind, channel, payload = await read_message(reader)
+                if kind == KIND_PUBLISH:
+                    MESSAGES.labels("received").inc()
+                    self._dispatch(channel, payload)
+                elif kind == KIND_ROLE:
+                    self._set_role(channel)
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            # 버스가 끊기면 다른 워커와 상태를 맞출 수 없으므로 에러로 남김 (프로세스 관리자가 재시작)
+            log.error("bus_disconnected", "버스 연결 끊김", worker=self.name, error=str(e))
+            self._writer = None
+
+    def _dispatch(self, channel: str, payload: bytes):
+        for prefix, handler in self.handlers:
+            if channel.startswith(prefix):
+                try:
+                    handler(channel, payload)
+                except Exception as e:
+                    log.warning("bus_handler_error", "버스 메시지 처리 에러", sample=5.0, key=prefix,
+                                channel=channel, error=str(e))
+
+    def _set_role(self, role: str):
+        self.role = role
+        self._role_ready.set()
+        log.info("bus_role", "워커 역할", worker=self.name, role=role)
+        for listener in list(self.role_listeners):
+            listener(role)
+
+
+# 단일 프로세스용 - 다른 워커가 없으므로 항상 owner이고 발행은 버림
+class LocalBus:
+    name = "local"
+    role = ROLE_OWNER
+    is_owner = True
+
+    def on_role(self, listener: Callable[[str], None]):
+        pass
+
+    def subscribe(self, prefix: str, handler: Callable[[str, bytes], None]):
+        pass
+
+    def publish(self, channel: str, payload: bytes):
+        pass
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+# 팔로워 워커별 요청 키 집합 (예: 구독 중인 (스트림, 로봇))
+# 전체 합집합에 키가 처음 생기거나 마지막으로 사라질 때만 on_add/on_remove 호출
+class RemoteDemand:
+    def __init__(self, on_add: Callable[[Hashable], None], on_remove: Callable[[Hashable], None]):
+        self.on_add = on_add
+        self.on_remove = on_remove
+        self.workers: Dict[str, Set[Hashable]] = {}
+        self.counts: Dict[Hashable, int] = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self.counts
+
+    def update(self, worker: str, keys: Iterable[Hashable]):
+        keys = set(keys)
+        previous = self.workers.get(worker, set())
+        for key in keys - previous:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            if self.counts[key] == 1:
+                self.on_add(key)
+        for key in previous - keys:
+            self.counts[key] -= 1
+            if self.counts[key] == 0:
+                del self.counts[key]
+                self.on_remove(key)
+        if keys:
+            self.workers[worker] = keys
+        else:
+            self.workers.pop(worker, None)
+
+    def drop(self, worker: str):
+        self.update(worker, ())
+
+    def clear(self):
+        for worker in list(self.workers):
+            self.drop(worker)
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8091):
+    try:
+        asyncio.run(BusServer(host, port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+# 단독 실행: python bus.py [host:port]
+if __name__ == "__main__":
+    run_server(*parse_address(sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1:8091"))
@@ -0,0 +1,217 @@
+import time
+from typing import Dict, Optional
+
+import cv2
+
+from camera_worker import ENCODE_SECONDS, FRAMES_ENCODED
+from metrics import counter
+
+# 카메라 구독자별 적응형 화질/프레임레이트
+# 연결마다 전송 큐의 전송 완료 시간, 전송 중인 시간, 깊이, 버린 프레임 수로 링크 상태를 추정해서
+# 화질 단계를 빠르게 내리고(혼잡) 천천히 올림(여유가 일정 시간 이어질 때)
+# MJPEG는 모든 프레임이 키프레임이므로 단계는 다음 프레임부터 바로 바뀜
+# (프레임 간 압축 코덱을 쓰게 되면 단계 변경은 키프레임에서만 적용해야 함)
+
+# 단계: (너비, 높이, JPEG 품질, 최대 fps) - 0단계는 카메라 워커가 인코딩한 프레임 그대로
+QUALITY_LEVELS = (
+    (640, 480, 80, 30),
+    (640, 480, 60, 20),
+    (480, 360, 50, 15),
+    (320, 240, 45, 10),
+    (320, 240, 30, 5),
+    (160, 120, 30, 2),
+)
+MAX_LEVEL = len(QUALITY_LEVELS) - 1
+
+LEVEL_CHANGES = counter("camera_level_changes_total", "구독자 화질 단계 변경 수", ["direction"])
+FRAMES_SKIPPED = counter("camera_frames_skipped_total", "구독자 fps 제한으로 보내지 않은 프레임 수")
+
+LATENCY_BUDGET_MS = 250.0  # 캡처부터 전송 완료까지 허용하는 지연
+DOWN_HOLD = 0.5            # 단계를 내린 뒤 효과를 확인할 때까지 다시 내리지 않는 시간 (초)
+UP_HOLD = 3.0              # 여유가 이 시간 동안 이어져야 한 단계 올림 (초)
+MAX_UP_HOLD = 30.0         # 올리자마자 다시 내려간 경우 UP_HOLD를 두 배씩 늘리는 상한
+SEND_MS_ALPHA = 0.3        # 전송 시간 지수 이동 평균 가중치
+FRAME_TOLERANCE = 0.005    # 프레임 간격 비교 오차 (초)
+
+
+def parse_level(value) -> int:
+    try:
+        return min(max(int(value), 0), MAX_LEVEL)
+    except (TypeError, ValueError):
+        return 0
+
+
+# 캡처한 프레임 하나의 단계별 JPEG 캐시 - 같은 단계(해상도/품질)는 프레임당 한 번만 인코딩
+class FrameVariants:
+    def __init__(self, frame, buffer):
+        self.frame = frame  # 0단계 해상도로 줄인 원본 (BGR)
+        self._images: Dict[tuple, object] = {}
+        self._jpegs: Dict[int, object] = {0: buffer}
+        self.encoded = 0
+
+    def _image(self, width: int, height: int):
+        # 같은 해상도의 단계끼리는 줄인 이미지를 공유
+        if self.frame.shape[1] == width and self.frame.shape[0] == height:
+            return self.frame
+        key = (width, height)
+        if key not in self._images:
+            self._images[key] = cv2.resize(self.frame, key, interpolation=cv2.INTER_AREA)
+        return self._images[key]
+
+    def jpeg(self, level: int):
+        """단계의 JPEG 버퍼 (없으면 인코딩 - 블로킹, 0단계 외에는 prepare로 스레드에서 미리 만들어 둠)"""
+        if level not in self._jpegs:
+            started = time.perf_counter()
+            width, height, quality, _ = QUALITY_LEVELS[level]
+            ok, buffer = cv2.imencode('.jpg', self._image(width, height), [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                raise RuntimeError(f"JPEG 인코딩 실패 (단계 {level})")
+            self._jpegs[level] = buffer
+            self.encoded += 1
+            ENCODE_SECONDS.labels(level).observe(time.perf_counter() - started)
+            FRAMES_ENCODED.labels(level).inc()
+        return self._jpegs[level]
+
+    def prepare(self, levels):
+        for level in levels:
+            self.jpeg(level)
+
+    def missing(self, levels):
+        return [level for level in levels if level not in self._jpegs]
+
+
+# 다른 워커가 인코딩해서 버스로 보낸 단계별 JPEG (워커 모드의 팔로워)
+# 받은 단계에 없는 단계는 0단계로 대신 보냄 (다음 프레임부터는 owner가 요청된 단계를 함께 보냄)
+class EncodedVariants:
+    def __init__(self, jpegs: Dict[int, object]):
+        self._jpegs = jpegs
+
+    def jpeg(self, level: int):
+        return self._jpegs.get(level, self._jpegs[0])
+
+    def prepare(self, levels):
+        pass
+
+    def missing(self, levels):
+        return []
+
+
+# 구독자 하나의 화질 단계 결정
+class AdaptiveController:
+    def __init__(self, level: int = 0, adaptive: bool = True, latency_budget_ms: float = LATENCY_BUDGET_MS):
+        self.level = parse_level(level)
+        self.adaptive = adaptive
+        self.latency_budget_ms = latency_budget_ms
+
+        self._next_due = 0.0
+        self._sent = 0
+        self._dropped = 0
+        self._last_change = 0.0
+        self._last_up = None
+        self._good_since = None
+        self.up_hold = UP_HOLD
+
+        # 통계
+        self.send_ms = 0.0
+        self.latency_ms = 0.0
+        self.frames = 0
+        self.skipped = 0
+        self.down_steps = 0
+        self.up_steps = 0
+
+    @property
+    def fps(self) -> int:
+        return QUALITY_LEVELS[self.level][3]
+
+    def configure(self, level: Optional[int] = None, adaptive: Optional[bool] = None):
+        if adaptive is not None:
+            self.adaptive = bool(adaptive)
+        if level is not None:
+            self.level = parse_level(level)
+            self._good_since = None
+
+    def update(self, queue, now: float, frame_age_ms: float = 0.0) -> bool:
+        """새 프레임마다 호출 - 전송 큐 통계로 단계를 조정하고 단계가 바뀌었으면 True"""
+        if queue is None:
+            return False
+        if queue.sent > self._sent:
+            # 새로 완료된 전송이 있을 때만 평균 갱신
+            self.send_ms += SEND_MS_ALPHA * (queue.last_send_ms - self.send_ms)
+        in_flight_ms = (now - queue.send_started) * 1000 if queue.send_started else 0.0
+        dropped = queue.dropped - self._dropped
+        self._sent, self._dropped = queue.sent, queue.dropped
+
+        # 이번 프레임이 전송 완료될 때까지의 예상 지연 (캡처 후 경과 + 앞선 전송 + 자기 전송)
+        self.latency_ms = frame_age_ms + max(in_flight_ms, self.send_ms) + (queue.depth() + 1) * self.send_ms
+        if not self.adaptive:
+            return False
+
+        interval_ms = 1000.0 / self.fps
+        congested = (dropped > 0 or in_flight_ms > self.latency_budget_ms
+                     or self.latency_ms > self.latency_budget_ms or self.send_ms > 0.8 * interval_ms)
+        if congested:
+            self._good_since = None
+            if self.level < MAX_LEVEL and now - self._last_change >= DOWN_HOLD:
+                # 전송이 예산의 두 배 이상 막혀 있으면 두 단계씩 내림
+                step = 2 if in_flight_ms > 2 * self.latency_budget_ms else 1
+                if self._last_up is not None and now - self._last_up < self.up_hold:
+                    # 올린 단계를 감당하지 못함 - 다음 시도는 더 오래 기다림
+                    self.up_hold = min(self.up_hold * 2, MAX_UP_HOLD)
+                self._set_level(min(self.level + step, MAX_LEVEL), now)
+                self.down_steps += 1
+                LEVEL_CHANGES.labels("down").inc()
+                return True
+            return False
+
+        if self.level == 0:
+            return False
+        # 위 단계의 프레임 간격에도 충분히 여유가 있어야 올림
+        upper_interval_ms = 1000.0 / QUALITY_LEVELS[self.level - 1][3]
+        if self.send_ms < 0.3 * upper_interval_ms and self.latency_ms < self.latency_budget_ms / 2:
+            if self._good_since is None:
+                self._good_since = now
+            elif now - self._good_since >= self.up_hold:
+                self._set_level(self.level - 1, now)
+                self._last_up = now
+                self.up_steps += 1
+                LEVEL_CHANGES.labels("up").inc()
+                return True
+        else:
+            self._good_since = None
+        return False
+
+    def _set_level(self, level: int, now: float):
+        self.level = level
+        self._last_change = now
+        self._good_since = None
+        if self._last_up is not None and now - self._last_up >= self.up_hold:
+            # 올린 단계가 한동안 유지되었으면 대기 시간을 원래대로
+            self.up_hold = UP_HOLD
+
+    def should_send(self, now: float) -> bool:
+        """현재 단계의 fps를 넘지 않도록 이번 프레임을 보낼지 결정"""
+        if now + FRAME_TOLERANCE < self._next_due:
+            self.skipped += 1
+            FRAMES_SKIPPED.inc()
+            return False
+        interval = 1.0 / self.fps
+        self._next_due = max(self._next_due, now - interval / 2) + interval
+        self.frames += 1
+        return True
+
+    def get_stats(self):
+        width, height, quality, fps = QUALITY_LEVELS[self.level]
+        return {
+            "level": self.level,
+            "adaptive": self.adaptive,
+            "width": width,
+            "height": height,
+            "quality": quality,
+            "fps": fps,
+            "send_ms": round(self.send_ms, 2),
+            "latency_ms": round(self.latency_ms, 2),
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "down_steps": self.down_steps,
+            "up_steps": self.up_steps,
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from camera_abr import AdaptiveController, FrameVariants
+from camera_protocol import pack_frame, unpack_frame
+from outbound import OutboundQueue, POLICY_LATEST
+
+# 링크 속도별 카메라 전송 지연 측정: 고정 화질(640x480, 품질 80, 30fps) vs 구독자별 적응형 화질(camera_abr.py)
+# 대역폭이 다른 구독자 여럿이 같은 카메라를 보는 상황 - 캡처부터 전송 완료까지의 지연과 실제 fps를 비교
+# 사용법: python camera_abr_bench.py [측정 시간(초)]
+
+LINKS_MBPS = (20.0, 5.0, 1.0, 0.25)
+CAPTURE_FPS = 30
+
+
+class SlowSocket:
+    """대역폭이 제한된 링크처럼 메시지 크기에 비례해서 전송이 끝나는 가짜 WebSocket"""
+
+    def __init__(self, mbps: float):
+        self.bytes_per_second = mbps * 1e6 / 8
+        self.latencies = []
+        self.bytes = 0
+
+    async def send_bytes(self, payload):
+        await asyncio.sleep(len(payload) / self.bytes_per_second)
+        header, _ = unpack_frame(payload)
+        self.latencies.append((time.time() - header["timestamp"]) * 1000)
+        self.bytes += len(payload)
+
+    async def send_text(self, payload):
+        await self.send_bytes(payload.encode())
+
+    async def close(self, code: int = None):
+        pass
+
+
+def make_frames(count: int):
+    # 움직이는 도형 + 약한 노이즈 (무작위 노이즈만 있는 영상보다 실제 카메라에 가까운 JPEG 크기)
+    y, x = np.mgrid[0:480, 0:640]
+    background = np.dstack([(x * 255 // 640), (y * 255 // 480), ((x + y) * 255 // 1120)]).astype(np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        cv2.circle(frame, (int(320 + 200 * np.sin(i / 15)), 240), 60, (0, 0, 255), -1)
+        cv2.rectangle(frame, (50 + i % 400, 50), (150 + i % 400, 150), (255, 255, 0), -1)
+        cv2.putText(frame, f"FRAME {i}", (20, 460), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+        noise = np.random.randint(-8, 8, frame.shape, dtype=np.int16)
+        frames.append(np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+async def run(adaptive: bool, frames, seconds: float):
+    subscribers = []
+    for mbps in LINKS_MBPS:
+        socket = SlowSocket(mbps)
+        queue = OutboundQueue(socket, f"{mbps}Mbps", POLICY_LATEST)
+        queue.start()
+        subscribers.append((mbps, socket, queue, AdaptiveController(0, adaptive)))
+
+    encoded = 0
+    levels = {mbps: [] for mbps in LINKS_MBPS}
+    started = time.monotonic()
+    frame_number = 0
+    while time.monotonic() - started < seconds:
+        tick = time.monotonic()
+        frame = frames[frame_number % len(frames)]
+        captured = time.time()
+        # 카메라 워커와 같은 0단계 인코딩
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+
+        now = time.monotonic()
+        due = []
+        for mbps, socket, queue, controller in subscribers:
+            controller.update(queue, now, (time.time() - captured) * 1000)
+            levels[mbps].append(controller.level)
+            if controller.should_send(now):
+                due.append((queue, controller.level))
+
+        variants = FrameVariants(frame, buffer)
+        missing = variants.missing({level for _, level in due})
+        if missing:
+            await asyncio.to_thread(variants.prepare, missing)
+        encoded += variants.encoded
+        payloads = {level: pack_frame("BENCH", frame_number, captured, variants.jpeg(level))
+                    for level in {level for _, level in due}}
+        for queue, level in due:
+            queue.put(payloads[level])
+
+        frame_number += 1
+        await asyncio.sleep(max(0.0, 1.0 / CAPTURE_FPS - (time.monotonic() - tick)))
+
+    for mbps, socket, queue, controller in subscribers:
+        queue.close()
+        latencies = sorted(socket.latencies) or [0.0]
+        received = len(socket.latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+        print(f"{'적응형' if adaptive else '고정':<6}{mbps:>9.2f}{received / seconds:>8.1f}"
+              f"{statistics.mean(latencies):>12.0f}{p95:>11.0f}{max(latencies):>11.0f}"
+              f"{(socket.bytes / received / 1024) if received else 0:>11.1f}"
+              f"{statistics.mean(levels[mbps]):>10.1f}{queue.dropped:>8}")
+    if adaptive:
+        print(f"(추가 인코딩 {encoded}회 / 캡처 {frame_number}프레임)")
+
+
+async def bench(seconds: float):
+    frames = make_frames(60)
+    print(f"카메라 전송 지연 벤치마크 (구독자 {len(LINKS_MBPS)}명, 캡처 {CAPTURE_FPS}fps, {seconds:.0f}초)")
+    print(f"{'방식':<6}{'링크Mbps':>9}{'수신fps':>8}{'평균지연ms':>12}{'p95ms':>11}{'최대ms':>11}"
+          f"{'프레임KB':>11}{'평균단계':>10}{'버림':>8}")
+    await run(False, frames, seconds)
+    await run(True, frames, seconds)
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(float(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,109 @@
+import asyncio
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from camera_worker import CameraWorker
+
+# 카메라 스트림 수에 따른 이벤트 루프 지연 측정
+# 사용법: python camera_bench.py [측정 시간(초)]
+
+STREAM_COUNTS = [1, 4, 8]
+PROBE_INTERVAL = 0.01  # 10ms마다 루프 지연 측정
+
+
+class FakeCapture:
+    """실제 카메라 대신 30fps로 1280x720 프레임을 돌려주는 캡처 객체"""
+
+    def __init__(self, fps: int = 30):
+        self.interval = 1.0 / fps
+        self.frame = np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+        self.last_read = 0.0
+
+    def read(self):
+        # 실제 카메라처럼 다음 프레임이 준비될 때까지 블로킹
+        wait = self.last_read + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_read = time.monotonic()
+        return True, self.frame
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+async def inline_stream(cap, stop: asyncio.Event, counter: list):
+    # 기존 방식: 이벤트 루프에서 직접 캡처/인코딩
+    while not stop.is_set():
+        ret, frame = cap.read()
+        frame = cv2.resize(frame, (640, 480))
+        cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        counter[0] += 1
+        await asyncio.sleep(0.033)
+
+
+async def worker_stream(robot_id: str, cap, stop: asyncio.Event, counter: list):
+    # 개선 방식: 카메라 워커 스레드가 인코딩한 결과만 받음
+    worker = CameraWorker(robot_id, cap)
+    worker.start()
+    try:
+        while not stop.is_set():
+            await worker.next_frame()
+            counter[0] += 1
+    finally:
+        worker.stop()
+
+
+async def probe_loop_lag(stop: asyncio.Event, samples: list):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append((loop.time() - expected) * 1000)
+
+
+async def run_case(mode: str, streams: int, duration: float):
+    stop = asyncio.Event()
+    samples = []
+    counter = [0]
+    tasks = [asyncio.create_task(probe_loop_lag(stop, samples))]
+    for i in range(streams):
+        cap = FakeCapture()
+        if mode == "inline":
+            tasks.append(asyncio.create_task(inline_stream(cap, stop, counter)))
+        else:
+            tasks.append(asyncio.create_task(worker_stream(f"BENCH_{i:03d}", cap, stop, counter)))
+
+    await asyncio.sleep(duration)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[int(len(samples) * 0.99) - 1],
+        "max": samples[-1],
+        "fps": counter[0] / duration / streams,
+    }
+
+
+async def main(duration: float):
+    print(f"이벤트 루프 지연 측정 (스트림당 {duration}초, 프로브 간격 {PROBE_INTERVAL * 1000:.0f}ms)")
+    print(f"{'모드':<8}{'스트림':>6}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}{'fps/스트림':>12}")
+    for mode in ("inline", "worker"):
+        for streams in STREAM_COUNTS:
+            result = await run_case(mode, streams, duration)
+            print(f"{mode:<8}{streams:>6}{result['p50']:>10.2f}{result['p99']:>10.2f}"
+                  f"{result['max']:>10.2f}{result['fps']:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0))
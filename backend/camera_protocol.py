@@ -0,0 +1,56 @@
+import struct
+
+# 바이너리 카메라 프레임 프로토콜
+# [헤더 32바이트][JPEG 바이트]
+#   magic(2) "RC", version(1), codec(1), robot_id(16, NUL 패딩 UTF-8),
+#   frame_number(uint32), timestamp(float64, 유닉스 시간 초) - 모두 little-endian
+FRAME_MAGIC = b"RC"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<2sBB16sId")
+FRAME_HEADER_SIZE = FRAME_HEADER.size
+
+CODEC_JPEG = 1
+
+# 연결 시 ?format= 으로 선택하는 전송 방식
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BINARY)
+
+
+def payload_key(protocol: str, variant=None):
+    """페이로드 공유 키 - 변형(예: 포인트 클라우드 LOD)이 없으면 전송 방식 문자열 그대로"""
+    return protocol if variant is None else (protocol, variant)
+
+
+def split_payload_key(key):
+    """payload_key의 역변환 -> (전송 방식, 변형)"""
+    return key if isinstance(key, tuple) else (key, None)
+
+
+def header_robot_id(robot_id: str) -> bytes:
+    """헤더의 16바이트 robot_id 필드 - 멀티바이트 문자가 중간에 잘리지 않도록 문자 경계에서 자름"""
+    return robot_id.encode('utf-8')[:16].decode('utf-8', 'ignore').encode('utf-8')
+
+
+def pack_frame(robot_id: str, frame_number: int, timestamp: float, buffer, codec: int = CODEC_JPEG) -> bytes:
+    """헤더와 인코딩된 프레임을 하나의 바이너리 메시지로 결합"""
+    header = FRAME_HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, codec,
+        header_robot_id(robot_id), frame_number & 0xFFFFFFFF, timestamp)
+    # imencode 결과 버퍼를 memoryview로 넘겨 중간 bytes 변환 없이 한 번만 복사
+    return b"".join((header, memoryview(buffer)))
+
+
+def unpack_frame(message: bytes):
+    """바이너리 메시지를 (헤더 dict, 프레임 memoryview)로 분리"""
+    magic, version, codec, robot_id, frame_number, timestamp = FRAME_HEADER.unpack_from(message)
+    if magic != FRAME_MAGIC:
+        raise ValueError("잘못된 프레임 헤더입니다")
+    header = {
+        "version": version,
+        "codec": codec,
+        "robot_id": robot_id.rstrip(b"\0").decode('utf-8'),
+        "frame_number": frame_number,
+        "timestamp": timestamp,
+    }
+    return header, memoryview(message)[FRAME_HEADER_SIZE:]
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+from metrics import counter, histogram
+from scheduler import TickStats
+from structured_log import log
+
+FRAMES_CAPTURED = counter("camera_frames_captured_total", "카메라에서 읽은 프레임 수", ["robot_id"])
+FRAMES_ENCODED = counter("camera_frames_encoded_total", "화질 단계별 JPEG 인코딩 수", ["level"])
+ENCODE_SECONDS = histogram("camera_encode_seconds", "화질 단계별 JPEG 인코딩 시간 (크기 조정 포함)", ["level"])
+CAPTURE_SECONDS = histogram("camera_capture_seconds", "프레임 읽기부터 0단계 인코딩까지 걸린 시간", ["robot_id"])
+
+
+def capture_frame(cap, width: int = 640, height: int = 480, quality: int = 80):
+    """프레임 하나를 읽어서 (줄인 프레임, JPEG 버퍼)로 반환 (블로킹 - 이벤트 루프 밖에서 호출)"""
+    ret, frame = cap.read()
+    if not ret:
+        return None, None
+    started = time.perf_counter()
+    frame = cv2.resize(frame, (width, height))
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        return None, None
+    ENCODE_SECONDS.labels(0).observe(time.perf_counter() - started)
+    FRAMES_ENCODED.labels(0).inc()
+    return frame, buffer
+
+
+def capture_jpeg(cap, width: int = 640, height: int = 480, quality: int = 80):
+    """프레임 하나를 읽어서 JPEG 버퍼로 인코딩 (블로킹 - 이벤트 루프 밖에서 호출)"""
+    return capture_frame(cap, width, height, quality)[1]
+
+
+# 카메라 하나를 전담하는 캡처/인코딩 스레드
+class CameraWorker:
+    def __init__(self, robot_id: str, cap, width: int = 640, height: int = 480,
+                 quality: int = 80, fps: int = 30, max_errors: int = 3):
+        self.robot_id = robot_id
+        self.cap = cap
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.interval = 1.0 / fps
+        self.max_errors = max_errors
+
+        # 최신 프레임 한 장만 보관 (소비되기 전에 새 프레임이 오면 덮어씀)
+        self._latest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = None
+        self._loop = None
+        self._thread = None
+
+        self.error = None
+        self.captured_frames = 0
+        self.dropped_frames = 0
+        self.pacing = TickStats(f"camera/{robot_id}", self.interval)
+        self._captured_metric = FRAMES_CAPTURED.labels(robot_id)
+        self._capture_seconds = CAPTURE_SECONDS.labels(robot_id)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"camera-{self.robot_id}", daemon=True)
+        self._thread.start()
+        log.info("camera_worker_started", "카메라 워커 시작", robot_id=self.robot_id)
+
+    def stop(self):
+        # 스레드가 현재 프레임 처리를 마치고 카메라를 직접 해제함
+        self._stop.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    async def next_frame(self):
+        """다음 프레임 (timestamp, JPEG buffer, 줄인 프레임)을 기다려서 반환 (프레임은 구독자별 화질 변환용)"""
+        while True:
+            self._ready.clear()
+            with self._lock:
+                latest, self._latest = self._latest, None
+            if latest is not None:
+                return latest
+            if self.error:
+                raise RuntimeError(self.error)
+            await self._ready.wait()
+
+    def _publish(self, latest):
+        with self._lock:
+            if self._latest is not None:
+                self.dropped_frames += 1
+            self._latest = latest
+        self._notify()
+
+    def _notify(self):
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # 이벤트 루프가 이미 종료된 경우
+            self._stop.set()
+
+    def _run(self):
+        error_count = 0
+        deadline = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                self.pacing.record(deadline, started)
+                try:
+                    frame, buffer = capture_frame(self.cap, self.width, self.height, self.quality)
+                except Exception as e:
+                    log.warning("camera_frame_error", "프레임 처리 중 에러", sample=5.0, key=self.robot_id,
+                                robot_id=self.robot_id, error=str(e))
+                    buffer = None
+
+                if buffer is None:
+                    error_count += 1
+                    log.warning("camera_read_failed", "프레임 읽기 실패", robot_id=self.robot_id,
+                                errors=f"{error_count}/{self.max_errors}")
+                    if error_count >= self.max_errors:
+                        self.error = "카메라에서 프레임을 읽을 수 없습니다"
+                        self._notify()
+                        break
+                    self._stop.wait(1)
+                    deadline = time.monotonic()
+                    continue
+
+                error_count = 0
+                self.captured_frames += 1
+                self._captured_metric.inc()
+                self._publish((datetime.now(), buffer, frame))
+
+                # 작업 시간과 관계없이 절대 마감 시각(이전 마감 + 주기)에 다음 캡처, 한 주기 이상 늦으면 놓친 틱은 건너뜀
+                now = time.monotonic()
+                self._capture_seconds.observe(now - started)
+                self.pacing.run_ms += (now - started) * 1000
+                deadline += self.interval
+                if now - deadline >= self.interval:
+                    missed = int((now - deadline) // self.interval)
+                    self.pacing.skipped += missed
+                    deadline += missed * self.interval
+                if deadline > now:
+                    self._stop.wait(deadline - now)
+        finally:
+            try:
+                self.cap.release()
+            except Exception as e:
+                log.warning("camera_release_failed", "카메라 해제 중 에러", robot_id=self.robot_id, error=str(e))
+            log.info("camera_worker_stopped", "카메라 워커 종료", robot_id=self.robot_id)
@@ -0,0 +1,136 @@
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import websockets
+
+# 워커 수에 따른 WebSocket 연결 수용량 측정 (워커 모드, bus.py)
+# 워커 수마다 서버를 새로 띄우고 (1개는 기존 단일 프로세스, 2개 이상은 버스 서버 + uvicorn --workers)
+# 센서 스트림(10Hz, 바이너리)에 연결 수를 늘려 가며 붙여서 기대 메시지 수 대비 실제 수신 비율을 측정
+# 95% 이상 받은 가장 큰 연결 수를 수용량으로 출력 (클라이언트도 CPU를 쓰므로 코어가 넉넉한 장비에서 실행)
+# 사용법: python cluster_bench.py [최대 워커 수] [측정 시간(초)] [연결 수 목록(쉼표 구분)]
+
+PORT = 8790
+BUS_PORT = 8791
+STREAM_HZ = 10
+CLIENT_PROCESSES = max(1, (os.cpu_count() or 2) // 2)
+CAPACITY_RATIO = 0.95
+
+
+async def _client(url: str, start_at: float, duration: float, counts: list):
+    # 모든 연결이 열린 뒤 [start_at, start_at + duration] 사이에 받은 메시지만 셈
+    received = 0
+    try:
+        async with websockets.connect(url, max_queue=None) as ws:
+            while time.time() < start_at + duration:
+                try:
+                    await asyncio.wait_for(ws.recv(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+                if time.time() >= start_at:
+                    received += 1
+    except Exception:
+        pass
+    counts.append(received)
+
+
+def _client_process(url: str, connections: int, duration: float, start_at: float, queue):
+    async def run():
+        counts = []
+        tasks = []
+        for i in range(connections):
+            tasks.append(asyncio.create_task(_client(url, start_at, duration, counts)))
+            if i % 100 == 99:
+                await asyncio.sleep(0.05)  # 연결을 한꺼번에 열지 않음
+        await asyncio.gather(*tasks)
+        queue.put(sum(counts))
+    asyncio.run(run())
+
+
+def start_server(workers: int):
+    env = dict(os.environ)
+    env.pop("BUS_URL", None)
+    processes = []
+    if workers > 1:
+        env["BUS_URL"] = f"127.0.0.1:{BUS_PORT}"
+        processes.append(subprocess.Popen([sys.executable, "bus.py", env["BUS_URL"]], env=env))
+        time.sleep(0.5)
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--workers", str(workers),
+         "--log-level", "warning"], env=env, stdout=subprocess.DEVNULL))
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/api/cluster", timeout=1.0)
+            time.sleep(1.0)  # 모든 워커가 버스에 접속할 시간
+            return processes
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    stop_server(processes)
+    raise RuntimeError("서버가 시작되지 않았습니다")
+
+
+def stop_server(processes):
+    for process in reversed(processes):
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def measure(connections: int, duration: float) -> float:
+    url = f"ws://127.0.0.1:{PORT}/ws/sensor/ROBOT_001?format=binary"
+    queue = multiprocessing.Queue()
+    start_at = time.time() + 2 + connections / 500  # 연결을 모두 연 뒤 동시에 측정 시작
+    per_process = [connections // CLIENT_PROCESSES + (i < connections % CLIENT_PROCESSES)
+                   for i in range(CLIENT_PROCESSES)]
+    clients = [multiprocessing.Process(target=_client_process, args=(url, count, duration, start_at, queue))
+               for count in per_process if count]
+    for client in clients:
+        client.start()
+    received = sum(queue.get() for _ in clients)
+    for client in clients:
+        client.join()
+    return received / (connections * duration * STREAM_HZ)
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else min(4, os.cpu_count() or 1)
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    steps = [int(value) for value in sys.argv[3].split(",")] if len(sys.argv) > 3 else [250, 500, 1000, 2000, 4000]
+    worker_counts = sorted({1, *[count for count in (2, 4, 8, 16) if count <= max_workers], max_workers})
+
+    root = tempfile.mkdtemp()
+    os.environ.update(LOG_LEVEL="warning", RING_RECORDING="0", DATABASE_URL=f"sqlite:///{root}/bench.db",
+                      FRAME_STORE_DIR=f"{root}/recordings", RECORDER_DIR=f"{root}/ring",
+                      MAP_DIR=f"{root}/maps", MAP_CACHE_DIR=f"{root}/map_cache")
+    # 워커들이 빈 DB에 동시에 테이블을 만들지 않도록 미리 생성 (main.py의 WORKERS 실행과 같음)
+    from database import init_models
+    from models import Base
+    asyncio.run(init_models(Base.metadata))
+
+    print(f"센서 스트림 {STREAM_HZ}Hz, 측정 {duration:.0f}초, 클라이언트 프로세스 {CLIENT_PROCESSES}개, CPU {os.cpu_count()}개")
+    print(f"{'워커':>4} " + " ".join(f"{step:>7}" for step in steps) + f" {'수용량':>7}")
+    for workers in worker_counts:
+        processes = start_server(workers)
+        try:
+            ratios = []
+            for step in steps:
+                ratios.append(measure(step, duration))
+                if ratios[-1] < CAPACITY_RATIO / 2:
+                    break  # 이미 크게 밀리면 더 늘리지 않음
+        finally:
+            stop_server(processes)
+        capacity = max((step for step, ratio in zip(steps, ratios) if ratio >= CAPACITY_RATIO), default=0)
+        cells = [f"{ratio:>6.0%}" for ratio in ratios] + ["      -"] * (len(steps) - len(ratios))
+        print(f"{workers:>4} " + " ".join(f"{cell:>7}" for cell in cells) + f" {capacity:>7}")
+
+
+if __name__ == "__main__":
+    main()
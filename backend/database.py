@@ -1,14 +1,75 @@
-from sqlalchemy import create_engine
+import os
+from contextlib import asynccontextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./robot_management.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./robot_management.db")
+
+# 커넥션 풀 설정 (SQLite는 WAL 모드라서 읽기는 동시에, 쓰기는 한 번에 하나씩 처리됨)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# SQLite 연결마다 적용하는 PRAGMA
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",    # 쓰기 중에도 읽기 가능
+    "synchronous": "NORMAL",  # WAL에서는 NORMAL로도 손상 없이 커밋 (fsync는 체크포인트 때만)
+    "busy_timeout": 5000,     # 다른 연결이 쓰는 중이면 바로 실패하지 않고 최대 5초 대기
+    "foreign_keys": "ON",
+    "cache_size": -16000,     # 연결당 페이지 캐시 16MB
+}
+
+
+def to_async_url(url: str) -> str:
+    """동기 드라이버 URL을 비동기 드라이버 URL로 변환 (sqlite -> aiosqlite, postgresql -> asyncpg)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+def _apply_sqlite_pragmas(sync_engine):
+    @event.listens_for(sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _pool_options(url: str):
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}  # 메모리 DB는 연결마다 별도 DB이므로 기본 풀 사용
+    return {"pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW, "pool_timeout": POOL_TIMEOUT}
+
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    sync_engine = create_engine(url, connect_args=connect_args, **_pool_options(url))
+    if url.startswith("sqlite"):
+        _apply_sqlite_pragmas(sync_engine)
+    return sync_engine
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def make_async_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    async_engine = create_async_engine(to_async_url(url), **_pool_options(url))
+    if url.startswith("sqlite"):
+        _apply_sqlite_pragmas(async_engine.sync_engine)
+    return async_engine
+
+
+# 동기 엔진 - 관리 스크립트(create_admin.py 등)용
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 비동기 엔진 - FastAPI 앱(app)용, 쿼리 중에도 이벤트 루프가 멈추지 않음
+async_engine = make_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -17,4 +78,28 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+# 요청마다 하나의 비동기 세션 (요청이 끝나면 커넥션을 풀에 반납)
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+# WebSocket처럼 오래 유지되는 연결은 세션을 계속 잡고 있지 않고 작업 단위로 짧게 사용
+# async with session_scope() as session: ... (예외 없이 끝나면 commit, 예외 시 rollback)
+@asynccontextmanager
+async def session_scope():
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def init_models(metadata):
+    async with async_engine.begin() as connection:
+        await connection.run_sync(metadata.create_all)
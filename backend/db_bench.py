@@ -0,0 +1,131 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from database import make_async_engine, make_engine
+from models import Base, Robot, SensorData
+
+# DB 벤치마크: 여러 로봇이 동시에 센서 데이터를 쓰고 최근 데이터를 읽을 때 처리량과 이벤트 루프 지연 비교
+# - 기존 방식: 기본 설정 동기 엔진을 async 핸들러 안에서 바로 호출 (쿼리 동안 이벤트 루프가 멈춤)
+# - 동기 + WAL: 같은 방식에 WAL/PRAGMA만 적용
+# - 비동기: aiosqlite 비동기 엔진 + 커넥션 풀
+# 사용법: python db_bench.py [동시 작업 수] [작업당 쓰기 횟수]
+
+ROBOTS = 8
+TICK_MS = 10
+
+
+def sensor_row(robot_id: str, i: int):
+    return SensorData(
+        robot_id=robot_id, timestamp=datetime.utcnow(), lidar_points="[]",
+        acceleration_x=0.1 * i, acceleration_y=0.0, acceleration_z=9.8,
+        gyro_x=0.0, gyro_y=0.0, gyro_z=0.01 * i,
+        position_x=float(i), position_y=0.0, orientation=0.0,
+    )
+
+
+def latest_query(robot_id: str):
+    return (select(SensorData).where(SensorData.robot_id == robot_id)
+            .order_by(SensorData.id.desc()).limit(10))
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+async def measure_lag(stop: asyncio.Event, lags: list):
+    # TICK_MS마다 깨어나기로 한 시각보다 얼마나 늦게 깨어났는지 (ms)
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK_MS / 1000
+        await asyncio.sleep(TICK_MS / 1000)
+        lags.append(max(0.0, (loop.time() - expected) * 1000))
+
+
+def sync_worker(Session, robot_id: str, writes: int):
+    async def work():
+        for i in range(writes):
+            with Session() as db:
+                db.add(sensor_row(robot_id, i))
+                db.commit()
+                db.execute(latest_query(robot_id)).scalars().all()
+            await asyncio.sleep(0)  # 핸들러 사이에 다른 작업이 끼어드는 지점
+    return work
+
+
+def async_worker(Session, robot_id: str, writes: int):
+    async def work():
+        for i in range(writes):
+            async with Session() as db:
+                db.add(sensor_row(robot_id, i))
+                await db.commit()
+                (await db.execute(latest_query(robot_id))).scalars().all()
+    return work
+
+
+def prepare(url: str):
+    setup = make_engine(url)
+    Base.metadata.create_all(setup)
+    with sessionmaker(bind=setup)() as db:
+        db.add_all(Robot(id=f"ROBOT_{n:03d}", name=f"robot {n}") for n in range(ROBOTS))
+        db.commit()
+    setup.dispose()
+
+
+async def run(workers, engine_to_dispose):
+    stop, lags = asyncio.Event(), []
+    lag_task = asyncio.create_task(measure_lag(stop, lags))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    await asyncio.gather(*(work() for work in workers))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag_task
+    result = engine_to_dispose.dispose()
+    if asyncio.iscoroutine(result):
+        await result
+    return elapsed, lags
+
+
+async def bench(concurrency: int, writes: int):
+    print(f"DB 벤치마크 (동시 작업 {concurrency}개, 작업당 쓰기+읽기 {writes}회, SQLite)")
+    print(f"{'방식':<12}{'ops/s':>9}{'지연p50':>9}{'지연p99':>9}{'지연max':>9}{'행 수':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("기존 방식", "동기 + WAL", "비동기"):
+            path = os.path.join(directory, f"{len(os.listdir(directory))}.db")
+            url = f"sqlite:///{path}"
+            prepare(url)
+
+            robot_ids = [f"ROBOT_{n % ROBOTS:03d}" for n in range(concurrency)]
+            if name == "비동기":
+                engine = make_async_engine(url)
+                Session = async_sessionmaker(engine, expire_on_commit=False)
+                workers = [async_worker(Session, robot_id, writes) for robot_id in robot_ids]
+            else:
+                engine = (create_engine(url, connect_args={"check_same_thread": False})
+                          if name == "기존 방식" else make_engine(url))
+                Session = sessionmaker(bind=engine)
+                workers = [sync_worker(Session, robot_id, writes) for robot_id in robot_ids]
+
+            elapsed, lags = await run(workers, engine)
+            check = create_engine(url)
+            with check.connect() as connection:
+                rows = connection.execute(select(func.count()).select_from(SensorData)).scalar()
+            check.dispose()
+            print(f"{name:<12}{concurrency * writes / elapsed:>9.0f}{percentile(lags, 0.5):>9.1f}"
+                  f"{percentile(lags, 0.99):>9.1f}{max(lags, default=0.0):>9.1f}{rows:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+    ))
@@ -0,0 +1,134 @@
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from metrics import counter
+
+# 배터리 분포 구간 수 (0-9, 10-19, ..., 90-100%)
+BATTERY_BUCKETS = 10
+LOW_BATTERY = 20  # 이 값 미만이면 배터리 부족
+
+
+EVENTS = counter("fleet_events_total", "플릿 집계에 반영된 로봇 상태 이벤트 수")
+SNAPSHOTS = counter("fleet_snapshots_total", "새로 직렬화한 플릿 스냅샷 수", ["kind"])
+
+
+def battery_bucket(battery) -> Optional[int]:
+    if battery is None:
+        return None
+    return min(BATTERY_BUCKETS - 1, max(0, int(battery) * BATTERY_BUCKETS // 100))
+
+
+# 로봇별 최신 모니터링 상태와 플릿 전체 집계
+# 이벤트마다 이전 상태를 빼고 새 상태를 더하므로 로봇 수와 관계없이 이벤트당 O(1)
+# 상태별 누적 시간은 끝난 구간의 합과 "상태별 시작 시각 합"으로 유지
+# (진행 중인 시간 = 로봇 수 x 현재 시각 - 시작 시각 합)
+class FleetState:
+    def __init__(self, snapshot_interval: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.snapshot_interval = snapshot_interval  # 버전이 바뀌어도 이 시간 안에는 직렬화한 스냅샷 재사용
+        self.clock = clock
+        self.started_at = clock()
+        self.boot = int(time.time())  # 재시작 후 같은 버전 번호가 같은 ETag가 되지 않도록
+        self.robots: Dict[str, dict] = {}   # robot_id -> 최신 모니터링 스냅샷
+        self.since: Dict[str, float] = {}   # robot_id -> 현재 상태가 시작된 시각 (started_at 기준)
+        self.status_counts = Counter()
+        self.status_since = Counter()    # 상태별 시작 시각 합
+        self.status_seconds = Counter()  # 상태별 끝난 구간 누적 시간
+        self.task_counts = Counter()
+        self.active_tasks = 0
+        self.battery_histogram = [0] * BATTERY_BUCKETS
+        self.battery_total = 0.0
+        self.battery_count = 0
+        self.low_battery = 0
+        self.version = 0
+        self._snapshots: Dict[str, tuple] = {}  # kind -> (version, 만든 시각, etag, 본문)
+
+    def update(self, robot_id: str, snapshot: dict):
+        now = self.clock() - self.started_at
+        status = snapshot.get("status")
+        previous = self.robots.get(robot_id)
+        if previous is None:
+            self.since[robot_id] = now
+            self.status_since[status] += now
+        else:
+            self._remove(previous)
+            old_status = previous.get("status")
+            if old_status != status:
+                started = self.since[robot_id]
+                self.status_seconds[old_status] += now - started
+                self.status_since[old_status] -= started
+                self.status_since[status] += now
+                self.since[robot_id] = now
+        self._add(snapshot)
+        self.robots[robot_id] = snapshot
+        self.version += 1
+        EVENTS.inc()
+
+    def _add(self, snapshot: dict, sign: int = 1):
+        self.status_counts[snapshot.get("status")] += sign
+        task = snapshot.get("current_task")
+        if task is not None:
+            self.task_counts[task] += sign
+            self.active_tasks += sign
+        battery = snapshot.get("battery")
+        bucket = battery_bucket(battery)
+        if bucket is not None:
+            self.battery_histogram[bucket] += sign
+            self.battery_total += sign * battery
+            self.battery_count += sign
+            if battery < LOW_BATTERY:
+                self.low_battery += sign
+
+    def _remove(self, snapshot: dict):
+        self._add(snapshot, -1)
+
+    def stats(self) -> dict:
+        now = self.clock() - self.started_at
+        statuses = set(self.status_counts) | set(self.status_seconds)
+        return {
+            "version": self.version,
+            "timestamp": datetime.now().isoformat(),
+            "robots": len(self.robots),
+            "status": {status: count for status, count in self.status_counts.items() if count},
+            "tasks": {
+                "active": self.active_tasks,
+                "by_type": {task: count for task, count in self.task_counts.items() if count},
+            },
+            "battery": {
+                "average": round(self.battery_total / self.battery_count, 1) if self.battery_count else None,
+                "low": self.low_battery,
+                "bucket_size": 100 // BATTERY_BUCKETS,
+                "histogram": list(self.battery_histogram),
+            },
+            "uptime": {
+                "seconds": round(now, 1),
+                # 상태별 로봇-초 (모든 로봇이 각 상태에 머문 시간의 합)
+                "status_seconds": {
+                    status: round(self.status_seconds[status]
+                                  + self.status_counts[status] * now - self.status_since[status], 1)
+                    for status in statuses
+                },
+            },
+        }
+
+    def robots_snapshot(self) -> Tuple[str, bytes]:
+        """(ETag, 로봇 목록 JSON)"""
+        return self._snapshot("robots", lambda: list(self.robots.values()))
+
+    def stats_snapshot(self) -> Tuple[str, bytes]:
+        """(ETag, 집계 JSON)"""
+        return self._snapshot("stats", self.stats)
+
+    def _snapshot(self, kind: str, build) -> Tuple[str, bytes]:
+        # 로봇 목록 직렬화는 O(로봇 수)라 버전이 같거나 snapshot_interval 안이면 이전 본문을 그대로 사용
+        cached = self._snapshots.get(kind)
+        now = self.clock()
+        if cached and (cached[0] == self.version or now - cached[1] < self.snapshot_interval):
+            return cached[2], cached[3]
+        etag = f'"{self.boot:x}-{self.version}"'
+        body = json.dumps(build()).encode()
+        self._snapshots[kind] = (self.version, now, etag, body)
+        SNAPSHOTS.labels(kind).inc()
+        return etag, body
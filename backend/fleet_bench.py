@@ -0,0 +1,86 @@
+import random
+import sys
+import time
+from collections import Counter
+
+from fleet import FleetState, battery_bucket, BATTERY_BUCKETS, LOW_BATTERY
+
+# 플릿 집계 비교: 요청마다 전체 로봇을 다시 훑는 방식 vs 이벤트마다 증분 갱신하는 방식 (fleet.py)
+# 로봇마다 1Hz 모니터링 스냅샷이 들어온다고 보고 이벤트 처리 비용과 /api/robots, stats/update 응답 비용을 비교
+# 사용법: python fleet_bench.py [로봇 수] [이벤트 수]
+
+STATUSES = ["active", "charging", "idle", "error"]
+TASKS = [None, "patrol", "delivery", "cleaning"]
+
+
+def make_snapshot(robot_id: str, rng: random.Random) -> dict:
+    return {
+        "id": robot_id,
+        "status": rng.choice(STATUSES),
+        "battery": rng.randint(20, 100),
+        "location": {"x": rng.uniform(0, 100), "y": rng.uniform(0, 100)},
+        "current_task": rng.choice(TASKS),
+        "last_updated": "2026-01-01T00:00:00",
+    }
+
+
+def rescan_stats(robots: dict) -> dict:
+    # 기존처럼 요청마다 모든 로봇을 훑어서 집계
+    histogram = [0] * BATTERY_BUCKETS
+    batteries = [robot["battery"] for robot in robots.values()]
+    for battery in batteries:
+        histogram[battery_bucket(battery)] += 1
+    return {
+        "status": Counter(robot["status"] for robot in robots.values()),
+        "tasks": Counter(robot["current_task"] for robot in robots.values() if robot["current_task"]),
+        "battery": {"average": sum(batteries) / len(batteries), "histogram": histogram,
+                    "low": sum(1 for battery in batteries if battery < LOW_BATTERY)},
+    }
+
+
+def timed(function, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    rng = random.Random(0)
+    robot_ids = [f"ROBOT_{i:05d}" for i in range(count)]
+    fleet = FleetState()
+    for robot_id in robot_ids:
+        fleet.update(robot_id, make_snapshot(robot_id, rng))
+    stream = [(robot_id, make_snapshot(robot_id, rng)) for robot_id in rng.choices(robot_ids, k=events)]
+
+    started = time.perf_counter()
+    for robot_id, snapshot in stream:
+        fleet.update(robot_id, snapshot)
+    update_us = (time.perf_counter() - started) / events * 1e6
+
+    expected = rescan_stats(fleet.robots)
+    stats = fleet.stats()
+    assert stats["status"] == {k: v for k, v in expected["status"].items() if v}
+    assert stats["battery"]["histogram"] == expected["battery"]["histogram"]
+    assert stats["battery"]["low"] == expected["battery"]["low"]
+
+    rescan_ms = timed(lambda: rescan_stats(fleet.robots), 50)
+    stats_ms = timed(fleet.stats, 1000)
+    fleet.snapshot_interval = 0
+    rebuild_ms = timed(lambda: (fleet.update(robot_ids[0], stream[0][1]), fleet.robots_snapshot()), 20)
+    fleet.snapshot_interval = 1.0
+    fleet.robots_snapshot()
+    cached_ms = timed(fleet.robots_snapshot, 1000)
+    _, body = fleet.robots_snapshot()
+
+    print(f"로봇 {count:,}대, 이벤트 {events:,}개 (1Hz 기준 초당 이벤트 {count:,}개)")
+    print(f"증분 갱신: 이벤트당 {update_us:.2f}us (1Hz 전체 {update_us * count / 1000:.2f}ms/s)")
+    print(f"집계: 전체 재계산 {rescan_ms:.3f}ms, 증분 집계 읽기 {stats_ms:.4f}ms")
+    print(f"/api/robots: 새로 직렬화 {rebuild_ms:.2f}ms ({len(body) / 1024:.0f}KB), "
+          f"캐시 재사용 {cached_ms * 1000:.1f}us, 304 응답은 본문 없음")
+
+
+if __name__ == "__main__":
+    main()
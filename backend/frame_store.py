@@ -0,0 +1,339 @@
+import asyncio
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select
+
+from models import CameraFrame, CameraSegment
+from recorder import valid_name
+from structured_log import log
+
+# 카메라 녹화 저장소
+# base64 문자열을 DB에 넣는 대신(CameraData.image_data) 인코딩된 JPEG를 그대로 로봇별 세그먼트 파일에 이어 붙이고
+# (MJPEG - JPEG를 연속으로 붙인 형식), 프레임 위치 (robot_id, frame_number, timestamp, offset, length)만 DB에 인덱스로 저장
+# 읽기는 세그먼트 파일을 mmap 해서 필요한 바이트 범위만 잘라 씀 (재생/내보내기 모두 base64 변환 없음)
+# 파일 쓰기는 전용 스레드 하나에서 순서대로 처리하고, 쓰기가 끝난 프레임만 인덱스(pending)에 올림
+# max_age(초)/max_bytes를 넘은 오래된 세그먼트는 prune에서 파일과 인덱스를 함께 삭제
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+# 녹화 중인 세그먼트 파일 하나
+# 파일 작업(_write/_close)은 FrameStore의 쓰기 스레드에서 실행하고, 프레임 위치도 실제로 쓴 파일 위치로 기록
+# 쓰기에 실패하면 failed가 되어 더 이상 쓰지 않음 (FrameStore가 새 세그먼트를 시작)
+class SegmentWriter:
+    def __init__(self, root: str, robot_id: str, start_time: float):
+        self.id = f"{robot_id}-{int(start_time * 1000)}"
+        self.robot_id = robot_id
+        self.path = os.path.join(robot_id, f"{self.id}.mjpg")
+        self.full_path = os.path.join(root, self.path)
+        self.start_time = start_time
+        self.end_time = start_time
+        self.frame_count = 0
+        self.size = 0
+        self.pending: List[tuple] = []  # 파일에 썼지만 DB에 아직 쓰지 않은 (frame_number, timestamp, offset, length)
+        self.closed = False    # 더 이상 프레임을 받지 않음
+        self.failed = False    # 쓰기 실패 - 이후 프레임은 버림
+        self.finished = False  # 쓰기 스레드가 파일까지 닫음
+        self._file = None
+
+    def close(self):
+        self.closed = True
+
+    def _write(self, frame_number: int, timestamp: float, buffer):
+        if self.failed:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.full_path), exist_ok=True)
+                # 버퍼 없이 바로 쓰기 - 쓰자마자 같은 파일의 mmap 읽기에서 보이도록
+                self._file = open(self.full_path, "ab", buffering=0)
+            offset = self._file.tell()
+            view = memoryview(buffer).cast("B")
+            written = 0
+            while written < len(view):  # 버퍼 없는 write는 일부만 쓸 수 있음
+                written += self._file.write(view[written:])
+        except Exception:
+            self.failed = True
+            raise
+        self.pending.append((frame_number, timestamp, offset, len(view)))
+        self.size = offset + len(view)
+        self.frame_count += 1
+        self.end_time = timestamp
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+        self.finished = True
+
+    def info(self):
+        return {
+            "id": self.id,
+            "robot_id": self.robot_id,
+            "path": self.path,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "frame_count": self.frame_count,
+            "size_bytes": self.size,
+            "recording": not self.closed,
+        }
+
+
+# 세그먼트 파일 읽기 (with 블록 안에서 read/iter_range 사용)
+class SegmentReader:
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # 녹화 중인 파일은 연 시점까지의 크기만 매핑
+        self._mmap = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+        self.size = size
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self._mmap is None or offset + length > self.size:
+            raise ValueError("세그먼트 범위를 벗어났습니다")
+        return self._mmap[offset:offset + length]
+
+    def iter_range(self, start: int, end: int, chunk_size: int = READ_CHUNK_SIZE):
+        """[start, end) 바이트 범위를 chunk_size씩 반환 (내보내기/HTTP Range 응답용)"""
+        end = min(end, self.size)
+        for offset in range(start, end, chunk_size):
+            yield self.read(offset, min(chunk_size, end - offset))
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def segment_info(row: CameraSegment):
+    return {
+        "id": row.id,
+        "robot_id": row.robot_id,
+        "path": row.path,
+        "start_time": row.start_time,
+        "end_time": row.end_time,
+        "frame_count": row.frame_count,
+        "size_bytes": row.size_bytes,
+        "recording": False,
+    }
+
+
+class FrameStore:
+    def __init__(self, root: str, session_factory, segment_seconds: float = 60.0,
+                 max_segment_bytes: int = 256 * 1024 * 1024, max_age: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        self.root = root
+        self.session_factory = session_factory  # async_sessionmaker
+        self.segment_seconds = segment_seconds
+        self.max_segment_bytes = max_segment_bytes
+        self.max_age = max_age      # 이보다 오래된 세그먼트 삭제 (초, None이면 제한 없음)
+        self.max_bytes = max_bytes  # 전체 용량이 넘으면 오래된 세그먼트부터 삭제 (None이면 제한 없음)
+        self._writers: Dict[str, SegmentWriter] = {}  # robot_id -> 녹화 중인 세그먼트
+        self._closed: List[SegmentWriter] = []         # 닫혔지만 인덱스를 아직 다 쓰지 못한 세그먼트
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-store")
+
+        # 통계
+        self.frames = 0
+        self.bytes_written = 0
+        self.frames_indexed = 0
+        self.flush_ms = 0.0
+        self.flushes = 0
+        self.write_errors = 0
+        self.segments_deleted = 0
+        self.bytes_deleted = 0
+
+    def append(self, robot_id: str, frame_number: int, timestamp: float, buffer) -> bool:
+        """JPEG 프레임 하나를 세그먼트 파일에 추가 (파일 쓰기는 쓰기 스레드에서, 인덱스는 flush에서 DB에 저장)
+        robot_id는 디렉터리 이름으로 쓰므로 안전하지 않은 이름이면 저장하지 않고 False 반환"""
+        if not valid_name(robot_id):
+            return False
+        writer = self._writers.get(robot_id)
+        if writer is not None and (timestamp - writer.start_time >= self.segment_seconds
+                                   or writer.size >= self.max_segment_bytes or writer.failed):
+            self.close_segment(robot_id)
+            writer = None
+        if writer is None:
+            writer = self._writers[robot_id] = SegmentWriter(self.root, robot_id, timestamp)
+        self._executor.submit(self._run, writer._write, frame_number, timestamp, buffer)
+        self.frames += 1
+        self.bytes_written += memoryview(buffer).nbytes
+        return True
+
+    def close_segment(self, robot_id: str):
+        writer = self._writers.pop(robot_id, None)
+        if writer is not None:
+            writer.close()
+            self._executor.submit(self._run, writer._close)
+            self._closed.append(writer)
+
+    def _run(self, function, *args):
+        try:
+            function(*args)
+        except Exception as e:
+            self.write_errors += 1
+            log.warning("frame_write_error", "녹화 파일 쓰기 실패", sample=5.0, error=str(e))
+
+    async def drain(self):
+        """지금까지 넘긴 파일 쓰기가 모두 끝날 때까지 대기"""
+        await asyncio.get_running_loop().run_in_executor(self._executor, lambda: None)
+
+    async def flush(self, close_all: bool = False):
+        """새 프레임 인덱스와 세그먼트 정보를 한 트랜잭션으로 저장"""
+        if close_all:
+            for robot_id in list(self._writers):
+                self.close_segment(robot_id)
+            await self.drain()
+        writers = [writer for writer in list(self._writers.values()) + self._closed if writer.pending]
+        if not writers:
+            self._closed = [writer for writer in self._closed if not writer.finished]
+            return 0
+
+        started = time.perf_counter()
+        # 쓰는 동안 새로 들어온 프레임은 다음 flush에서 처리
+        batches = [(writer, list(writer.pending)) for writer in writers]
+        async with self.session_factory() as session:
+            for writer, frames in batches:
+                info = writer.info()
+                info.pop("recording")
+                await session.merge(CameraSegment(**info))
+                session.add_all(
+                    CameraFrame(segment_id=writer.id, robot_id=writer.robot_id, frame_number=frame_number,
+                                timestamp=timestamp, offset=offset, length=length)
+                    for frame_number, timestamp, offset, length in frames
+                )
+            await session.commit()
+
+        for writer, frames in batches:
+            del writer.pending[:len(frames)]
+            self.frames_indexed += len(frames)
+        # 쓰기 스레드가 아직 처리 중인 세그먼트는 남겨 둠
+        self._closed = [writer for writer in self._closed if writer.pending or not writer.finished]
+        self.flushes += 1
+        self.flush_ms += (time.perf_counter() - started) * 1000
+        return sum(len(frames) for _, frames in batches)
+
+    async def prune(self, now: Optional[float] = None) -> int:
+        """max_age/max_bytes를 넘은 닫힌 세그먼트의 파일과 인덱스 삭제 - 삭제한 세그먼트 수 반환"""
+        if self.max_age is None and self.max_bytes is None:
+            return 0
+        now = time.time() if now is None else now
+        recording = self._recording()
+        query = (select(CameraSegment.id, CameraSegment.path, CameraSegment.end_time, CameraSegment.size_bytes)
+                 .order_by(CameraSegment.start_time))
+        async with self.session_factory() as session:
+            rows = [row for row in (await session.execute(query)).all() if row.id not in recording]
+
+        total = sum(row.size_bytes for row in rows) + sum(writer.size for writer in recording.values())
+        expired = []
+        for row in rows:  # 오래된 순
+            too_old = self.max_age is not None and row.end_time < now - self.max_age
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_old or too_big):
+                break
+            expired.append(row)
+            total -= row.size_bytes
+        if not expired:
+            return 0
+
+        def remove_files():
+            for row in expired:
+                try:
+                    os.remove(os.path.join(self.root, row.path))
+                except FileNotFoundError:
+                    pass
+
+        await asyncio.to_thread(remove_files)
+        ids = [row.id for row in expired]
+        async with self.session_factory() as session:
+            await session.execute(delete(CameraFrame).where(CameraFrame.segment_id.in_(ids)))
+            await session.execute(delete(CameraSegment).where(CameraSegment.id.in_(ids)))
+            await session.commit()
+        self.segments_deleted += len(expired)
+        self.bytes_deleted += sum(row.size_bytes for row in expired)
+        return len(expired)
+
+    def _recording(self):
+        return {writer.id: writer for writer in list(self._writers.values()) + self._closed}
+
+    async def list_segments(self, robot_id: Optional[str] = None, start: Optional[float] = None,
+                            end: Optional[float] = None):
+        """세그먼트 목록 (시작 시각 역순) - [start, end] 구간과 겹치는 것만"""
+        query = select(CameraSegment)
+        if robot_id:
+            query = query.where(CameraSegment.robot_id == robot_id)
+        if start is not None:
+            query = query.where(CameraSegment.end_time >= start)
+        if end is not None:
+            query = query.where(CameraSegment.start_time <= end)
+        async with self.session_factory() as session:
+            segments = {row.id: segment_info(row) for row in (await session.execute(query)).scalars()}
+
+        # 녹화 중인 세그먼트는 메모리의 정보가 최신
+        for segment_id, writer in self._recording().items():
+            if ((not robot_id or writer.robot_id == robot_id)
+                    and (start is None or writer.end_time >= start)
+                    and (end is None or writer.start_time <= end)):
+                segments[segment_id] = writer.info()
+        return sorted(segments.values(), key=lambda segment: segment["start_time"], reverse=True)
+
+    async def get_segment(self, segment_id: str):
+        writer = self._recording().get(segment_id)
+        if writer is not None:
+            return writer.info()
+        async with self.session_factory() as session:
+            row = await session.get(CameraSegment, segment_id)
+        return segment_info(row) if row is not None else None
+
+    async def frame_index(self, segment_id: str, start_frame: Optional[int] = None,
+                          end_frame: Optional[int] = None):
+        """세그먼트의 프레임 위치 [(frame_number, timestamp, offset, length), ...] (파일 순서)"""
+        writer = self._recording().get(segment_id)
+        pending = list(writer.pending) if writer is not None else []
+
+        query = (select(CameraFrame.frame_number, CameraFrame.timestamp, CameraFrame.offset, CameraFrame.length)
+                 .where(CameraFrame.segment_id == segment_id))
+        if start_frame is not None:
+            query = query.where(CameraFrame.frame_number >= start_frame)
+        if end_frame is not None:
+            query = query.where(CameraFrame.frame_number <= end_frame)
+        async with self.session_factory() as session:
+            rows = (await session.execute(query)).all()
+
+        # flush가 DB 조회와 겹치면 같은 프레임이 양쪽에 있을 수 있으므로 offset으로 중복 제거
+        frames = {row.offset: tuple(row) for row in rows}
+        for frame in pending:
+            if (start_frame is None or frame[0] >= start_frame) and (end_frame is None or frame[0] <= end_frame):
+                frames[frame[2]] = frame
+        return [frames[offset] for offset in sorted(frames)]
+
+    def open_reader(self, segment: dict) -> SegmentReader:
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, segment["path"]))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError("녹화 디렉터리 밖의 경로입니다")
+        return SegmentReader(path)
+
+    def get_stats(self):
+        return {
+            "root": os.path.abspath(self.root),
+            "recording": {robot_id: writer.id for robot_id, writer in self._writers.items()},
+            "frames": self.frames,
+            "bytes_written": self.bytes_written,
+            "frames_indexed": self.frames_indexed,
+            "pending_frames": sum(len(writer.pending) for writer in self._recording().values()),
+            "avg_flush_ms": round(self.flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "write_errors": self.write_errors,
+            "max_age": self.max_age,
+            "max_bytes": self.max_bytes,
+            "segments_deleted": self.segments_deleted,
+            "bytes_deleted": self.bytes_deleted,
+        }
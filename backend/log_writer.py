@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import deque
+
+from metrics import counter, histogram
+from structured_log import log
+
+INSERT_SECONDS = histogram("log_writer_insert_seconds", "로그 컬렉션별 insert_many 한 번의 시간", ["collection"],
+                           buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+DOCUMENTS = counter("log_writer_documents_total", "로그 문서 처리 수 (written, failed, dropped)", ["collection", "result"])
+
+
+# 로그 문서를 메모리 큐에 모아 두었다가 백그라운드에서 insert_many로 일괄 저장
+class LogWriter:
+    def __init__(self, database, max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+        self.database = database
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = deque()  # (collection 이름, 문서)
+        self._batch_ready = asyncio.Event()
+        self._task = None
+        self._closing = False
+
+        # 통계
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def pending(self) -> int:
+        """저장 대기 중인 문서 수"""
+        return len(self._queue)
+
+    def write(self, collection: str, document: dict) -> bool:
+        """문서를 큐에 넣고 바로 반환 (큐가 가득 차면 버리고 False 반환)"""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            DOCUMENTS.labels(collection, "dropped").inc()
+            return False
+        self._queue.append((collection, document))
+        self.enqueued += 1
+        if len(self._queue) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+            print("로그 writer 시작됨")
+
+    async def stop(self):
+        # 남은 로그를 모두 기록한 뒤 종료
+        if self._task is None:
+            return
+        self._closing = True
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+        print(f"로그 writer 종료됨: {self.get_stats()}")
+
+    async def _run(self):
+        while not self._closing:
+            # 배치 크기만큼 쌓이거나 flush_interval이 지나면 기록
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+        await self.flush()
+
+    async def flush(self):
+        while self._queue:
+            count = min(self.batch_size, len(self._queue))
+            batch = {}
+            for _ in range(count):
+                collection, document = self._queue.popleft()
+                batch.setdefault(collection, []).append(document)
+
+            started = time.monotonic()
+            for collection, documents in batch.items():
+                inserted = time.monotonic()
+                try:
+                    await self.database[collection].insert_many(documents, ordered=False)
+                    self.written += len(documents)
+                    DOCUMENTS.labels(collection, "written").inc(len(documents))
+                except Exception as e:
+                    self.failed += len(documents)
+                    DOCUMENTS.labels(collection, "failed").inc(len(documents))
+                    log.warning("log_write_failed", "로그 저장 실패", sample=30.0, key=collection,
+                                collection=collection, documents=len(documents), error=str(e))
+                INSERT_SECONDS.labels(collection).observe(time.monotonic() - inserted)
+            self.batches += 1
+            self.last_flush_ms = (time.monotonic() - started) * 1000
+
+    def get_stats(self):
+        return {
+            "queued": len(self._queue),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
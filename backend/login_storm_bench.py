@@ -0,0 +1,109 @@
+import asyncio
+import sys
+import threading
+import time
+
+import bcrypt
+import httpx
+import uvicorn
+import websockets
+
+import main
+from password_pool import PasswordPool
+
+# 로그인 폭주 부하 테스트: /token 요청이 몰릴 때 센서 WebSocket(10Hz) 수신 간격이 유지되는지 측정
+# 서버는 같은 프로세스의 별도 스레드에서 실행하고, MongoDB 없이 bcrypt 해시를 가진 사용자로 로그인
+# 사용법: python login_storm_bench.py [동시 로그인 수] [bcrypt rounds]
+
+PORT = 8765
+SENSOR_INTERVAL_MS = 100
+
+
+# 비교 기준: 기존처럼 이벤트 루프 안에서 바로 bcrypt를 실행
+class InlinePool:
+    async def run(self, func, *args):
+        return func(*args)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+async def receive_gaps(url: str, stop: asyncio.Event):
+    # 메시지 수신 간격(ms) 목록
+    gaps = []
+    async with websockets.connect(url) as websocket:
+        await websocket.recv()
+        last = time.perf_counter()
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(websocket.recv(), 1.0)
+            except asyncio.TimeoutError:
+                continue
+            now = time.perf_counter()
+            gaps.append((now - last) * 1000)
+            last = now
+    return gaps
+
+
+async def login_storm(logins: int):
+    latencies, statuses = [], {}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", timeout=60) as client:
+        async def login():
+            started = time.perf_counter()
+            response = await client.post("/token", data={"username": "operator", "password": "secret"})
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        await asyncio.gather(*(login() for _ in range(logins)))
+    return latencies, statuses
+
+
+async def run(name: str, logins: int):
+    stop = asyncio.Event()
+    receiver = asyncio.create_task(receive_gaps(f"ws://127.0.0.1:{PORT}/ws/sensor/ROBOT_001", stop))
+    await asyncio.sleep(1.0)  # 평상시 수신 간격
+    started = time.perf_counter()
+    latencies, statuses = await login_storm(logins)
+    storm_s = time.perf_counter() - started
+    await asyncio.sleep(0.5)
+    stop.set()
+    gaps = await receiver
+
+    print(f"{name:<10}{percentile(gaps, 0.5):>9.0f}{percentile(gaps, 0.99):>9.0f}{max(gaps):>9.0f}"
+          f"{storm_s:>10.2f}{percentile(latencies, 0.99):>12.0f}  {statuses}")
+
+
+async def bench(logins: int, rounds: int):
+    hashed = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds)).decode()
+
+    async def get_user(username: str):
+        return main.UserInDB(username=username, email=f"{username}@example.com", hashed_password=hashed)
+    main.get_user = get_user
+
+    print(f"로그인 폭주 테스트 (동시 로그인 {logins}회, bcrypt rounds {rounds}, 센서 주기 {SENSOR_INTERVAL_MS}ms)")
+    print(f"{'방식':<10}{'간격p50':>9}{'간격p99':>9}{'간격max':>9}{'폭주(s)':>10}{'로그인p99':>12}  응답 코드")
+    for name, pool in (("inline", InlinePool()), ("pool", PasswordPool())):
+        main.password_pool = pool
+        await run(name, logins)
+
+
+def serve():
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+if __name__ == "__main__":
+    server, thread = serve()
+    try:
+        asyncio.run(bench(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 12,
+        ))
+    finally:
+        server.should_exit = True
+        thread.join()
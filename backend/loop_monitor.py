@@ -0,0 +1,214 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional, Tuple
+
+from metrics import counter, histogram
+from scheduler import TickStats
+from structured_log import log
+
+# 이벤트 루프 지연 모니터
+# - 지연 샘플러 (항상 켜짐): interval초마다 절대 마감 시각에 깨어나 늦게 깨어난 시간(지연)을 기록
+# - 느린 콜백 감지 (선택): 감시 스레드가 루프에 ping을 보내고 threshold 안에 응답이 없으면
+#   그 순간 루프 스레드의 스택과 실행 중인 태스크를 기록 (루프가 멈춘 원인 코드를 멈춘 동안 직접 캡처)
+#   ping은 threshold/4마다 하나씩만 보내므로 켜 두어도 부하는 초당 수십 번의 call_soon_threadsafe 정도
+#   threshold * 1.25 이상 멈춘 경우는 항상 잡히고, 기록하는 멈춘 시간은 ping 이후부터라 실제보다 조금 짧을 수 있음
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.25"))
+# 0이면 느린 콜백 감지를 끔 (기본)
+LOOP_SLOW_MS = float(os.getenv("LOOP_SLOW_MS", "0"))
+MAX_OFFENDERS = 100   # 원인 위치별 집계 최대 개수 (넘으면 가장 오래전에 본 항목부터 버림)
+STACK_LIMIT = 30      # 기록하는 스택 프레임 수
+
+LOOP_LAG = histogram("event_loop_lag_seconds", "이벤트 루프 지연 (예정 시각보다 늦게 깨어난 시간)",
+                     buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+LOOP_STALLS = counter("event_loop_stalls_total", "느린 콜백 감지 기준을 넘게 멈춘 횟수")
+LOOP_STALL_SECONDS = histogram("event_loop_stall_seconds", "느린 콜백으로 이벤트 루프가 멈춘 시간",
+                               buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+
+_SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _offender_frame(stack):
+    # 가장 안쪽의 이 프로젝트 코드 프레임 (없으면 가장 안쪽 프레임) - bcrypt, cv2 같은 C 함수는 호출한 줄로 나타남
+    for frame in reversed(stack):
+        if os.path.abspath(frame.filename).startswith(_SOURCE_DIR) and not frame.filename.endswith("loop_monitor.py"):
+            return frame
+    return stack[-1] if stack else None
+
+
+# 원인 위치 하나의 집계
+class SlowCallback:
+    def __init__(self, location: str, task: str):
+        self.location = location
+        self.task = task
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen = 0.0
+        self.stack = []
+
+    def get_stats(self, with_stack: bool = True):
+        stats = {
+            "location": self.location,
+            "task": self.task,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "last_seen": self.last_seen,
+        }
+        if with_stack:
+            stats["stack"] = self.stack
+        return stats
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, slow_ms: float = LOOP_SLOW_MS):
+        self.interval = interval
+        self.slow_ms = slow_ms
+        self.lag = TickStats("event_loop", interval)
+        self.offenders: Dict[Tuple[str, str], SlowCallback] = {}
+        self.stalls = 0
+        self.worst_ms = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+        self._pong = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.create_task(self._sample_lag())
+        if self.slow_ms > 0:
+            self._start_watchdog()
+
+    async def stop(self):
+        self._stop_watchdog()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def configure(self, slow_ms: float):
+        """느린 콜백 감지 기준 변경 (0이면 끔) - 실행 중에도 적용"""
+        self.slow_ms = max(0.0, slow_ms)
+        self._stop_watchdog()
+        if self.slow_ms > 0 and self._loop is not None:
+            self._start_watchdog()
+
+    async def _sample_lag(self):
+        deadline = time.monotonic() + self.interval
+        while True:
+            await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+            now = time.monotonic()
+            self.lag.record(deadline, now)
+            LOOP_LAG.observe(max(0.0, now - deadline))
+            # 한 주기 이상 밀렸으면 놓친 샘플은 건너뜀
+            deadline += self.interval
+            if now > deadline:
+                missed = int((now - deadline) // self.interval) + 1
+                self.lag.skipped += missed
+                deadline += missed * self.interval
+
+    def _start_watchdog(self):
+        # 스레드마다 stop/pong 이벤트를 따로 두어, 멈추라고 신호만 보낸 이전 스레드가 새 스레드의 핑에 섞이지 않게 함
+        self._stop = threading.Event()
+        self._pong = threading.Event()
+        thread = threading.Thread(target=self._watch, args=(self._stop, self._pong, self.slow_ms / 1000),
+                                  name="loop-monitor", daemon=True)
+        thread.start()
+
+    def _stop_watchdog(self):
+        # 이벤트 루프에서 호출되므로 join으로 기다리지 않고 신호만 보냄 (스레드는 다음 대기에서 깨어나 종료)
+        self._stop.set()
+        self._pong.set()
+
+    def _watch(self, stop: threading.Event, pong: threading.Event, threshold: float):
+        while not stop.is_set():
+            pong.clear()
+            sent = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(pong.set)
+            except RuntimeError:
+                # 이벤트 루프가 이미 종료된 경우
+                return
+            if not pong.wait(threshold) and not stop.is_set():
+                # 루프가 멈춰 있는 동안 스택을 캡처하고, 응답이 올 때까지 기다려 멈춘 시간을 잼
+                stack, task = self._capture()
+                pong.wait()
+                if stop.is_set():
+                    return
+                self._record(stack, task, (time.monotonic() - sent) * 1000)
+            stop.wait(threshold / 4)
+
+    def _capture(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame, limit=STACK_LIMIT) if frame is not None else []
+        task = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            pass
+        if task is None:
+            # 태스크 밖의 콜백 (call_soon, 타이머 콜백 등)
+            return stack, "-"
+        name = task.get_name()
+        if name.startswith("Task-"):
+            # 이름 없는 태스크는 번호가 요청마다 달라지므로 코루틴 이름으로 묶음
+            coro = task.get_coro()
+            name = getattr(coro, "__qualname__", None) or repr(coro)
+        return stack, name
+
+    def _record(self, stack, task: str, stalled_ms: float):
+        frame = _offender_frame(stack)
+        location = f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}" if frame else "?"
+        with self._lock:
+            self.stalls += 1
+            self.worst_ms = max(self.worst_ms, stalled_ms)
+            key = (location, task)
+            offender = self.offenders.get(key)
+            if offender is None:
+                if len(self.offenders) >= MAX_OFFENDERS:
+                    oldest = min(self.offenders, key=lambda k: self.offenders[k].last_seen)
+                    del self.offenders[oldest]
+                offender = self.offenders[key] = SlowCallback(location, task)
+            offender.count += 1
+            offender.total_ms += stalled_ms
+            offender.max_ms = max(offender.max_ms, stalled_ms)
+            offender.last_seen = time.time()
+            offender.stack = [f"{f.filename}:{f.lineno} {f.name}: {f.line}" for f in stack]
+        LOOP_STALLS.inc()
+        LOOP_STALL_SECONDS.observe(stalled_ms / 1000)
+        log.warning("loop_stalled", "이벤트 루프 멈춤", sample=5.0, key=location,
+                    location=location, task=task, stalled_ms=round(stalled_ms, 1))
+
+    def get_stats(self, limit: int = 10, with_stack: bool = True):
+        with self._lock:
+            offenders = sorted(self.offenders.values(), key=lambda o: o.total_ms, reverse=True)[:limit]
+            top = [offender.get_stats(with_stack) for offender in offenders]
+        return {
+            "lag": self.lag.get_stats(),
+            "slow_callbacks": {
+                "enabled": self.slow_ms > 0,
+                "threshold_ms": self.slow_ms,
+                "stalls": self.stalls,
+                "worst_ms": round(self.worst_ms, 1),
+                "offenders": top,
+            },
+        }
+
+    def reset(self):
+        with self._lock:
+            self.offenders.clear()
+            self.stalls = 0
+            self.worst_ms = 0.0
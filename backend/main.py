@@ -1,21 +1,51 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, status, Depends
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, status, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.responses import Response, StreamingResponse
 import json
+import os
 import asyncio
 import random
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Set, Callable
 from pydantic import BaseModel
 import numpy as np
 import cv2
 import base64
+import gzip
+import struct
 import time
 import motor.motor_asyncio
 import bcrypt
 from bson import ObjectId
 from jose import JWTError, jwt
 
+from camera_worker import CameraWorker, capture_jpeg
+from camera_abr import AdaptiveController, FrameVariants, EncodedVariants, parse_level
+from camera_protocol import PROTOCOL_JSON, PROTOCOL_BINARY, PROTOCOLS, pack_frame, unpack_frame, payload_key, split_payload_key
+from log_writer import LogWriter
+from topic_broker import TopicBroker, TelemetryFeed, TopicMessage, encode_topic_message
+from outbound import OutboundQueue, POLICY_DROP_OLDEST, POLICY_LATEST
+from telemetry import TelemetryHub, SimulatedTelemetrySource
+from scheduler import TickScheduler
+from metrics import REGISTRY, CONTENT_TYPE, gauge
+from loop_monitor import LoopMonitor
+from map_tiles import MapTileService
+from map_codec import pack_map_diff
+from fleet import FleetState
+from bus import BusClient, LocalBus, RemoteDemand, dumps, loads, run_server, parse_address, ROLE_OWNER, LEFT_CHANNEL
+from spatial import SpatialIndex, Zone
+from structured_log import log
+from pointcloud import pack_points, unpack_points, points_to_dicts, parse_lod, apply_lod
+from scan_codec import ScanEncoder, PROTOCOL_SCAN
+from auth_cache import AuthCache, MISSING
+from password_pool import PasswordPool, PasswordPoolBusy
+from database import AsyncSessionLocal, init_models
+from models import Base as ModelBase
+from frame_store import FrameStore
+from recorder import StreamRecorder, valid_name
+from ring_buffer import KIND_TEXT
+
 # MongoDB 연결 설정
 MONGO_URL = "mongodb://localhost:27017/?directConnection=true"
 client = motor.motor_asyncio.AsyncIOMotorClient(
@@ -25,11 +55,20 @@ client = motor.motor_asyncio.AsyncIOMotorClient(
 )
 db = client.robocop_db
 
+# 카메라/웹소켓 로그는 write-behind 방식으로 MongoDB에 일괄 저장
+log_writer = LogWriter(client.robocop_db)
+
 # JWT 설정
 SECRET_KEY = "your-secret-key"  # 실제 운영환경에서는 안전한 키로 변경
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# 검증된 토큰과 사용자 레코드 캐시 - 요청마다 jwt.decode와 사용자 조회를 반복하지 않음
+auth_cache = AuthCache()
+
+# bcrypt 검증은 이벤트 루프 밖의 제한된 스레드 풀에서 실행 (로그인 폭주 시에도 스트림이 멈추지 않게)
+password_pool = PasswordPool()
+
 # API 모델 정의
 class User(BaseModel):
     username: str
@@ -114,29 +153,81 @@ async def add_cors_headers(request, call_next):
 
 # WebSocket 연결 관리를 위한 클래스
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, max_queue: int = 100, max_overflows: int = 50, policies: Optional[Dict[str, str]] = None):
         self.active_connections: Dict[str, Dict[str, List[WebSocket]]] = {
             "monitoring": {},  # robot_id별 연결 관리
             "camera": {},      # robot_id별 연결 관리
             "sensor": {},      # robot_id별 연결 관리
+            "lidar": {},       # 포인트 클라우드 소스별 연결 관리
         }
+        # 연결별 전송 방식 (json 또는 binary), 연결 시점에 결정
+        self.protocols: Dict[WebSocket, str] = {}
+        # 연결별 데이터 변형 (예: 포인트 클라우드 LOD), 같은 변형끼리 페이로드를 공유
+        self.variants: Dict[WebSocket, Any] = {}
+        # /ws 토픽별 구독자 집합과 구독별 전송 방식/변형
+        self.topics: Dict[str, Set[WebSocket]] = {}
+        self.topic_protocols: Dict[tuple, str] = {}
+        self.topic_variants: Dict[tuple, Any] = {}
+        # 연결별 전송 큐와 (client_type, robot_id)
+        self.outbound: Dict[WebSocket, OutboundQueue] = {}
+        self.connection_keys: Dict[WebSocket, tuple] = {}
+        self.max_queue = max_queue
+        self.max_overflows = max_overflows
+        # client_type별 큐 넘침 처리 방식 (기본은 오래된 메시지 버림)
+        self.policies = policies or {"camera": POLICY_LATEST}
         print("ConnectionManager 초기화됨")
 
-    async def connect(self, websocket: WebSocket, client_type: str, robot_id: str):
+    async def connect(self, websocket: WebSocket, client_type: str, robot_id: str, protocol: str = PROTOCOL_JSON,
+                      variant: Any = None):
         await websocket.accept()
         if robot_id not in self.active_connections[client_type]:
             self.active_connections[client_type][robot_id] = []
         self.active_connections[client_type][robot_id].append(websocket)
-        print(f"새로운 WebSocket 연결: {client_type} - Robot {robot_id}")
-        print(f"현재 연결 상태: {self.get_connection_status()}")
+        self.protocols[websocket] = protocol
+        self.set_variant(websocket, variant)
+        self.connection_keys[websocket] = (client_type, robot_id)
+        self._open_queue(websocket, f"{client_type}/{robot_id}",
+                         self.policies.get(client_type, POLICY_DROP_OLDEST))
+        log.info("ws_connected", "새로운 WebSocket 연결", type=client_type, robot_id=robot_id)
+        if log.enabled("debug"):
+            log.debug("ws_status", "현재 연결 상태", status=json.dumps(self.get_connection_status()))
+
+    async def connect_topics(self, websocket: WebSocket):
+        # /ws 토픽 연결은 여러 토픽이 섞이므로 텔레메트리 방식으로 처리
+        await websocket.accept()
+        self._open_queue(websocket, "topics", self.policies.get("topics", POLICY_DROP_OLDEST))
+
+    def _open_queue(self, websocket: WebSocket, label: str, policy: str):
+        queue = OutboundQueue(websocket, label, policy, self.max_queue, self.max_overflows,
+                              on_close=self._on_queue_closed)
+        self.outbound[websocket] = queue
+        queue.start()
+
+    def _close_queue(self, websocket: WebSocket):
+        queue = self.outbound.pop(websocket, None)
+        if queue:
+            queue.close()
+
+    def _on_queue_closed(self, queue: OutboundQueue):
+        # 전송 실패나 큐 넘침으로 닫힌 연결을 정리
+        websocket = queue.websocket
+        if websocket in self.connection_keys:
+            self.disconnect(websocket, *self.connection_keys[websocket])
+        else:
+            self.disconnect_topics(websocket)
 
     def disconnect(self, websocket: WebSocket, client_type: str, robot_id: str):
-        if robot_id in self.active_connections[client_type]:
+        if websocket in self.active_connections[client_type].get(robot_id, []):
             self.active_connections[client_type][robot_id].remove(websocket)
+            self.protocols.pop(websocket, None)
+            self.variants.pop(websocket, None)
+            self.connection_keys.pop(websocket, None)
+            self._close_queue(websocket)
             if not self.active_connections[client_type][robot_id]:
                 del self.active_connections[client_type][robot_id]
-            print(f"WebSocket 연결 해제: {client_type} - Robot {robot_id}")
-            print(f"현재 연결 상태: {self.get_connection_status()}")
+            log.info("ws_disconnected", "WebSocket 연결 해제", type=client_type, robot_id=robot_id)
+            if log.enabled("debug"):
+                log.debug("ws_status", "현재 연결 상태", status=json.dumps(self.get_connection_status()))
 
     def get_connection_status(self):
         status = {}
@@ -145,12 +236,102 @@ class ConnectionManager:
                 robot_id: len(connections)
                 for robot_id, connections in robots.items()
             }
+        status["topics"] = {
+            topic: len(subscribers)
+            for topic, subscribers in self.topics.items()
+        }
         return status
 
-    async def broadcast_to_robot(self, message: dict, client_type: str, robot_id: str):
+    def get_queue_stats(self):
+        # 연결별 전송 큐 깊이와 버린 메시지 수
+        return [queue.get_stats() for queue in self.outbound.values()]
+
+    def get_queue_depths(self):
+        # 연결 종류별 전송 큐 깊이 합계 (topics 연결 포함)
+        depths = {}
+        for queue in list(self.outbound.values()):
+            depths[queue.kind] = depths.get(queue.kind, 0) + queue.depth()
+        return depths
+
+    def set_variant(self, websocket: WebSocket, variant: Any = None):
+        # 연결 중에도 변경 가능, 다음 메시지부터 적용
+        if variant is None:
+            self.variants.pop(websocket, None)
+        else:
+            self.variants[websocket] = variant
+
+    def subscribe_topic(self, websocket: WebSocket, topic: str, protocol: str = PROTOCOL_JSON, variant: Any = None):
+        # 이미 구독 중인 토픽이면 전송 방식/변형만 바꿈
+        self.topics.setdefault(topic, set()).add(websocket)
+        self.topic_protocols[(websocket, topic)] = protocol
+        if variant is None:
+            self.topic_variants.pop((websocket, topic), None)
+        else:
+            self.topic_variants[(websocket, topic)] = variant
+
+    def unsubscribe_topic(self, websocket: WebSocket, topic: str):
+        self.topic_protocols.pop((websocket, topic), None)
+        self.topic_variants.pop((websocket, topic), None)
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.topics[topic]
+
+    def disconnect_topics(self, websocket: WebSocket):
+        for topic in [topic for topic, subscribers in self.topics.items() if websocket in subscribers]:
+            self.unsubscribe_topic(websocket, topic)
+        self._close_queue(websocket)
+
+    def has_topic_subscribers(self, topic: str):
+        return bool(self.topics.get(topic))
+
+    def publish(self, topic: str, data):
+        # 토픽 메시지는 전송 방식/변형별로 한 번만 직렬화해서 각 구독자의 전송 큐에 넣음
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return
+        payloads = {}
+        for connection in list(subscribers):
+            protocol = self.topic_protocols.get((connection, topic), PROTOCOL_JSON)
+            variant = self.topic_variants.get((connection, topic))
+            key = payload_key(protocol, variant)
+            if key not in payloads:
+                payloads[key] = encode_topic_message(topic, data, protocol, variant)
+            queue = self.outbound.get(connection)
+            if queue:
+                queue.put(payloads[key])
+
+    def send_to(self, websocket: WebSocket, payload):
+        # 미리 직렬화된 페이로드(str 또는 bytes)를 특정 연결에만 전송
+        queue = self.outbound.get(websocket)
+        if queue:
+            queue.put(payload)
+
+    def get_payload_key(self, websocket: WebSocket):
+        return payload_key(self.protocols.get(websocket, PROTOCOL_JSON), self.variants.get(websocket))
+
+    def get_protocols(self, client_type: str, robot_id: str):
+        # 변형이 있는 연결은 (전송 방식, 변형) 키로 반환 (payload_key 참고)
+        return {
+            self.get_payload_key(connection)
+            for connection in self.active_connections[client_type].get(robot_id, [])
+        }
+
+    def broadcast_to_robot(self, message: dict, client_type: str, robot_id: str):
+        # 메시지는 한 번만 직렬화해서 모든 연결에 같은 문자열을 전송
         if robot_id in self.active_connections[client_type]:
-            for connection in self.active_connections[client_type][robot_id]:
-                await connection.send_json(message)
+            self.send_payloads({PROTOCOL_JSON: json.dumps(message)}, client_type, robot_id)
+
+    def send_payloads(self, payloads: Dict[str, Any], client_type: str, robot_id: str):
+        # 전송 방식별로 미리 만든 페이로드를 각 연결의 전송 큐에 넣음 (없는 방식은 JSON 텍스트로 대체)
+        # 느린 클라이언트는 자기 큐만 쌓이고 다른 클라이언트 전송에는 영향을 주지 않음
+        for connection in list(self.active_connections[client_type].get(robot_id, [])):
+            protocol = self.protocols.get(connection, PROTOCOL_JSON)
+            queue = self.outbound.get(connection)
+            if queue:
+                payload = payloads.get(self.get_payload_key(connection), payloads.get(protocol))
+                queue.put(payload if payload is not None else payloads.get(PROTOCOL_JSON))
 
 manager = ConnectionManager()
 
@@ -164,13 +345,16 @@ async def authenticate_user(username: str, password: str):
     user = await get_user(username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_pool.run(verify_password, password, user.hashed_password):
         return False
     return user
 
 def verify_password(plain_password: str, hashed_password: str):
     return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
 
+def get_password_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -190,23 +374,47 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    username = auth_cache.get_token(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            token_data = TokenData(username=username)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    user = await get_user(username=token_data.username)
-    if user is None:
-        raise credentials_exception
+        username = token_data.username
+        auth_cache.set_token(token, username, payload.get("exp"))
+    user = auth_cache.get_user(username)
+    if user is MISSING:
+        user = await get_user(username=username)
+        if user is None:
+            raise credentials_exception
+        auth_cache.set_user(username, user)
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
+async def get_current_admin_user(current_user: UserInDB = Depends(get_current_user)):
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges"
+        )
+    return current_user
+
 # 로그인 엔드포인트 수정
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = await authenticate_user(form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(form_data.username, form_data.password)
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts, retry shortly",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -232,13 +440,60 @@ async def create_user(username: str, email: str, password: str, is_admin: bool =
         "is_active": True,
         "is_admin": is_admin
     }
+    replicate("store/users", db.users[username])
     return {"message": "User created successfully"}
 
+# 관리자용 사용자 정보 수정 - 변경된 사용자는 인증 캐시에서 바로 제거
+@app.put("/admin/users/{username}")
+async def update_user(username: str, email: Optional[str] = None, password: Optional[str] = None,
+                      is_admin: Optional[bool] = None, is_active: Optional[bool] = None,
+                      current_user: UserInDB = Depends(get_current_admin_user)):
+    user = db.users.get(username)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # 비밀번호는 로그인과 같은 bcrypt 스레드 풀에서 해시해서 hashed_password로 저장
+    hashed_password = None
+    if password is not None:
+        try:
+            hashed_password = await password_pool.run(get_password_hash, password)
+        except PasswordPoolBusy:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Password hashing is busy, retry shortly", headers={"Retry-After": "1"})
+        user.pop("password", None)
+    updates = {"email": email, "hashed_password": hashed_password, "is_admin": is_admin, "is_active": is_active}
+    user.update({key: value for key, value in updates.items() if value is not None})
+    auth_cache.invalidate_user(username)
+    replicate("store/users", user)
+    return {"message": "User updated successfully"}
+
+# 관리자용 사용자 비활성화 (레코드는 유지, 발급된 토큰은 더 이상 인증되지 않음)
+@app.delete("/admin/users/{username}")
+async def deactivate_user(username: str, current_user: UserInDB = Depends(get_current_admin_user)):
+    user = db.users.get(username)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user["is_active"] = False
+    auth_cache.invalidate_user(username)
+    replicate("store/users", user)
+    return {"message": "User deactivated successfully"}
+
 # 관리자용 사용자 목록 조회
 @app.get("/admin/users")
 async def get_users():
     return list(db.users.values())
 
+# 인증 캐시 상태 (토큰/사용자 캐시 적중률)
+@app.get("/api/auth/cache")
+async def get_auth_cache_stats():
+    return auth_cache.get_stats()
+
+# 비밀번호 처리 풀 상태 (실행/대기 중인 작업 수, 거절 건수)
+@app.get("/api/auth/pool")
+async def get_password_pool_stats():
+    return password_pool.get_stats()
+
 # 모니터링 데이터 생성 함수
 def generate_monitoring_data(robot_id: str):
     return {
@@ -253,16 +508,27 @@ def generate_monitoring_data(robot_id: str):
         "last_updated": datetime.now().isoformat()
     }
 
+# LiDAR 스캔 설정 (1도 간격 360개 빔)
+LIDAR_ANGLE_MIN = 0.0
+LIDAR_ANGLE_INCREMENT = float(2 * np.pi / 360)
+LIDAR_RANGE_MAX = 15.0
+LIDAR_ANGLES = (LIDAR_ANGLE_MIN + np.arange(360) * LIDAR_ANGLE_INCREMENT).astype(np.float32)
+# 시뮬레이션: 20m x 20m 방 중앙에서 측정한 벽까지의 거리
+LIDAR_ROOM_RANGES = (10.0 / np.maximum(np.abs(np.cos(LIDAR_ANGLES)), np.abs(np.sin(LIDAR_ANGLES)))).astype(np.float32)
+
 # 센서 데이터 생성 함수 (시뮬레이션)
 def generate_sensor_data(robot_id: str):
+    ranges = (LIDAR_ROOM_RANGES + np.random.normal(0, 0.01, 360)).astype(np.float32)
     return {
         "robot_id": robot_id,
         "timestamp": datetime.now().isoformat(),
         "lidar_data": {
-            "points": [
-                {"x": random.uniform(-10, 10), "y": random.uniform(-10, 10)}
-                for _ in range(360)
-            ]
+            # 스캔은 거리(m) 배열과 x, y float32 배열로 보관하고 전송 형식에 맞게 변환 (encode_sensor_snapshot)
+            "angle_min": LIDAR_ANGLE_MIN,
+            "angle_increment": LIDAR_ANGLE_INCREMENT,
+            "ranges": ranges,
+            "x": ranges * np.cos(LIDAR_ANGLES),
+            "y": ranges * np.sin(LIDAR_ANGLES)
         },
         "imu_data": {
             "acceleration": {
@@ -283,41 +549,218 @@ def generate_sensor_data(robot_id: str):
         }
     }
 
-# WebSocket 엔드포인트 - 모니터링
-@app.websocket("/ws/monitoring/{robot_id}")
-async def websocket_monitoring(websocket: WebSocket, robot_id: str):
+# 로봇별 압축 스캔 인코더 - 델타 프레임은 직전 스캔 기준이므로 스냅샷마다 한 번만 인코딩
+scan_encoders: Dict[str, ScanEncoder] = {}
+
+def encode_scan(snapshot: dict) -> bytes:
+    # 스캔 외 필드는 메타데이터 JSON으로 함께 전송
+    lidar = snapshot["lidar_data"]
+    if "scan" not in lidar:
+        encoder = scan_encoders.setdefault(snapshot["robot_id"], ScanEncoder())
+        timestamp = datetime.fromisoformat(snapshot["timestamp"]).timestamp()
+        meta = {key: value for key, value in snapshot.items() if key != "lidar_data"}
+        lidar["scan"] = encoder.encode(lidar["ranges"], timestamp, lidar["angle_min"], lidar["angle_increment"], meta)
+    return lidar["scan"]
+
+def encode_sensor_snapshot(snapshot: dict, protocols, initial: bool = False):
+    # binary: 스캔은 포인트 클라우드 포맷의 float32 배열, 나머지 필드는 메타데이터 JSON
+    # scan: 스캔은 mm 단위 키프레임/델타 압축 포맷, 나머지 필드는 메타데이터 JSON
+    # json: 기존 클라이언트용 {"lidar_data": {"points": [{"x", "y"}, ...]}}
+    lidar = snapshot["lidar_data"]
+    fields = {key: value for key, value in snapshot.items() if key != "lidar_data"}
+    payloads = {}
+    if PROTOCOL_SCAN in protocols:
+        payloads[PROTOCOL_SCAN] = encode_scan(snapshot)
+        if initial:
+            # 새 연결은 델타를 복원할 수 없으므로 마지막 스캔을 키프레임으로 전송
+            payloads[PROTOCOL_SCAN] = scan_encoders[snapshot["robot_id"]].keyframe()
+    if PROTOCOL_BINARY in protocols:
+        timestamp = datetime.fromisoformat(snapshot["timestamp"]).timestamp()
+        payloads[PROTOCOL_BINARY] = pack_points(lidar["x"], lidar["y"], timestamp=timestamp, meta=fields)
+    if PROTOCOL_JSON in protocols:
+        fields["lidar_data"] = {"points": points_to_dicts(lidar["x"], lidar["y"])}
+        payloads[PROTOCOL_JSON] = json.dumps(fields)
+    return payloads
+
+# 포인트 클라우드 (시뮬레이션) - /ws/lidar 연결과 lidar/points 토픽이 하나의 프로듀서를 공유
+POINT_CLOUD_SOURCE = "default"
+
+def generate_point_cloud(num_points: int = 100) -> Dict[str, Any]:
+    # 100개의 3D 포인트 생성 (float32 배열로 보관)
+    return {
+        "timestamp": datetime.now(),
+        "x": np.random.uniform(-5, 5, num_points).astype(np.float32),
+        "y": np.random.uniform(-5, 5, num_points).astype(np.float32),
+        "z": np.random.uniform(0, 3, num_points).astype(np.float32),
+        # intensity 값 생성 (0-1 사이)
+        "intensity": np.random.uniform(0, 1, num_points).astype(np.float32)
+    }
+
+def point_cloud_to_json(cloud: Dict[str, Any]) -> Dict[str, Any]:
+    # 기존 JSON 클라이언트용 포인트 dict 목록
+    return {
+        "timestamp": cloud["timestamp"].isoformat(),
+        "points": points_to_dicts(cloud["x"], cloud["y"], cloud["z"], cloud["intensity"])
+    }
+
+def pack_point_cloud(cloud: Dict[str, Any]) -> bytes:
+    return pack_points(cloud["x"], cloud["y"], cloud["z"], cloud["intensity"],
+                       timestamp=cloud["timestamp"].timestamp())
+
+def point_cloud_lod(cloud: Dict[str, Any], lod) -> Dict[str, Any]:
+    # LOD별 다운샘플링 결과는 스냅샷에 캐시해서 프레임마다 LOD당 한 번만 계산
+    if lod is None:
+        return cloud
+    cache = cloud.setdefault("lods", {})
+    if lod not in cache:
+        x, y, z, intensity = apply_lod(lod, cloud["x"], cloud["y"], cloud["z"], cloud["intensity"])
+        cache[lod] = {"timestamp": cloud["timestamp"], "x": x, "y": y, "z": z, "intensity": intensity}
+    return cache[lod]
+
+def encode_point_cloud(cloud: Dict[str, Any], protocols, initial: bool = False):
+    # 연결된 클라이언트의 (전송 방식, LOD) 조합마다 한 번씩 인코딩
+    payloads = {}
+    for key in protocols:
+        protocol, lod = split_payload_key(key)
+        variant = point_cloud_lod(cloud, lod)
+        if protocol == PROTOCOL_BINARY:
+            payloads[key] = pack_point_cloud(variant)
+        else:
+            payloads[key] = json.dumps(point_cloud_to_json(variant))
+    return payloads
+
+# 주기 작업 공유 틱 스케줄러 - 모든 스트림이 절대 마감 시각에 맞춰 실행되고 같은 틱끼리 함께 처리됨 (scheduler.py)
+scheduler = TickScheduler()
+
+# 텔레메트리 허브 - 스트림마다 하나의 주기 작업이 구독 중인 로봇의 스냅샷을 만들어 모든 구독자에게 발행
+# 실제 로봇 데이터를 받을 때는 SimulatedTelemetrySource 대신 다른 TelemetrySource를 사용
+telemetry = TelemetryHub(manager, SimulatedTelemetrySource({
+    "monitoring": generate_monitoring_data,
+    "sensor": generate_sensor_data,
+    "lidar": lambda source_id: generate_point_cloud(),
+}), encoders={"sensor": encode_sensor_snapshot, "lidar": encode_point_cloud}, scheduler=scheduler)
+
+# 워커 간 버스 - WORKERS > 1로 실행하면 BUS_URL이 설정되고, 없으면 단일 프로세스용 LocalBus (bus.py)
+# 워커 모드에서는 버스가 owner로 지정한 워커만 텔레메트리를 생성 (아래 "워커 모드" 참고)
+BUS_URL = os.getenv("BUS_URL")
+bus = BusClient(BUS_URL, f"worker-{os.getpid()}") if BUS_URL else LocalBus()
+if BUS_URL:
+    telemetry.producing = False
+
+# 최근 기록 (사고 분석용) - 로봇/스트림별 고정 크기 링 버퍼 파일에 전송 페이로드를 그대로 기록
+# 가득 차면 오래된 기록부터 덮어쓰므로 디스크 사용량은 스트림 수 x 용량으로 고정 (recorder.py)
+RECORDER_DIR = os.getenv("RECORDER_DIR", "./ring")
+RING_RECORDING = os.getenv("RING_RECORDING", "1") == "1"
+# 스트림별 기록 형식 - 크기가 큰 스캔/포인트 클라우드는 바이너리로 기록 (재생 시 그대로 전송)
+RECORD_PROTOCOLS = {"monitoring": PROTOCOL_JSON, "sensor": PROTOCOL_BINARY, "lidar": PROTOCOL_BINARY}
+recorder = StreamRecorder(RECORDER_DIR)
+recorder.follower = bool(BUS_URL)  # 역할을 받기 전까지는 읽기만 (on_bus_role에서 갱신)
+
+def record_telemetry(stream: str, robot_id: str, snapshot: dict):
+    # 워커 모드에서는 owner만 기록 (팔로워도 같은 스냅샷을 ingest함)
+    if not bus.is_owner:
+        return
+    # 구독자에게 보낸 페이로드를 그대로 기록 (해당 형식의 구독자가 없을 때만 새로 인코딩)
+    protocol = RECORD_PROTOCOLS.get(stream, PROTOCOL_JSON)
+    recorder.record(robot_id, stream, time.time(), telemetry.encoded_payload(stream, robot_id, protocol))
+
+if RING_RECORDING:
+    telemetry.add_listener(record_telemetry)
+
+# 플릿 상태 - 모니터링 스트림에서 로봇별 최신 상태와 전체 집계를 이벤트마다 갱신 (fleet.py)
+# 클라이언트 연결과 관계없이 등록된 모든 로봇의 모니터링 스트림을 구독해 상태를 최신으로 유지
+FLEET_STATS_INTERVAL = float(os.getenv("FLEET_STATS_INTERVAL", "1.0"))
+fleet = FleetState(snapshot_interval=FLEET_STATS_INTERVAL)
+
+def update_fleet(stream: str, robot_id: str, snapshot: dict):
+    if stream == "monitoring":
+        fleet.update(robot_id, snapshot)
+
+telemetry.add_listener(update_fleet)
+
+# 로봇 위치 공간 인덱스 - 모니터링 location/센서 position이 들어올 때마다 격자 셀과 구역 소속을 갱신 (spatial.py)
+# 구역 경계를 넘으면 timeline/events 토픽으로 진입/이탈 이벤트 발행
+SPATIAL_CELL_SIZE = float(os.getenv("SPATIAL_CELL_SIZE", "5.0"))
+spatial = SpatialIndex(SPATIAL_CELL_SIZE)
+POSE_FIELDS = {"monitoring": "location", "sensor": "position"}
+
+def geofence_timeline_event(event: dict) -> dict:
+    robot = db.robots.get(event["robot_id"], {})
+    action = "진입" if event["event"] == "enter" else "이탈"
+    return {
+        "type": "warning" if event["alert"] else "info",
+        "timestamp": int(time.time() * 1000),
+        "robot_id": event["robot_id"],
+        "robotName": robot.get("name", event["robot_id"]),
+        "message": f"{event['zone']} 구역 {action}",
+        "location": event["zone"],
+        "image": None,
+        "geofence": event,
+    }
+
+def update_spatial(stream: str, robot_id: str, snapshot: dict):
+    pose = snapshot.get(POSE_FIELDS.get(stream, ""))
+    if not pose:
+        return
+    for event in spatial.update(robot_id, pose["x"], pose["y"]):
+        broker.publish("timeline/events", geofence_timeline_event(event))
+
+telemetry.add_listener(update_spatial)
+
+async def stream_telemetry(websocket: WebSocket, stream: str, robot_id: str, protocol: str = PROTOCOL_JSON,
+                           variant: Any = None, on_message: Optional[Callable[[str], None]] = None):
+    # 연결은 구독만 하고, 전송은 공유 프로듀서가 담당
+    subscribed = False
     try:
-        await manager.connect(websocket, "monitoring", robot_id)
-        print(f"모니터링 WebSocket 연결됨 - Robot {robot_id}")
+        await manager.connect(websocket, stream, robot_id, protocol, variant)
+        print(f"{stream} WebSocket 연결됨 - Robot {robot_id}")
+        latest = telemetry.get_latest(stream, robot_id)
+        if latest is not None:
+            # 새 연결에는 캐시된 최신 상태를 바로 전송
+            key = manager.get_payload_key(websocket)
+            manager.send_to(websocket, telemetry.encode(stream, latest, {key}, initial=True)[key])
+        telemetry.subscribe(stream, robot_id)
+        subscribed = True
         while True:
-            data = generate_monitoring_data(robot_id)
-            await websocket.send_json(data)
-            print(f"모니터링 데이터 전송 - Robot {robot_id}: {data['status']}")
-            await asyncio.sleep(1)
+            message = await websocket.receive_text()
+            if on_message:
+                on_message(message)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, "monitoring", robot_id)
-        print(f"모니터링 WebSocket 연결 종료 - Robot {robot_id}")
+        print(f"{stream} WebSocket 연결 종료 - Robot {robot_id}")
     except Exception as e:
-        print(f"모니터링 WebSocket 에러 - Robot {robot_id}: {str(e)}")
-        manager.disconnect(websocket, "monitoring", robot_id)
+        print(f"{stream} WebSocket 에러 - Robot {robot_id}: {str(e)}")
+    finally:
+        manager.disconnect(websocket, stream, robot_id)
+        if subscribed:
+            telemetry.unsubscribe(stream, robot_id)
+
+# WebSocket 엔드포인트 - 모니터링
+@app.websocket("/ws/monitoring/{robot_id}")
+async def websocket_monitoring(websocket: WebSocket, robot_id: str):
+    await stream_telemetry(websocket, "monitoring", robot_id)
+
+# 센서 스트림이 지원하는 전송 방식 (scan: 대역폭이 좁은 링크용 압축 스캔)
+SENSOR_PROTOCOLS = PROTOCOLS + (PROTOCOL_SCAN,)
 
 # WebSocket 엔드포인트 - 센서 데이터
+# ?format=binary 로 연결하면 LiDAR 스캔을 포인트 클라우드 바이너리 포맷으로 받음
+# ?format=scan 으로 연결하면 키프레임/델타 압축 스캔 포맷으로 받음 (scan_codec.py)
 @app.websocket("/ws/sensor/{robot_id}")
-async def websocket_sensor(websocket: WebSocket, robot_id: str):
-    try:
-        await manager.connect(websocket, "sensor", robot_id)
-        print(f"센서 WebSocket 연결됨 - Robot {robot_id}")
-        while True:
-            data = generate_sensor_data(robot_id)
-            await websocket.send_json(data)
-            print(f"센서 데이터 전송 - Robot {robot_id}")
-            await asyncio.sleep(0.1)
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, "sensor", robot_id)
-        print(f"센서 WebSocket 연결 종료 - Robot {robot_id}")
-    except Exception as e:
-        print(f"센서 WebSocket 에러 - Robot {robot_id}: {str(e)}")
-        manager.disconnect(websocket, "sensor", robot_id)
+async def websocket_sensor(websocket: WebSocket, robot_id: str, format: str = PROTOCOL_JSON):
+    protocol = format if format in SENSOR_PROTOCOLS else PROTOCOL_JSON
+    await stream_telemetry(websocket, "sensor", robot_id, protocol)
+
+# 카메라 녹화 - 인코딩된 JPEG를 그대로 세그먼트 파일에 저장하고 프레임 위치만 DB(SQLite)에 인덱스로 기록
+FRAME_STORE_DIR = os.getenv("FRAME_STORE_DIR", "./recordings")
+CAMERA_RECORDING = os.getenv("CAMERA_RECORDING", "1") == "1"
+FRAME_INDEX_FLUSH_INTERVAL = 2.0
+# 보관 기간(시간)/전체 용량(MB) - 넘으면 오래된 세그먼트부터 삭제 (0이면 제한 없음)
+CAMERA_RETENTION_HOURS = float(os.getenv("CAMERA_RETENTION_HOURS", "24"))
+CAMERA_RETENTION_MB = float(os.getenv("CAMERA_RETENTION_MB", "10240"))
+FRAME_RETENTION_INTERVAL = 60.0
+frame_store = FrameStore(FRAME_STORE_DIR, AsyncSessionLocal,
+                         max_age=CAMERA_RETENTION_HOURS * 3600 or None,
+                         max_bytes=int(CAMERA_RETENTION_MB * 1024 * 1024) or None)
 
 # 카메라 캡처 클래스 수정
 class CameraManager:
@@ -329,6 +772,10 @@ class CameraManager:
             cls._instance = super(CameraManager, cls).__new__(cls)
             cls._instance.cameras = {}
             cls._instance.active_streams = {}
+            cls._instance.subscribers = {}  # robot_id별 구독자 수
+            cls._instance.producers = {}    # robot_id별 프레임 전송 태스크
+            cls._instance.workers = {}      # robot_id별 캡처/인코딩 스레드
+            cls._instance.controllers = {}  # 구독 연결별 적응형 화질 컨트롤러
             print("카메라 매니저 초기화됨")
         return cls._instance
 
@@ -336,47 +783,63 @@ class CameraManager:
         async with self._lock:
             if robot_id not in self.cameras:
                 try:
-                    # 카메라 초기화 시도
-                    for camera_index in range(2):  # 카메라 인덱스 0과 1 시도
-                        try:
-                            cap = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)  # DirectShow 백엔드 사용
-                            if cap.isOpened():
-                                # 카메라 설정
-                                cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                                cap.set(cv2.CAP_PROP_FPS, 30)
-                                
-                                # 테스트 프레임 읽기
-                                ret, frame = cap.read()
-                                if ret:
-                                    self.cameras[robot_id] = cap
-                                    self.active_streams[robot_id] = True
-                                    print(f"카메라 열림 - Robot {robot_id} (인덱스: {camera_index})")
-                                    print(f"카메라 설정: {cap.get(cv2.CAP_PROP_FRAME_WIDTH)}x{cap.get(cv2.CAP_PROP_FRAME_HEIGHT)} @ {cap.get(cv2.CAP_PROP_FPS)}fps")
-                                    return self.cameras[robot_id]
-                                else:
-                                    cap.release()
-                                    print(f"카메라 {camera_index}에서 프레임을 읽을 수 없음")
-                            else:
-                                print(f"카메라 {camera_index}를 열 수 없음")
-                        except Exception as e:
-                            print(f"카메라 {camera_index} 초기화 중 에러: {str(e)}")
-                            if cap:
-                                cap.release()
-                    
-                    # 모든 카메라 시도 실패
-                    raise Exception("사용 가능한 카메라를 찾을 수 없습니다")
-                    
+                    # 카메라 열기는 수 초까지 블로킹될 수 있으므로 이벤트 루프 밖에서 실행
+                    self.cameras[robot_id] = await asyncio.to_thread(self._open_camera, robot_id)
+                    self.active_streams[robot_id] = True
                 except Exception as e:
                     print(f"카메라 초기화 에러 - Robot {robot_id}: {str(e)}")
                     raise
             return self.cameras[robot_id]
 
+    def _open_camera(self, robot_id: str):
+        # 카메라 초기화 시도
+        for camera_index in range(2):  # 카메라 인덱스 0과 1 시도
+            cap = None
+            try:
+                cap = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)  # DirectShow 백엔드 사용
+                if cap.isOpened():
+                    # 카메라 설정
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                    cap.set(cv2.CAP_PROP_FPS, 30)
+
+                    # 테스트 프레임 읽기
+                    ret, frame = cap.read()
+                    if ret:
+                        print(f"카메라 열림 - Robot {robot_id} (인덱스: {camera_index})")
+                        print(f"카메라 설정: {cap.get(cv2.CAP_PROP_FRAME_WIDTH)}x{cap.get(cv2.CAP_PROP_FRAME_HEIGHT)} @ {cap.get(cv2.CAP_PROP_FPS)}fps")
+                        return cap
+                    else:
+                        cap.release()
+                        print(f"카메라 {camera_index}에서 프레임을 읽을 수 없음")
+                else:
+                    print(f"카메라 {camera_index}를 열 수 없음")
+            except Exception as e:
+                print(f"카메라 {camera_index} 초기화 중 에러: {str(e)}")
+                if cap:
+                    cap.release()
+
+        # 모든 카메라 시도 실패
+        raise Exception("사용 가능한 카메라를 찾을 수 없습니다")
+
+    def start_worker(self, robot_id: str, cap):
+        # 캡처/인코딩은 카메라 전용 스레드에서 수행
+        worker = CameraWorker(robot_id, cap)
+        self.workers[robot_id] = worker
+        worker.start()
+        return worker
+
     def release_camera(self, robot_id: str):
+        frame_store.close_segment(robot_id)
         if robot_id in self.cameras:
             try:
                 self.active_streams[robot_id] = False
-                self.cameras[robot_id].release()
+                worker = self.workers.pop(robot_id, None)
+                if worker:
+                    # 워커 스레드가 진행 중인 읽기를 마친 뒤 카메라를 해제
+                    worker.stop()
+                else:
+                    self.cameras[robot_id].release()
                 print(f"카메라 해제됨 - Robot {robot_id}")
             except Exception as e:
                 print(f"카메라 해제 중 에러 - Robot {robot_id}: {str(e)}")
@@ -386,104 +849,767 @@ class CameraManager:
                 if robot_id in self.active_streams:
                     del self.active_streams[robot_id]
 
+    def get_subscriber_stats(self):
+        # 카메라 구독 연결별 화질 단계와 전송 지연
+        return [
+            {"connection": manager.outbound[websocket].label, **controller.get_stats()}
+            for websocket, controller in list(self.controllers.items()) if websocket in manager.outbound
+        ]
+
     def is_active(self, robot_id: str):
         return self.active_streams.get(robot_id, False)
 
+    def subscribe(self, robot_id: str, websocket: WebSocket = None, controller: AdaptiveController = None):
+        # 첫 구독자가 들어올 때만 프로듀서 태스크를 시작 (워커 모드에서는 카메라를 여는 owner만)
+        # websocket 없는 구독은 다른 워커의 구독자 대신 owner가 잡아 두는 구독
+        if controller is not None:
+            self.controllers[websocket] = controller
+        self.subscribers[robot_id] = self.subscribers.get(robot_id, 0) + 1
+        if robot_id not in self.producers and bus.is_owner:
+            self.producers[robot_id] = asyncio.create_task(self._produce_frames(robot_id))
+        print(f"카메라 구독 - Robot {robot_id} (구독자 {self.subscribers[robot_id]}명)")
+
+    def start_producers(self):
+        # owner를 이어받았을 때 이미 구독자가 있는 카메라의 프로듀서를 시작
+        for robot_id in list(self.subscribers):
+            if robot_id not in self.producers:
+                self.producers[robot_id] = asyncio.create_task(self._produce_frames(robot_id))
+
+    def local_levels(self) -> Dict[str, Set[int]]:
+        # 이 워커의 카메라 구독자들이 쓰는 화질 단계 (0단계는 항상 포함)
+        levels = {robot_id: {0} for robot_id in self.subscribers}
+        for websocket, controller in list(self.controllers.items()):
+            key = manager.connection_keys.get(websocket)
+            if key and key[1] in levels:
+                levels[key[1]].add(controller.level)
+        return levels
+
+    def unsubscribe(self, robot_id: str, websocket: WebSocket = None):
+        self.controllers.pop(websocket, None)
+        if robot_id not in self.subscribers:
+            return
+        self.subscribers[robot_id] -= 1
+        print(f"카메라 구독 해제 - Robot {robot_id} (구독자 {self.subscribers[robot_id]}명)")
+        if self.subscribers[robot_id] > 0:
+            return
+        # 마지막 구독자가 나가면 프로듀서를 멈추고 카메라를 해제
+        del self.subscribers[robot_id]
+        producer = self.producers.pop(robot_id, None)
+        if producer:
+            producer.cancel()
+        self.release_camera(robot_id)
+
+    async def _produce_frames(self, robot_id: str):
+        """로봇당 하나의 태스크가 프레임을 한 번만 캡처/인코딩해서 모든 구독자에게 전송"""
+        frame_number = 0
+
+        try:
+            cap = await self.get_camera(robot_id)
+            worker = self.start_worker(robot_id, cap)
+
+            while self.is_active(robot_id):
+                # 워커 스레드가 인코딩을 마친 최신 프레임만 받아서 전송
+                timestamp, buffer, frame = await worker.next_frame()
+
+                variants = FrameVariants(frame, buffer)
+                due = self._due_connections(robot_id, timestamp)
+                # 다른 워커의 구독자가 있으면 그 워커들이 요청한 단계도 함께 인코딩해서 버스로 발행
+                remote = remote_camera_levels(robot_id)
+                levels = {split_payload_key(manager.get_payload_key(connection))[1] or 0 for connection in due}
+                missing = variants.missing(levels | remote)
+                if missing:
+                    await asyncio.to_thread(variants.prepare, missing)
+                payloads = self._send_frame(robot_id, frame_number, timestamp, variants, due)
+                if remote:
+                    bus.publish(f"camera/{robot_id}", dumps({
+                        "frame_number": frame_number,
+                        "timestamp": timestamp.timestamp(),
+                        "jpegs": {level: variants.jpeg(level) for level in remote | {0}},
+                    }))
+
+                if CAMERA_RECORDING:
+                    frame_store.append(robot_id, frame_number, timestamp.timestamp(), buffer)
+                if RING_RECORDING:
+                    recorder.record(robot_id, "camera", timestamp.timestamp(), payloads.get(PROTOCOL_BINARY)
+                                    or pack_frame(robot_id, frame_number, timestamp.timestamp(), buffer))
+                log_camera_frame(robot_id, frame_number, None, "streaming")
+                frame_number += 1
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"카메라 프로듀서 에러 - Robot {robot_id}: {str(e)}")
+            log_websocket_event("camera", robot_id, "error", {"error": str(e)})
+            manager.broadcast_to_robot({"error": str(e)}, "camera", robot_id)
+        finally:
+            # 스스로 종료된 경우 다음 구독자가 새 프로듀서를 시작할 수 있도록 정리
+            if self.producers.get(robot_id) is asyncio.current_task():
+                del self.producers[robot_id]
+                self.release_camera(robot_id)
+
+    def _due_connections(self, robot_id: str, timestamp: datetime):
+        # 구독자별로 전송 큐 상태에 맞춰 화질 단계를 조정하고, 단계의 fps에 맞는 구독자만 반환
+        now = time.monotonic()
+        frame_age_ms = (datetime.now() - timestamp).total_seconds() * 1000
+        due = []
+        for connection in list(manager.active_connections["camera"].get(robot_id, [])):
+            controller = self.controllers.get(connection)
+            if controller is None:
+                due.append(connection)
+                continue
+            if controller.update(manager.outbound.get(connection), now, frame_age_ms):
+                # 0단계는 변형 없이 기본 페이로드를 공유
+                manager.set_variant(connection, controller.level or None)
+            if controller.should_send(now):
+                due.append(connection)
+        return due
+
+    def _send_frame(self, robot_id: str, frame_number: int, timestamp: datetime, variants, due):
+        # (전송 방식, 단계)마다 한 번씩만 페이로드를 만듦 - 0단계 외의 JPEG는 호출 전에 스레드에서 준비
+        keys = {manager.get_payload_key(connection) for connection in due}
+        payloads = {
+            key: camera_payload(robot_id, frame_number, timestamp, variants.jpeg(split_payload_key(key)[1] or 0),
+                                split_payload_key(key)[0])
+            for key in keys
+        }
+        for connection in due:
+            manager.send_to(connection, payloads[manager.get_payload_key(connection)])
+        return payloads
+
+    def relay_frame(self, robot_id: str, frame: dict):
+        # 워커 모드의 팔로워 - owner가 버스로 보낸 프레임을 이 워커의 구독자에게 전송
+        timestamp = datetime.fromtimestamp(frame["timestamp"])
+        due = self._due_connections(robot_id, timestamp)
+        self._send_frame(robot_id, frame["frame_number"], timestamp, EncodedVariants(frame["jpegs"]), due)
+
 camera_manager = CameraManager()
 
+def camera_payload(robot_id: str, frame_number: int, timestamp: datetime, buffer, protocol: str):
+    if protocol == PROTOCOL_BINARY:
+        return pack_frame(robot_id, frame_number, timestamp.timestamp(), buffer)
+    return json.dumps({
+        "robot_id": robot_id,
+        "frame_number": frame_number,
+        "timestamp": timestamp.isoformat(),
+        "image": base64.b64encode(buffer).decode('utf-8'),
+        "status": "streaming"
+    })
+
+def update_camera_quality(controller: AdaptiveController, message: str):
+    # {"type": "quality", "data": {"level": 2, "adaptive": false}} 로 연결 중 화질 단계/자동 조정 변경
+    try:
+        message = json.loads(message)
+    except ValueError:
+        return
+    if isinstance(message, dict) and message.get("type") == "quality":
+        data = message.get("data") or {}
+        controller.configure(data.get("level"), data.get("adaptive"))
+
 # WebSocket 엔드포인트 수정 - 카메라 스트림
 @app.websocket("/ws/camera/{robot_id}")
-async def websocket_camera(websocket: WebSocket, robot_id: str):
+async def websocket_camera(websocket: WebSocket, robot_id: str, format: str = PROTOCOL_JSON,
+                           adaptive: bool = True, level: int = 0):
+    subscribed = False
+    # ?format=binary 로 연결하면 헤더 + JPEG 바이너리 프레임을 받음 (기본은 기존 JSON 방식)
+    protocol = format if format in PROTOCOLS else PROTOCOL_JSON
+    # 화질 단계는 ?level= 에서 시작해서 링크 상태에 따라 자동 조정 (?adaptive=false면 고정)
+    controller = AdaptiveController(parse_level(level), adaptive)
     try:
-        await manager.connect(websocket, "camera", robot_id)
-        await log_websocket_event("camera", robot_id, "connected", {})
+        await manager.connect(websocket, "camera", robot_id, protocol, controller.level or None)
+        log_websocket_event("camera", robot_id, "connected", {})
         print(f"카메라 WebSocket 연결됨 - Robot {robot_id}")
-        
-        cap = await camera_manager.get_camera(robot_id)
-        frame_number = 0
-        error_count = 0
-        max_errors = 3
-        
-        while camera_manager.is_active(robot_id):
-            try:
-                ret, frame = cap.read()
-                if not ret:
-                    error_count += 1
-                    print(f"프레임 읽기 실패 ({error_count}/{max_errors}) - Robot {robot_id}")
-                    await log_websocket_event("camera", robot_id, "frame_error", 
-                        {"error_count": error_count, "max_errors": max_errors})
-                    if error_count >= max_errors:
-                        await websocket.send_json({"error": "카메라에서 프레임을 읽을 수 없습니다"})
-                        break
-                    await asyncio.sleep(1)
-                    continue
 
-                error_count = 0
-                frame = cv2.resize(frame, (640, 480))
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                base64_image = base64.b64encode(buffer).decode('utf-8')
-                
-                camera_data = {
-                    "robot_id": robot_id,
-                    "frame_number": frame_number,
-                    "timestamp": datetime.now().isoformat(),
-                    "image": base64_image,
-                    "status": "streaming"
-                }
-                
-                await websocket.send_json(camera_data)
-                await log_camera_frame(robot_id, frame_number, None, "streaming")
-                frame_number += 1
-                
-                await asyncio.sleep(0.033)
-                
-            except Exception as e:
-                print(f"프레임 처리 중 에러 - Robot {robot_id}: {str(e)}")
-                await log_websocket_event("camera", robot_id, "frame_processing_error", 
-                    {"error": str(e)})
-                error_count += 1
-                if error_count >= max_errors:
-                    await websocket.send_json({"error": str(e)})
-                    break
-                await asyncio.sleep(1)
-            
+        # 프레임 전송은 CameraManager의 프로듀서가 담당하고, 여기서는 연결 종료만 감지
+        camera_manager.subscribe(robot_id, websocket, controller)
+        subscribed = True
+        while True:
+            update_camera_quality(controller, await websocket.receive_text())
+            manager.set_variant(websocket, controller.level or None)
+
     except WebSocketDisconnect:
         print(f"카메라 WebSocket 연결 종료 - Robot {robot_id}")
-        await log_websocket_event("camera", robot_id, "disconnected", {})
-        camera_manager.release_camera(robot_id)
-        manager.disconnect(websocket, "camera", robot_id)
+        log_websocket_event("camera", robot_id, "disconnected", {})
     except Exception as e:
         print(f"카메라 WebSocket 에러 - Robot {robot_id}: {str(e)}")
-        await log_websocket_event("camera", robot_id, "error", {"error": str(e)})
-        camera_manager.release_camera(robot_id)
-        manager.disconnect(websocket, "camera", robot_id)
+        log_websocket_event("camera", robot_id, "error", {"error": str(e)})
         try:
             await websocket.send_json({"error": str(e)})
         except:
             pass
+    finally:
+        manager.disconnect(websocket, "camera", robot_id)
+        if subscribed:
+            camera_manager.unsubscribe(robot_id, websocket)
 
 # 카메라 상태 확인 API
+def check_camera():
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        return {"status": "error", "message": "카메라를 열 수 없습니다"}
+
+    ret, _ = cap.read()
+    cap.release()
+
+    if not ret:
+        return {"status": "error", "message": "카메라에서 프레임을 읽을 수 없습니다"}
+
+    return {"status": "ok", "message": "카메라가 정상적으로 작동 중입니다"}
+
 @app.get("/api/camera/status")
 async def get_camera_status():
     try:
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            return {"status": "error", "message": "카메라를 열 수 없습니다"}
-        
-        ret, _ = cap.read()
-        cap.release()
-        
-        if not ret:
-            return {"status": "error", "message": "카메라에서 프레임을 읽을 수 없습니다"}
-            
-        return {"status": "ok", "message": "카메라가 정상적으로 작동 중입니다"}
+        # 카메라 열기/읽기는 블로킹이므로 스레드에서 실행
+        return await asyncio.to_thread(check_camera)
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-# REST API 엔드포인트 - 로봇 목록
+# 녹화 영상 조회 API
+def parse_time(value: Optional[str], end_of_day: bool = False) -> Optional[float]:
+    # 유닉스 초 또는 ISO 형식 ("2024-01-19", "2024-01-19T10:30:00")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"잘못된 시각 형식: {value}")
+    # 날짜만 주면 종료 시각은 그날의 끝까지 포함
+    return parsed.timestamp() + (86400 if end_of_day and len(value) == 10 else 0)
+
+def video_info(segment: dict) -> dict:
+    base = f"/api/videos/{segment['id']}"
+    return {
+        **segment,
+        "duration": round(segment["end_time"] - segment["start_time"], 3),
+        "date": datetime.fromtimestamp(segment["start_time"]).isoformat(),
+        "thumbnail_url": f"{base}/thumbnail",
+        "stream_url": f"{base}/stream",
+        "export_url": f"{base}/export",
+    }
+
+def check_name(name: str, label: str):
+    # 녹화 경로에 쓰이는 이름은 recorder와 같은 규칙으로 검사
+    if not valid_name(name):
+        raise HTTPException(status_code=400, detail=f"잘못된 {label}입니다")
+
+async def find_segment(segment_id: str) -> dict:
+    check_name(segment_id, "영상 ID")
+    segment = await frame_store.get_segment(segment_id)
+    if segment is None:
+        raise HTTPException(status_code=404, detail="영상을 찾을 수 없습니다")
+    return segment
+
+def read_frame(segment: dict, offset: int, length: int) -> bytes:
+    with frame_store.open_reader(segment) as reader:
+        return reader.read(offset, length)
+
+@app.get("/api/videos")
+async def list_videos(robot_id: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None):
+    if robot_id:
+        check_name(robot_id, "robot_id")
+    segments = await frame_store.list_segments(robot_id, parse_time(start), parse_time(end, end_of_day=True))
+    return [video_info(segment) for segment in segments]
+
+@app.get("/api/videos/{segment_id}")
+async def get_video(segment_id: str):
+    return video_info(await find_segment(segment_id))
+
+@app.get("/api/videos/{segment_id}/frames/{frame_number}")
+async def get_video_frame(segment_id: str, frame_number: int):
+    segment = await find_segment(segment_id)
+    frames = await frame_store.frame_index(segment_id, frame_number, frame_number)
+    if not frames:
+        raise HTTPException(status_code=404, detail="프레임을 찾을 수 없습니다")
+    _, _, offset, length = frames[0]
+    return Response(await asyncio.to_thread(read_frame, segment, offset, length), media_type="image/jpeg")
+
+@app.get("/api/videos/{segment_id}/thumbnail")
+async def get_video_thumbnail(segment_id: str):
+    segment = await find_segment(segment_id)
+    frames = await frame_store.frame_index(segment_id)
+    if not frames:
+        raise HTTPException(status_code=404, detail="프레임이 없습니다")
+    _, _, offset, length = frames[0]
+    return Response(await asyncio.to_thread(read_frame, segment, offset, length), media_type="image/jpeg",
+                    headers={"Cache-Control": "max-age=3600"})
+
+# 재생 - multipart/x-mixed-replace (MJPEG), <img src>로 바로 재생
+# 녹화 시각 간격을 speed로 나눈 만큼 쉬면서 전송 (speed=0이면 쉬지 않고 전송)
+@app.get("/api/videos/{segment_id}/stream")
+async def stream_video(segment_id: str, speed: float = 1.0, start_frame: Optional[int] = None):
+    segment = await find_segment(segment_id)
+    frames = await frame_store.frame_index(segment_id, start_frame)
+
+    async def generate():
+        reader = frame_store.open_reader(segment)
+        try:
+            previous = None
+            for _, timestamp, offset, length in frames:
+                if offset + length > reader.size:
+                    break
+                if previous is not None and speed > 0:
+                    await asyncio.sleep(min(1.0, (timestamp - previous) / speed))
+                previous = timestamp
+                yield (b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % length
+                       + reader.read(offset, length) + b"\r\n")
+        finally:
+            reader.close()
+
+    return StreamingResponse(generate(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+# 내보내기 - 세그먼트 파일(MJPEG)의 바이트 범위를 그대로 전송
+# start_frame/end_frame으로 프레임 구간을 고르거나, HTTP Range 헤더(bytes=a-b)로 바이트 범위 요청 가능
+@app.get("/api/videos/{segment_id}/export")
+async def export_video(segment_id: str, request: Request, start_frame: Optional[int] = None,
+                       end_frame: Optional[int] = None):
+    segment = await find_segment(segment_id)
+    frames = await frame_store.frame_index(segment_id, start_frame, end_frame)
+    if not frames:
+        raise HTTPException(status_code=404, detail="프레임이 없습니다")
+    start = frames[0][2]
+    end = frames[-1][2] + frames[-1][3]
+
+    status_code = 200
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{segment_id}.mjpg"',
+    }
+    byte_range = request.headers.get("range")
+    if byte_range and byte_range.startswith("bytes="):
+        first, _, last = byte_range[len("bytes="):].split(",")[0].partition("-")
+        try:
+            range_start = start + int(first) if first else max(start, end - int(last))
+            range_end = start + int(last) + 1 if first and last else end
+        except ValueError:
+            raise HTTPException(status_code=416, detail="잘못된 Range 헤더")
+        if range_start >= end or range_end <= range_start:
+            raise HTTPException(status_code=416, detail="범위를 벗어났습니다",
+                                headers={"Content-Range": f"bytes */{end - start}"})
+        range_end = min(range_end, end)
+        headers["Content-Range"] = f"bytes {range_start - start}-{range_end - start - 1}/{end - start}"
+        start, end, status_code = range_start, range_end, 206
+    headers["Content-Length"] = str(end - start)
+
+    def generate():
+        # 동기 제너레이터 - 스레드 풀에서 실행되므로 페이지 폴트가 이벤트 루프를 막지 않음
+        with frame_store.open_reader(segment) as reader:
+            yield from reader.iter_range(start, end)
+
+    return StreamingResponse(generate(), status_code=status_code, media_type="video/x-motion-jpeg",
+                             headers=headers)
+
+@app.get("/api/recording/stats")
+async def get_recording_stats():
+    return frame_store.get_stats()
+
+# 지도 타일 - MAP_DIR의 지도(YAML + PNG/PGM)를 시작 시 한 번 타일 피라미드로 만들어 MAP_CACHE_DIR에 캐시
+MAP_DIR = os.getenv("MAP_DIR", "./maps")
+MAP_CACHE_DIR = os.getenv("MAP_CACHE_DIR", "./map_cache")
+# 지도 갱신을 모아서 변경분으로 보내는 주기 (초)
+MAP_FLUSH_INTERVAL = float(os.getenv("MAP_FLUSH_INTERVAL", "0.5"))
+map_tiles = MapTileService(MAP_DIR, MAP_CACHE_DIR)
+map_flush_ticker = None
+
+@app.on_event("startup")
+async def load_maps():
+    global map_flush_ticker
+    await asyncio.to_thread(map_tiles.scan)
+    map_flush_ticker = scheduler.every("map/flush", MAP_FLUSH_INTERVAL, flush_map_updates)
+
+@app.on_event("shutdown")
+async def stop_map_updates():
+    if map_flush_ticker is not None:
+        map_flush_ticker.cancel()
+    await asyncio.to_thread(map_tiles.flush)
+
+def map_diff_message(map_id: str, revision: int, diffs) -> TopicMessage:
+    return TopicMessage(
+        lambda: {"map_id": map_id, "revision": revision, "tiles": [diff.to_json() for diff in diffs]},
+        lambda: pack_map_diff(revision, diffs)
+    )
+
+async def flush_map_updates():
+    # 바뀐 타일이 있을 때만 스레드에서 변경분을 만들고 map/{map_id} 토픽으로 발행
+    if not map_tiles.has_dirty():
+        return
+    results = await asyncio.to_thread(map_tiles.flush)
+    for map_id, (revision, diffs) in results.items():
+        broker.publish(f"map/{map_id}", map_diff_message(map_id, revision, diffs))
+
+def find_map(map_id: str):
+    pyramid = map_tiles.get(map_id)
+    if pyramid is None:
+        raise HTTPException(status_code=404, detail="지도를 찾을 수 없습니다")
+    return pyramid
+
+@app.get("/api/maps")
+async def list_maps():
+    return map_tiles.list()
+
+@app.get("/api/maps/stats")
+async def get_map_stats():
+    return map_tiles.get_stats()
+
+@app.get("/api/maps/{map_id}")
+async def get_map(map_id: str):
+    return find_map(map_id).metadata()
+
+# 지도 갱신 - 본문은 원본 해상도 (x, y)부터 width x height 영역의 uint8 값 (행 우선, 위쪽 행부터)
+# 바뀐 타일은 MAP_FLUSH_INTERVAL마다 모아서 map/{map_id} 토픽으로 변경분 전송
+@app.post("/api/maps/{map_id}/updates")
+async def update_map(map_id: str, x: int, y: int, width: int, height: int, request: Request):
+    find_map(map_id)
+    body = await request.body()
+    if width <= 0 or height <= 0 or len(body) != width * height:
+        raise HTTPException(status_code=400, detail="본문 크기가 width x height와 다릅니다")
+    patch = np.frombuffer(body, dtype=np.uint8).reshape(height, width)
+    try:
+        changed = await asyncio.to_thread(map_tiles.update, map_id, x, y, patch)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    bus.publish(f"map/patch/{map_id}", MAP_PATCH.pack(x, y, width, height) + body)
+    return {"changed": changed, "revision": map_tiles.get(map_id).info["revision"]}
+
+# 타일 하나 - 단일 채널 uint8 TILE_SIZE x TILE_SIZE (행 우선, 위쪽 행부터)
+# 저장된 gzip을 그대로 Content-Encoding: gzip으로 전송, If-None-Match가 같으면 304
+@app.get("/api/maps/{map_id}/tiles/{z}/{x}/{y}")
+async def get_map_tile(map_id: str, z: int, x: int, y: int, request: Request):
+    find_map(map_id)
+    etag = map_tiles.etag(map_id, z, x, y)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="타일을 찾을 수 없습니다")
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    data = await asyncio.to_thread(map_tiles.tile, map_id, z, x, y)
+    if data is None:
+        raise HTTPException(status_code=404, detail="타일을 찾을 수 없습니다")
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        data = gzip.decompress(data)
+    return Response(data, media_type="application/octet-stream", headers=headers)
+
+# 기록 재생 API
+# 재생 중 녹화 시각 간격이 이보다 길면 (프로듀서가 멈춰 있던 구간) 기다리지 않고 바로 다음 레코드 전송
+REPLAY_MAX_GAP = 1.0
+
+def replay_record_json(timestamp: float, kind: int, data: bytes) -> dict:
+    # REST 응답용 - 바이너리 레코드는 헤더를 보고 JSON으로 변환 (카메라는 이미지 없이 메타데이터만)
+    record = {"timestamp": timestamp}
+    if kind == KIND_TEXT:
+        record["data"] = json.loads(data)
+    elif data[:2] == b"RC":
+        header, image = unpack_frame(data)
+        record["data"] = {**header, "size": image.nbytes}
+    elif data[:2] == b"PC":
+        header, meta, arrays = unpack_points(data)
+        record["data"] = {**(meta or {}), "timestamp": header["timestamp"],
+                          "points": points_to_dicts(*arrays.values(), names=tuple(arrays))}
+    else:
+        record["data"] = {"size": len(data)}
+    return record
+
+def find_recording(robot_id: str, stream: str):
+    ring = recorder.ring(robot_id, stream, create=False)
+    if ring is None or not len(ring):
+        raise HTTPException(status_code=404, detail="기록이 없습니다")
+    return ring
+
+@app.get("/api/replay")
+async def list_recordings():
+    return {"recordings": recorder.recordings(), "stats": recorder.get_stats()}
+
+# start부터 최대 limit개 레코드 (start가 없으면 남아 있는 가장 오래된 기록부터)
+@app.get("/api/replay/{robot_id}/{stream}")
+async def get_recording(robot_id: str, stream: str, start: Optional[str] = None, end: Optional[str] = None,
+                        limit: int = 100):
+    ring = find_recording(robot_id, stream)
+    start_time, end_time = parse_time(start), parse_time(end, end_of_day=True)
+    seq = ring.seek(start_time) if start_time is not None else ring.first_seq
+    records = []
+    while seq < ring.next_seq and len(records) < max(1, min(limit, 1000)):
+        try:
+            timestamp, kind, data = ring.read(seq)
+        except IndexError:
+            # 읽는 중에 owner가 덮어쓴 구간은 건너뜀 (워커 모드)
+            seq = max(seq, recorder.sync(ring).first_seq)
+            continue
+        if end_time is not None and timestamp > end_time:
+            break
+        records.append(replay_record_json(timestamp, kind, data))
+        seq += 1
+    first, last = ring.time_range()
+    return {"robot_id": robot_id, "stream": stream, "first": first, "last": last,
+            "next": ring.timestamp_at(seq) if seq < ring.next_seq else None, "records": records}
+
+async def receive_replay_control(websocket: WebSocket, ring, state: dict):
+    # {"type": "seek", "timestamp": t} / {"type": "speed", "speed": 4} / {"type": "pause"} / {"type": "resume"}
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                continue
+            if message.get("type") == "seek":
+                state["seq"] = recorder.sync(ring).seek(float(message.get("timestamp", 0)))
+            elif message.get("type") == "speed":
+                state["speed"] = max(0.0, float(message.get("speed", 1)))
+            elif message.get("type") == "pause":
+                state["paused"] = True
+            elif message.get("type") == "resume":
+                state["paused"] = False
+            state["changed"].set()
+    except (WebSocketDisconnect, RuntimeError):
+        state["closed"] = True
+        state["changed"].set()
+
+async def wait_replay_control(state: dict, timeout: Optional[float] = None) -> bool:
+    """제어 메시지가 오면 True, timeout이 지나면 False"""
+    state["changed"].clear()
+    try:
+        await asyncio.wait_for(state["changed"].wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+# 재생 - 기록된 페이로드를 실시간 스트림과 같은 형식 그대로 전송 (텍스트/바이너리)
+# speed: 1=실제 속도, 4=4배속, 0=최대 속도 (전송이 끝나는 대로 다음 레코드)
+# 끝까지 재생하면 {"type": "replay_end"}를 보내고, 연결을 유지한 채 seek를 기다림
+@app.websocket("/ws/replay/{robot_id}/{stream}")
+async def websocket_replay(websocket: WebSocket, robot_id: str, stream: str, start: Optional[float] = None,
+                           end: Optional[float] = None, speed: float = 1.0):
+    await websocket.accept()
+    ring = recorder.ring(robot_id, stream, create=False)
+    if ring is None or not len(ring):
+        await websocket.send_json({"type": "replay_error", "error": "기록이 없습니다"})
+        await websocket.close()
+        return
+
+    state = {"seq": ring.seek(start) if start is not None else ring.first_seq, "speed": max(0.0, speed),
+             "paused": False, "closed": False, "changed": asyncio.Event()}
+    control = asyncio.create_task(receive_replay_control(websocket, ring, state))
+    loop = asyncio.get_running_loop()
+    anchor = None  # (재생 기준 시각, 해당 레코드 timestamp) - 속도 변경/seek/일시정지 후 다시 설정
+    previous = None
+    try:
+        while not state["closed"]:
+            if state["paused"]:
+                await wait_replay_control(state)
+                anchor = None
+                continue
+            # 재생 중 덮어쓴 구간은 건너뜀 (워커 모드의 팔로워는 owner가 기록한 만큼 인덱스를 맞춤)
+            seq = state["seq"] = max(state["seq"], recorder.sync(ring).first_seq)
+            if seq >= ring.next_seq:
+                await websocket.send_json({"type": "replay_end", "timestamp": previous})
+                await wait_replay_control(state)
+                anchor = None
+                continue
+
+            try:
+                timestamp, kind, data = ring.read(seq)
+            except IndexError:
+                continue
+            if end is not None and timestamp > end:
+                state["seq"] = ring.next_seq
+                continue
+            if state["speed"] > 0:
+                if anchor is None or previous is None or timestamp - previous > REPLAY_MAX_GAP:
+                    anchor = (loop.time(), timestamp)
+                delay = anchor[0] + (timestamp - anchor[1]) / state["speed"] - loop.time()
+                if delay > 0 and await wait_replay_control(state, delay):
+                    anchor = None
+                    continue
+
+            if kind == KIND_TEXT:
+                await websocket.send_text(data.decode("utf-8"))
+            else:
+                await websocket.send_bytes(data)
+            previous = timestamp
+            if state["seq"] == seq:  # 전송 중 seek가 없었으면 다음 레코드
+                state["seq"] = seq + 1
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        control.cancel()
+
+# 스트림별 목표/달성 주기와 마감 시각 대비 지연(지터) 분포
+@app.get("/api/scheduler")
+async def get_scheduler_stats():
+    return {
+        **scheduler.get_stats(),
+        "camera": [worker.pacing.get_stats() for worker in list(camera_manager.workers.values())],
+    }
+
+# WebSocket 연결 및 전송 큐 상태
+@app.get("/api/connections")
+async def get_connections():
+    return {
+        "connections": manager.get_connection_status(),
+        "queues": manager.get_queue_stats(),
+        "camera": camera_manager.get_subscriber_stats()
+    }
+
+# Prometheus 텍스트 형식 메트릭
+# 연결 수/큐 깊이/로그 큐는 수집 시점에 기존 상태에서 읽음
+def _connection_counts():
+    counts = {
+        (client_type,): sum(len(connections) for connections in robots.values())
+        for client_type, robots in manager.active_connections.items()
+    }
+    counts[("topics",)] = sum(1 for queue in list(manager.outbound.values()) if queue.kind == "topics")
+    return counts
+
+def _stream_hz():
+    streams = scheduler.ticker_stats()
+    streams.extend(worker.pacing for worker in list(camera_manager.workers.values()))
+    return {(stats.name,): stats.achieved_hz() for stats in streams}
+
+gauge("ws_connections", "연결 종류별 활성 WebSocket 연결 수", ["type"], collect=_connection_counts)
+gauge("ws_queue_depth", "연결 종류별 전송 큐에 대기 중인 메시지 수", ["type"],
+      collect=lambda: {(kind,): depth for kind, depth in manager.get_queue_depths().items()})
+gauge("camera_subscribers", "로봇별 카메라 구독자 수", ["robot_id"],
+      collect=lambda: {(robot_id,): count for robot_id, count in camera_manager.subscribers.items()})
+gauge("log_writer_queue", "저장 대기 중인 로그 문서 수", collect=lambda: {(): log_writer.pending})
+gauge("stream_achieved_hz", "스트림별 최근 달성 주기 (Hz)", ["stream"], collect=_stream_hz)
+gauge("fleet_robots", "상태별 로봇 수", ["status"],
+      collect=lambda: {(str(status),): count for status, count in fleet.status_counts.items()})
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+# 이벤트 루프 지연과 느린 콜백 (LOOP_SLOW_MS 환경 변수 또는 아래 엔드포인트로 켬)
+loop_monitor = LoopMonitor()
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    await loop_monitor.stop()
+
+@app.get("/api/loop")
+async def get_loop_stats(limit: int = 10, stack: bool = True):
+    return loop_monitor.get_stats(max(1, min(limit, 100)), stack)
+
+@app.post("/api/loop/slow")
+async def configure_slow_callbacks(threshold_ms: float):
+    if threshold_ms < 0:
+        raise HTTPException(status_code=400, detail="threshold_ms는 0 이상이어야 합니다")
+    loop_monitor.configure(threshold_ms)
+    return loop_monitor.get_stats(with_stack=False)["slow_callbacks"]
+
+@app.delete("/api/loop/slow")
+async def reset_slow_callbacks():
+    loop_monitor.reset()
+    return {"message": "느린 콜백 기록을 초기화했습니다"}
+
+fleet_stats_ticker = None
+fleet_stats_version = -1
+
+@app.on_event("startup")
+async def start_fleet():
+    global fleet_stats_ticker
+    for robot_id in db.robots:
+        telemetry.subscribe("monitoring", robot_id)
+    fleet_stats_ticker = scheduler.every("fleet/stats", FLEET_STATS_INTERVAL, publish_fleet_stats)
+
+@app.on_event("shutdown")
+async def stop_fleet():
+    if fleet_stats_ticker is not None:
+        fleet_stats_ticker.cancel()
+    for robot_id in db.robots:
+        telemetry.unsubscribe("monitoring", robot_id)
+
+def publish_fleet_stats():
+    # 이벤트마다가 아니라 FLEET_STATS_INTERVAL마다, 구독자가 있고 집계가 바뀐 경우에만 stats/update 발행
+    global fleet_stats_version
+    if fleet.version == fleet_stats_version or not manager.has_topic_subscribers("stats/update"):
+        return
+    fleet_stats_version = fleet.version
+    broker.publish("stats/update", fleet.stats())
+
+def fleet_response(snapshot, request: Request) -> Response:
+    etag, body = snapshot
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+# REST API 엔드포인트 - 로봇 목록 (플릿 상태의 최신 스냅샷, If-None-Match가 같으면 304)
 @app.get("/api/robots")
-async def get_robots():
-    return [generate_monitoring_data(robot_id) for robot_id in db.robots.keys()]
+async def get_robots(request: Request):
+    return fleet_response(fleet.robots_snapshot(), request)
+
+# 플릿 전체 집계 (stats/update 토픽과 같은 내용)
+@app.get("/api/fleet/stats")
+async def get_fleet_stats(request: Request):
+    return fleet_response(fleet.stats_snapshot(), request)
+
+# 위치 조회 - 공간 인덱스의 최신 위치 기준
+def robot_poses(robot_ids, distances=None):
+    results = []
+    for index, robot_id in enumerate(robot_ids):
+        x, y = spatial.poses[robot_id]
+        result = {"id": robot_id, "x": x, "y": y}
+        if distances is not None:
+            result["distance"] = distances[index]
+        results.append(result)
+    return results
+
+# 지점에서 가까운 로봇 k대 (예: 알람 위치에 가장 가까운 로봇)
+@app.get("/api/robots/nearest")
+async def get_nearest_robots(x: float, y: float, k: int = 1, max_distance: Optional[float] = None):
+    found = spatial.nearest(x, y, max(1, min(k, 100)), max_distance)
+    return robot_poses([robot_id for robot_id, _ in found], [distance for _, distance in found])
+
+# 사각형 영역 안의 로봇
+@app.get("/api/robots/region")
+async def get_robots_in_region(min_x: float, min_y: float, max_x: float, max_y: float):
+    return robot_poses(sorted(spatial.in_rect(min_x, min_y, max_x, max_y)))
+
+class ZoneRequest(BaseModel):
+    name: str
+    polygon: List[List[float]]
+    alert: bool = False
+
+# 구역 (지오펜스) - 메모리에만 보관
+@app.get("/api/zones")
+async def list_zones():
+    return [{**zone.to_json(), "robots": len(spatial.members[zone.id])} for zone in spatial.zones.values()]
+
+@app.get("/api/zones/stats")
+async def get_spatial_stats():
+    return spatial.get_stats()
+
+@app.put("/api/zones/{zone_id}")
+async def put_zone(zone_id: str, request: ZoneRequest):
+    try:
+        zone = Zone(zone_id, request.name, request.polygon, request.alert)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    spatial.set_zone(zone)
+    replicate("zones/set", zone.to_json())
+    return {**zone.to_json(), "robots": len(spatial.members[zone_id])}
+
+@app.delete("/api/zones/{zone_id}")
+async def delete_zone(zone_id: str):
+    if not spatial.remove_zone(zone_id):
+        raise HTTPException(status_code=404, detail="구역을 찾을 수 없습니다")
+    replicate("zones/remove", zone_id)
+    return {"message": "구역을 삭제했습니다"}
+
+# 구역 안에 있는 로봇 (위치 갱신 때마다 유지되는 소속 목록)
+@app.get("/api/zones/{zone_id}/robots")
+async def get_zone_robots(zone_id: str):
+    if zone_id not in spatial.zones:
+        raise HTTPException(status_code=404, detail="구역을 찾을 수 없습니다")
+    return robot_poses(spatial.zone_members(zone_id))
 
 # 관리자용 로봇 관리 엔드포인트
 @app.post("/admin/robots")
@@ -497,53 +1623,128 @@ async def create_robot(robot_id: str, name: str):
         "status": "idle",
         "battery_level": 100
     }
+    telemetry.subscribe("monitoring", robot_id)
+    replicate("store/robots", db.robots[robot_id])
     return db.robots[robot_id]
 
-async def generate_point_cloud_data() -> Dict[str, Any]:
-    # 100개의 3D 포인트 생성
-    num_points = 100
-    x = np.random.uniform(-5, 5, num_points)
-    y = np.random.uniform(-5, 5, num_points)
-    z = np.random.uniform(0, 3, num_points)
-    
-    # intensity 값 생성 (0-1 사이)
-    intensity = np.random.uniform(0, 1, num_points)
-    
-    # numpy 배열을 리스트로 변환
-    points = [
-        {
-            "x": float(x[i]),
-            "y": float(y[i]),
-            "z": float(z[i]),
-            "intensity": float(intensity[i])
-        }
-        for i in range(num_points)
-    ]
-    
-    return {
-        "timestamp": datetime.now().isoformat(),
-        "points": points
-    }
+def update_lidar_lod(websocket: WebSocket, message: str):
+    # {"type": "lod", "data": {"voxel": 0.1, "max_points": 5000}} 로 연결 중 LOD 변경 (빈 data는 전체 해상도)
+    try:
+        message = json.loads(message)
+    except json.JSONDecodeError:
+        return
+    if message.get("type") == "lod":
+        data = message.get("data") or {}
+        manager.set_variant(websocket, parse_lod(data.get("voxel"), data.get("max_points")))
 
+# ?format=binary 로 연결하면 헤더 + float32 x/y/z/intensity 배열 바이너리 프레임을 받음
+# ?voxel=0.1 (m) / ?max_points=5000 으로 상세도 지정, 같은 상세도의 연결은 프레임당 한 번 계산된 결과를 공유
 @app.websocket("/ws/lidar")
-async def websocket_lidar_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    print("LiDAR WebSocket 연결됨")
+async def websocket_lidar_endpoint(websocket: WebSocket, format: str = PROTOCOL_JSON,
+                                   voxel: Optional[float] = None, max_points: Optional[int] = None):
+    protocol = format if format in PROTOCOLS else PROTOCOL_JSON
+    await stream_telemetry(websocket, "lidar", POINT_CLOUD_SOURCE, protocol, parse_lod(voxel, max_points),
+                           on_message=lambda message: update_lidar_lod(websocket, message))
+
+# 토픽 파생 - 텔레메트리 스냅샷 하나에서 구독 중인 토픽 메시지를 만듦
+def derive_monitoring_topics(snapshot: dict, topics: Set[str]):
+    results = {}
+    if "monitoring/robots" in topics:
+        results["monitoring/robots"] = snapshot
+    if "robot/status" in topics:
+        results["robot/status"] = snapshot
+    if "sensor/battery" in topics:
+        results["sensor/battery"] = {"robot_id": snapshot["id"], "level": snapshot["battery"]}
+    return results
+
+def derive_sensor_topics(snapshot: dict, topics: Set[str]):
+    results = {}
+    if "sensor/imu" in topics:
+        results["sensor/imu"] = {
+            "robot_id": snapshot["robot_id"],
+            "timestamp": snapshot["timestamp"],
+            "gyro": snapshot["imu_data"]["gyro"],
+            "accel": snapshot["imu_data"]["acceleration"]
+        }
+    if "robot/position" in topics:
+        results["robot/position"] = {
+            "robot_id": snapshot["robot_id"],
+            "timestamp": snapshot["timestamp"],
+            "x": snapshot["position"]["x"],
+            "y": snapshot["position"]["y"],
+            "theta": snapshot["position"]["orientation"]
+        }
+    if "sensor/lidar" in topics:
+        # JSON: [{"angle": 라디안, "distance": 최대 거리 대비 비율}], scan 구독은 압축 스캔 프레임
+        lidar = snapshot["lidar_data"]
+        results["sensor/lidar"] = TopicMessage(
+            lambda: [
+                {"angle": float(angle), "distance": float(distance)}
+                for angle, distance in zip(LIDAR_ANGLES, np.minimum(lidar["ranges"] / LIDAR_RANGE_MAX, 1.0))
+            ],
+            formats={PROTOCOL_SCAN: lambda: encode_scan(snapshot)}
+        )
+    return results
+
+def point_cloud_message(cloud: Dict[str, Any], lod=None) -> TopicMessage:
+    # JSON/바이너리 구독자가 있는 형식만, LOD별로 한 번씩 인코딩
+    variant = point_cloud_lod(cloud, lod)
+    return TopicMessage(
+        lambda: point_cloud_to_json(variant),
+        lambda: pack_point_cloud(variant),
+        variants=(lambda lod: point_cloud_message(cloud, lod)) if lod is None else None
+    )
+
+def derive_lidar_topics(cloud: Dict[str, Any], topics: Set[str]):
+    if "lidar/points" in topics:
+        return {"lidar/points": point_cloud_message(cloud)}
+    return {}
+
+broker = TopicBroker(manager, scheduler)
+broker.register_feed(TelemetryFeed("monitoring", ["monitoring/robots", "robot/status", "sensor/battery"],
+    telemetry, "monitoring", lambda: list(db.robots.keys()), derive_monitoring_topics))
+broker.register_feed(TelemetryFeed("sensor", ["sensor/imu", "robot/position", "sensor/lidar"],
+    telemetry, "sensor", lambda: list(db.robots.keys()), derive_sensor_topics))
+broker.register_feed(TelemetryFeed("lidar", ["lidar/points"],
+    telemetry, "lidar", lambda: [POINT_CLOUD_SOURCE], derive_lidar_topics))
+
+# WebSocket 엔드포인트 - 토픽 구독 (프론트엔드 WebSocketService 프로토콜)
+# 클라이언트 -> 서버: {"type": "subscribe" | "unsubscribe", "data": {"topic": "..."}}
+# 서버 -> 클라이언트: {"topic": "...", "data": {...}}
+#   바이너리 구독: [토픽 길이 uint8][토픽][4바이트 정렬 패딩][페이로드]
+@app.websocket("/ws")
+async def websocket_topics(websocket: WebSocket):
+    await manager.connect_topics(websocket)
+    print("토픽 WebSocket 연결됨")
     try:
         while True:
-            point_cloud = await generate_point_cloud_data()
-            await websocket.send_json(point_cloud)
-            print(f"LiDAR 데이터 전송: {len(point_cloud['points'])} 포인트")
-            await asyncio.sleep(0.1)
+            try:
+                message = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                continue
+            message_type = message.get("type")
+            data = message.get("data") or {}
+            topic = data.get("topic")
+            if not topic:
+                continue
+            if message_type == "subscribe":
+                # data.format == "binary" | "scan" 이면 지원하는 토픽은 바이너리 프레임으로 전송
+                protocol = data.get("format") if data.get("format") in SENSOR_PROTOCOLS else PROTOCOL_JSON
+                # data.voxel / data.max_points 로 포인트 클라우드 상세도 지정 (다시 subscribe 하면 변경)
+                broker.subscribe(websocket, topic, protocol, parse_lod(data.get("voxel"), data.get("max_points")))
+            elif message_type == "unsubscribe":
+                broker.unsubscribe(websocket, topic)
     except WebSocketDisconnect:
-        print("LiDAR WebSocket 연결 종료")
+        print("토픽 WebSocket 연결 종료")
     except Exception as e:
-        print(f"LiDAR WebSocket 에러: {str(e)}")
+        print(f"토픽 WebSocket 에러: {str(e)}")
+    finally:
+        broker.disconnect(websocket)
 
 async def generate_camera_frame():
     """실제 카메라에서 프레임을 캡처하는 함수"""
     print("웹캠 연결 시도 중...")
-    cap = cv2.VideoCapture(0)  # 기본 웹캠 사용
+    cap = await asyncio.to_thread(cv2.VideoCapture, 0)  # 기본 웹캠 사용
     
     if not cap.isOpened():
         print("카메라를 열 수 없습니다! 다음을 확인해주세요:")
@@ -555,20 +1756,17 @@ async def generate_camera_frame():
     print(f"웹캠 연결 성공!")
     print(f"해상도: {cap.get(cv2.CAP_PROP_FRAME_WIDTH)}x{cap.get(cv2.CAP_PROP_FRAME_HEIGHT)}")
     print(f"FPS: {cap.get(cv2.CAP_PROP_FPS)}")
+    ticker = scheduler.every("camera/legacy", 1 / 30)  # 약 30 FPS
     
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            # 캡처, 크기 조정, JPEG 인코딩은 스레드에서 실행
+            buffer = await asyncio.to_thread(capture_jpeg, cap, 640, 480, 85)
+            if buffer is None:
                 print("프레임을 읽을 수 없습니다!")
                 print("카메라 상태:", "연결됨" if cap.isOpened() else "연결 끊김")
                 break
                 
-            # 프레임 크기 조정
-            frame = cv2.resize(frame, (640, 480))
-            
-            # JPEG으로 인코딩
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
             # Base64로 인코딩
             image_base64 = base64.b64encode(buffer).decode('utf-8')
             
@@ -578,7 +1776,7 @@ async def generate_camera_frame():
                 'camera_status': 'active'
             }
             
-            await asyncio.sleep(0.033)  # 약 30 FPS
+            await ticker.wait()
     
     except Exception as e:
         print(f"카메라 캡처 중 에러 발생: {str(e)}")
@@ -589,6 +1787,7 @@ async def generate_camera_frame():
     
     finally:
         print("카메라 연결 종료")
+        ticker.cancel()
         cap.release()
 
 @app.websocket("/ws/camera/{camera_id}")
@@ -618,8 +1817,8 @@ async def camera_stream(websocket: WebSocket, camera_id: str):
         except:
             pass
 
-# 로그 저장 함수
-async def log_camera_frame(robot_id: str, frame_number: int, image_path: Optional[str], status: str):
+# 로그 저장 함수 (큐에 넣기만 하고 실제 저장은 log_writer가 백그라운드에서 일괄 처리)
+def log_camera_frame(robot_id: str, frame_number: int, image_path: Optional[str], status: str):
     camera_log = {
         "robot_id": robot_id,
         "timestamp": datetime.utcnow(),
@@ -627,9 +1826,9 @@ async def log_camera_frame(robot_id: str, frame_number: int, image_path: Optiona
         "image_path": image_path,
         "status": status
     }
-    await db.camera_logs.insert_one(camera_log)
+    log_writer.write("camera_logs", camera_log)
 
-async def log_websocket_event(connection_type: str, robot_id: str, event_type: str, data: dict):
+def log_websocket_event(connection_type: str, robot_id: str, event_type: str, data: dict):
     websocket_log = {
         "connection_type": connection_type,
         "robot_id": robot_id,
@@ -637,7 +1836,207 @@ async def log_websocket_event(connection_type: str, robot_id: str, event_type: s
         "event_type": event_type,
         "data": data
     }
-    await db.websocket_logs.insert_one(websocket_log)
+    log_writer.write("websocket_logs", websocket_log)
+
+@app.on_event("startup")
+async def start_log_writer():
+    log_writer.start()
+
+@app.on_event("shutdown")
+async def stop_log_writer():
+    # 종료 전에 큐에 남은 로그를 모두 저장
+    await log_writer.stop()
+    password_pool.shutdown()
+
+# 녹화 인덱스는 FRAME_INDEX_FLUSH_INTERVAL초마다 모아서 저장
+frame_index_task = None
+
+async def flush_frame_index():
+    last_prune = 0.0
+    while True:
+        await asyncio.sleep(FRAME_INDEX_FLUSH_INTERVAL)
+        try:
+            await frame_store.flush()
+        except Exception as e:
+            print(f"녹화 인덱스 저장 실패: {e}")
+        # 보관 기간/용량을 넘은 세그먼트 정리 (FRAME_RETENTION_INTERVAL초마다)
+        if time.monotonic() - last_prune >= FRAME_RETENTION_INTERVAL:
+            last_prune = time.monotonic()
+            try:
+                await frame_store.prune()
+            except Exception as e:
+                print(f"녹화 세그먼트 정리 실패: {e}")
+
+@app.on_event("startup")
+async def start_frame_store():
+    global frame_index_task
+    await init_models(ModelBase.metadata)
+    frame_index_task = asyncio.create_task(flush_frame_index())
+
+@app.on_event("shutdown")
+async def stop_frame_store():
+    if frame_index_task is not None:
+        frame_index_task.cancel()
+    await frame_store.flush(close_all=True)
+    recorder.close()
+
+# 로그 큐 상태 (대기/저장/버림 건수)
+@app.get("/api/logs/stats")
+async def get_log_stats():
+    return log_writer.get_stats()
+
+# 워커 모드 (WORKERS > 1) - uvicorn 워커들이 버스(bus.py)로 연결됨
+# owner 워커만 텔레메트리를 생성하고 카메라를 열어서, 스냅샷과 인코딩된 프레임을 버스로 한 번씩 발행
+# 모든 워커는 받은 스냅샷을 자기 허브에 ingest해서 자기 WebSocket 클라이언트에게 전송하고 플릿/공간 인덱스를 갱신
+# 팔로워는 자기 클라이언트가 구독 중인 스트림/카메라를 CLUSTER_DEMAND_INTERVAL마다 owner에게 알림
+# 관리 API로 바뀌는 상태(사용자, 로봇, 구역, 지도)는 바꾼 워커가 버스로 다른 워커에게 전달
+CLUSTER_DEMAND_INTERVAL = float(os.getenv("CLUSTER_DEMAND_INTERVAL", "0.2"))
+CLUSTER_DEMAND_REFRESH = 2.0  # 바뀌지 않아도 이 주기로 다시 알림 (owner가 바뀐 경우 대비)
+MAP_PATCH = struct.Struct("<iiII")  # 지도 갱신 전달: x, y, width, height + uint8 본문
+
+# owner 쪽 - 팔로워들이 요청한 (스트림, 로봇)과 카메라를 owner의 구독으로 대신 잡아 둠
+telemetry_demand = RemoteDemand(lambda key: telemetry.subscribe(*key), lambda key: telemetry.unsubscribe(*key))
+camera_demand = RemoteDemand(camera_manager.subscribe, camera_manager.unsubscribe)
+camera_levels: Dict[str, Dict[str, Set[int]]] = {}  # 팔로워 -> robot_id -> 화질 단계
+cluster_ticker = None
+demand_sent = (None, 0.0)
+map_patches: Optional[asyncio.Queue] = None
+
+def remote_camera_levels(robot_id: str) -> Set[int]:
+    levels = set()
+    for robots in camera_levels.values():
+        levels |= robots.get(robot_id, set())
+    return levels
+
+def replicate(channel: str, value):
+    bus.publish(channel, json.dumps(value).encode("utf-8"))
+
+def replicate_telemetry(stream: str, robot_id: str, snapshot: dict):
+    if bus.is_owner and (stream, robot_id) in telemetry_demand:
+        bus.publish(f"telemetry/{stream}/{robot_id}", dumps(snapshot))
+
+telemetry.add_listener(replicate_telemetry)
+
+def on_bus_role(role: str):
+    owner = role == ROLE_OWNER
+    telemetry.set_producing(owner)
+    recorder.set_follower(not owner)
+    map_tiles.persist = owner
+    if owner:
+        camera_manager.start_producers()
+
+def on_remote_telemetry(channel: str, payload: bytes):
+    _, stream, robot_id = channel.split("/", 2)
+    if not bus.is_owner:
+        telemetry.ingest(stream, robot_id, loads(payload))
+
+def on_remote_frame(channel: str, payload: bytes):
+    robot_id = channel.split("/", 1)[1]
+    if not bus.is_owner and robot_id in camera_manager.subscribers:
+        camera_manager.relay_frame(robot_id, loads(payload))
+
+def on_remote_demand(channel: str, payload: bytes):
+    if not bus.is_owner:
+        return
+    worker = channel.split("/", 1)[1]
+    demand = json.loads(payload)
+    telemetry_demand.update(worker, [tuple(key) for key in demand["telemetry"]])
+    camera_levels[worker] = {robot_id: set(levels) for robot_id, levels in demand["camera"].items()}
+    camera_demand.update(worker, demand["camera"])
+
+def on_worker_left(channel: str, payload: bytes):
+    worker = payload.decode("utf-8")
+    telemetry_demand.drop(worker)
+    camera_demand.drop(worker)
+    camera_levels.pop(worker, None)
+
+def publish_demand():
+    # 팔로워 - 바뀌었거나 CLUSTER_DEMAND_REFRESH가 지났을 때만 발행
+    global demand_sent
+    if bus.is_owner:
+        return
+    payload = json.dumps({
+        "telemetry": sorted(telemetry.subscribers),
+        "camera": {robot_id: sorted(levels) for robot_id, levels in camera_manager.local_levels().items()},
+    }).encode("utf-8")
+    now = time.monotonic()
+    if payload == demand_sent[0] and now - demand_sent[1] < CLUSTER_DEMAND_REFRESH:
+        return
+    demand_sent = (payload, now)
+    bus.publish(f"demand/{bus.name}", payload)
+
+def on_remote_user(channel: str, payload: bytes):
+    user = json.loads(payload)
+    db.users[user["username"]] = user
+    auth_cache.invalidate_user(user["username"])
+
+def on_remote_robot(channel: str, payload: bytes):
+    robot = json.loads(payload)
+    if robot["id"] not in db.robots:
+        db.robots[robot["id"]] = robot
+        telemetry.subscribe("monitoring", robot["id"])
+
+def on_remote_zone(channel: str, payload: bytes):
+    value = json.loads(payload)
+    if channel == "zones/remove":
+        spatial.remove_zone(value)
+    else:
+        spatial.set_zone(Zone(value["id"], value["name"], value["polygon"], value["alert"]))
+
+def on_remote_map_patch(channel: str, payload: bytes):
+    x, y, width, height = MAP_PATCH.unpack_from(payload)
+    patch = np.frombuffer(payload, dtype=np.uint8, offset=MAP_PATCH.size).reshape(height, width)
+    map_patches.put_nowait((channel.split("/", 2)[2], x, y, patch))
+
+async def apply_map_patches():
+    # 받은 순서대로 하나씩 적용 (바뀐 타일은 각 워커의 map/flush에서 자기 구독자에게 전송)
+    while True:
+        map_id, x, y, patch = await map_patches.get()
+        try:
+            await asyncio.to_thread(map_tiles.update, map_id, x, y, patch)
+        except (KeyError, ValueError) as e:
+            log.warning("map_patch_error", "전달받은 지도 갱신 적용 실패", map_id=map_id, error=str(e))
+
+for prefix, handler in (
+    ("telemetry/", on_remote_telemetry),
+    ("camera/", on_remote_frame),
+    ("demand/", on_remote_demand),
+    (LEFT_CHANNEL, on_worker_left),
+    ("store/users", on_remote_user),
+    ("store/robots", on_remote_robot),
+    ("zones/", on_remote_zone),
+    ("map/patch/", on_remote_map_patch),
+):
+    bus.subscribe(prefix, handler)
+bus.on_role(on_bus_role)
+
+@app.on_event("startup")
+async def start_bus():
+    global cluster_ticker, map_patches
+    if not BUS_URL:
+        return
+    map_patches = asyncio.Queue()
+    asyncio.create_task(apply_map_patches())
+    await bus.start()
+    cluster_ticker = scheduler.every("cluster/demand", CLUSTER_DEMAND_INTERVAL, publish_demand)
+
+@app.on_event("shutdown")
+async def stop_bus():
+    if cluster_ticker is not None:
+        cluster_ticker.cancel()
+    await bus.stop()
+
+# 이 워커의 역할과 owner가 대신 잡고 있는 다른 워커들의 구독
+@app.get("/api/cluster")
+async def get_cluster_status():
+    return {
+        "worker": bus.name,
+        "pid": os.getpid(),
+        "role": bus.role,
+        "connections": len(manager.outbound),
+        "remote_telemetry": sorted(f"{stream}/{robot_id}" for stream, robot_id in telemetry_demand.counts),
+        "remote_camera": {robot_id: sorted(remote_camera_levels(robot_id)) for robot_id in camera_demand.counts},
+    }
 
 # 데이터베이스 연결 테스트
 async def test_db_connection():
@@ -659,4 +2058,15 @@ if __name__ == "__main__":
         print("MongoDB 연결에 실패했습니다. 서버를 종료합니다.")
         exit(1)
     
-    uvicorn.run(app, host="0.0.0.0", port=8080) 
\ No newline at end of file
+    # WORKERS > 1이면 버스 서버를 별도 프로세스로 띄우고 uvicorn 워커 여러 개로 실행
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1:
+        import multiprocessing
+        address = os.environ.setdefault("BUS_URL", "127.0.0.1:8091")
+        multiprocessing.Process(target=run_server, args=parse_address(address), daemon=True).start()
+        # 워커들이 빈 DB에 테이블을, 같은 캐시 디렉터리에 지도 타일을 동시에 만들지 않도록 미리 생성
+        loop.run_until_complete(init_models(ModelBase.metadata))
+        map_tiles.scan()
+        uvicorn.run("main:app", host="0.0.0.0", port=int(os.getenv("PORT", "8080")), workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8080")))
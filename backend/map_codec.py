@@ -0,0 +1,105 @@
+import base64
+import struct
+from typing import List, Optional
+
+import numpy as np
+
+# 지도 타일 변경분 포맷 (little-endian)
+# [헤더 12바이트] magic(2) "MD", version(1), flags(1), revision(uint32), count(uint16), 예약(2)
+# [타일 count개] 각 타일 헤더 36바이트 + RLE 페이로드
+#   z(uint8), 예약(1), x(uint16), y(uint16), 변경 영역 rx, ry, rw, rh(uint16, 타일 안 픽셀 좌표), 예약(2),
+#   base(8) 적용 전 타일 ETag, etag(8) 적용 후 타일 ETag, rle_len(uint32)
+#   RLE: 변경 영역(rw x rh, 행 우선)의 새 값을 (반복 수 uint8 1~255, 값 uint8) 쌍으로 나열
+# 클라이언트는 가지고 있는 타일의 ETag가 base와 같을 때만 영역을 덮어쓰고, 다르면 타일을 버리고 다시 받음
+
+MAP_DIFF_MAGIC = b"MD"
+MAP_DIFF_VERSION = 1
+DIFF_HEADER = struct.Struct("<2sBBIHH")
+TILE_HEADER = struct.Struct("<BxHHHHHH2x8s8sI")
+
+MAX_RUN = 255
+
+
+def rle_encode(values: np.ndarray) -> bytes:
+    flat = np.ascontiguousarray(values, dtype=np.uint8).ravel()
+    if flat.size == 0:
+        return b""
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    lengths = np.diff(np.append(starts, flat.size))
+    # 255보다 긴 반복은 여러 쌍으로 나눔
+    pieces = (lengths + MAX_RUN - 1) // MAX_RUN
+    counts = np.full(int(pieces.sum()), MAX_RUN, dtype=np.int64)
+    counts[np.cumsum(pieces) - 1] = lengths - MAX_RUN * (pieces - 1)
+    pairs = np.empty((counts.size, 2), dtype=np.uint8)
+    pairs[:, 0] = counts
+    pairs[:, 1] = np.repeat(flat[starts], pieces)
+    return pairs.tobytes()
+
+
+def rle_decode(data: bytes) -> np.ndarray:
+    pairs = np.frombuffer(data, dtype=np.uint8).reshape(-1, 2)
+    return np.repeat(pairs[:, 1], pairs[:, 0])
+
+
+# 타일 하나의 변경분
+class TileDiff:
+    def __init__(self, z: int, x: int, y: int, rect: tuple, base: str, etag: str, rle: bytes):
+        self.z = z
+        self.x = x
+        self.y = y
+        self.rect = rect  # (rx, ry, rw, rh)
+        self.base = base  # ETag 해시 (따옴표 없는 16진수)
+        self.etag = etag
+        self.rle = rle
+
+    def to_json(self):
+        return {
+            "z": self.z,
+            "x": self.x,
+            "y": self.y,
+            "rect": list(self.rect),
+            "base": self.base,
+            "etag": self.etag,
+            "rle": base64.b64encode(self.rle).decode("ascii"),
+        }
+
+
+def tile_diff(z: int, x: int, y: int, old: np.ndarray, new: np.ndarray, base: str, etag: str) -> Optional[TileDiff]:
+    """두 타일의 변경 영역(바운딩 박스)과 RLE (같으면 None)"""
+    changed = old != new
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        return None
+    columns = np.flatnonzero(changed.any(axis=0))
+    ry, rx = int(rows[0]), int(columns[0])
+    rh, rw = int(rows[-1]) - ry + 1, int(columns[-1]) - rx + 1
+    return TileDiff(z, x, y, (rx, ry, rw, rh), base, etag, rle_encode(new[ry:ry + rh, rx:rx + rw]))
+
+
+def apply_tile_diff(tile: np.ndarray, diff: TileDiff):
+    rx, ry, rw, rh = diff.rect
+    tile[ry:ry + rh, rx:rx + rw] = rle_decode(diff.rle).reshape(rh, rw)
+
+
+def pack_map_diff(revision: int, diffs: List[TileDiff]) -> bytes:
+    parts = [DIFF_HEADER.pack(MAP_DIFF_MAGIC, MAP_DIFF_VERSION, 0, revision, len(diffs), 0)]
+    for diff in diffs:
+        parts.append(TILE_HEADER.pack(diff.z, diff.x, diff.y, *diff.rect,
+                                      bytes.fromhex(diff.base), bytes.fromhex(diff.etag), len(diff.rle)))
+        parts.append(diff.rle)
+    return b"".join(parts)
+
+
+def unpack_map_diff(payload: bytes):
+    """(revision, [TileDiff, ...])"""
+    magic, version, _, revision, count, _ = DIFF_HEADER.unpack_from(payload, 0)
+    if magic != MAP_DIFF_MAGIC or version != MAP_DIFF_VERSION:
+        raise ValueError("잘못된 지도 변경분 헤더입니다")
+    offset = DIFF_HEADER.size
+    diffs = []
+    for _ in range(count):
+        z, x, y, rx, ry, rw, rh, base, etag, length = TILE_HEADER.unpack_from(payload, offset)
+        offset += TILE_HEADER.size
+        diffs.append(TileDiff(z, x, y, (rx, ry, rw, rh), base.hex(), etag.hex(), bytes(payload[offset:offset + length])))
+        offset += length
+    return revision, diffs
@@ -0,0 +1,379 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from map_codec import tile_diff
+from structured_log import log
+
+# 점유 지도(occupancy map) 타일 피라미드
+# PNG/PGM 지도와 map_server 형식 YAML(resolution, origin, negate ...)을 한 번만 읽어서
+# 단일 채널 uint8 타일(TILE_SIZE x TILE_SIZE)의 다해상도 피라미드를 만들고 디스크에 캐시
+# - 줌 max_zoom이 원본 해상도, 한 단계 내려갈 때마다 2x2 픽셀의 최솟값으로 줄임
+#   (어두울수록 점유 - 평균을 내면 얇은 벽이 사라지므로 장애물 우선)
+# - 줌 0은 지도 전체가 타일 하나에 들어가는 단계
+# - 타일은 gzip으로 압축해 저장하고 그대로 전송 (요청마다 디코딩/인코딩 없음), ETag는 타일 내용 해시
+# - 원본(이미지 + YAML)이 바뀌지 않았으면 재시작 시 디스크 캐시를 그대로 사용
+# 지도 갱신 (순찰 중 로봇이 보낸 영역 패치)
+# - 갱신을 받은 지도만 전체 단계 이미지를 메모리에 올리고, 패치 영역과 그 위 단계의 해당 영역만 다시 계산
+# - 처음 바뀐 타일은 바뀌기 전 내용을 보관(dirty)해 두었다가 flush 때 한 번에 변경분(TileDiff)을 만들고 디스크에 저장
+#   (짧은 간격의 여러 패치는 타일당 변경분 하나로 합쳐짐, 갱신된 타일은 재시작 후에도 캐시에 남음)
+
+TILE_SIZE = 256
+UNKNOWN = 205           # 지도 밖(가장자리 타일의 남는 부분) 값 - map_server의 미탐색 영역과 같은 회색
+MAX_CACHED_TILES = 1024  # 메모리에 올려 두는 타일 수
+CACHE_VERSION = 1        # 타일 형식이 바뀌면 올려서 디스크 캐시를 다시 만듦
+
+
+def load_map_yaml(path: str) -> dict:
+    """map_server 형식 YAML 읽기 (키: 값 한 줄씩, origin은 [x, y, yaw] 목록) - PyYAML 없이 필요한 형식만 처리"""
+    metadata = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line or ":" not in line:
+                continue
+            key, value = (part.strip() for part in line.split(":", 1))
+            if value.startswith("[") and value.endswith("]"):
+                metadata[key] = [float(item) for item in value[1:-1].split(",") if item.strip()]
+                continue
+            value = value.strip("'\"")
+            try:
+                metadata[key] = int(value) if value.lstrip("-").isdigit() else float(value)
+            except ValueError:
+                metadata[key] = value
+    return metadata
+
+
+def _downsample(image: np.ndarray) -> np.ndarray:
+    # 2x2 최솟값 (홀수 크기는 흰색(빈 공간)으로 채워서 최솟값에 영향이 없게)
+    height, width = image.shape
+    if height % 2 or width % 2:
+        padded = np.full((height + height % 2, width + width % 2), 255, dtype=np.uint8)
+        padded[:height, :width] = image
+        image = padded
+    return image.reshape(image.shape[0] // 2, 2, image.shape[1] // 2, 2).min(axis=(1, 3))
+
+
+def build_levels(image: np.ndarray, tile_size: int = TILE_SIZE) -> List[np.ndarray]:
+    """줌 0(가장 작은 단계)부터 원본까지의 이미지 목록"""
+    levels = [image]
+    while levels[-1].shape[0] > tile_size or levels[-1].shape[1] > tile_size:
+        levels.append(_downsample(levels[-1]))
+    levels.reverse()
+    return levels
+
+
+def cut_tile(level: np.ndarray, x: int, y: int, tile_size: int = TILE_SIZE) -> np.ndarray:
+    tile = level[y * tile_size:(y + 1) * tile_size, x * tile_size:(x + 1) * tile_size]
+    if tile.shape != (tile_size, tile_size):
+        padded = np.full((tile_size, tile_size), UNKNOWN, dtype=np.uint8)
+        padded[:tile.shape[0], :tile.shape[1]] = tile
+        tile = padded
+    return np.ascontiguousarray(tile)
+
+
+def tile_etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
+
+
+def _tile_range(start: int, end: int, tile_size: int) -> range:
+    # 픽셀 구간 [start, end)에 걸치는 타일 번호
+    return range(start // tile_size, -(-end // tile_size))
+
+
+def _source_hash(*paths: str) -> str:
+    digest = hashlib.blake2b(str(CACHE_VERSION).encode(), digest_size=16)
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 지도 하나의 타일 피라미드 (타일 데이터는 디스크, 목록/ETag만 메모리)
+class MapPyramid:
+    def __init__(self, root: str, info: dict):
+        self.root = root  # 캐시 디렉터리 (index.json, tiles/)
+        self.info = info
+        self.info.setdefault("revision", 0)
+        self.etags: Dict[str, str] = info.pop("etags", {})
+        self.levels: Optional[List[np.ndarray]] = None  # 갱신을 받은 지도만 메모리에 올림
+        self.dirty: Dict[tuple, np.ndarray] = {}         # (z, x, y) -> 바뀌기 전 타일
+
+    @property
+    def id(self) -> str:
+        return self.info["id"]
+
+    def tile_path(self, z: int, x: int, y: int) -> str:
+        return os.path.join(self.root, "tiles", str(z), f"{x}_{y}.u8.gz")
+
+    def has_tile(self, z: int, x: int, y: int) -> bool:
+        return f"{z}/{x}/{y}" in self.etags
+
+    def metadata(self):
+        return {**self.info, "tiles": len(self.etags)}
+
+    def read_tile(self, z: int, x: int, y: int) -> np.ndarray:
+        tile_size = self.info["tile_size"]
+        with open(self.tile_path(z, x, y), "rb") as f:
+            return np.frombuffer(gzip.decompress(f.read()), dtype=np.uint8).reshape(tile_size, tile_size)
+
+    def load_levels(self) -> List[np.ndarray]:
+        # 원본 해상도 단계를 디스크 타일에서 다시 조립 (이전 갱신이 반영된 상태), 나머지 단계는 다시 줄여서 만듦
+        if self.levels is None:
+            tile_size = self.info["tile_size"]
+            width, height, z = self.info["width"], self.info["height"], self.info["max_zoom"]
+            image = np.empty((-(-height // tile_size) * tile_size, -(-width // tile_size) * tile_size), dtype=np.uint8)
+            for y in _tile_range(0, height, tile_size):
+                for x in _tile_range(0, width, tile_size):
+                    image[y * tile_size:(y + 1) * tile_size, x * tile_size:(x + 1) * tile_size] = self.read_tile(z, x, y)
+            self.levels = build_levels(np.ascontiguousarray(image[:height, :width]), tile_size)
+        return self.levels
+
+    def apply(self, left: int, top: int, patch: np.ndarray) -> int:
+        """원본 해상도 픽셀 (left, top)부터 patch로 덮어쓰고 바뀐 픽셀 수 반환 (지도 밖 부분은 잘라냄)"""
+        levels = self.load_levels()
+        tile_size = self.info["tile_size"]
+        full = levels[-1]
+        right, bottom = min(left + patch.shape[1], full.shape[1]), min(top + patch.shape[0], full.shape[0])
+        if left < 0 or top < 0 or right <= left or bottom <= top:
+            raise ValueError("갱신 영역이 지도 밖입니다")
+        patch = patch[:bottom - top, :right - left]
+        changed = int(np.count_nonzero(full[top:bottom, left:right] != patch))
+        if not changed:
+            return 0
+
+        # 원본 해상도부터 줌 0까지 영역을 절반씩 줄여 가며, 처음 바뀌는 타일은 바뀌기 전 내용을 보관한 뒤 갱신
+        for z in range(len(levels) - 1, -1, -1):
+            level = levels[z]
+            for y in _tile_range(top, bottom, tile_size):
+                for x in _tile_range(left, right, tile_size):
+                    if (z, x, y) not in self.dirty:
+                        self.dirty[(z, x, y)] = cut_tile(level, x, y, tile_size)
+            if z == len(levels) - 1:
+                level[top:bottom, left:right] = patch
+            else:
+                level[top:bottom, left:right] = _downsample(levels[z + 1][top * 2:bottom * 2, left * 2:right * 2])
+            left, top, right, bottom = left // 2, top // 2, -(-right // 2), -(-bottom // 2)
+        return changed
+
+    def collect_diffs(self) -> List[tuple]:
+        """바뀐 타일별 (TileDiff, 새 타일) 목록 - 결국 같은 내용으로 돌아온 타일은 제외"""
+        tile_size = self.info["tile_size"]
+        results = []
+        for (z, x, y), old in sorted(self.dirty.items()):
+            new = cut_tile(self.levels[z], x, y, tile_size)
+            etag = tile_etag(new.tobytes())
+            base = self.etags[f"{z}/{x}/{y}"]
+            if etag == base:
+                continue
+            results.append((tile_diff(z, x, y, old, new, base.strip('"'), etag.strip('"')), new))
+        self.dirty.clear()
+        return results
+
+
+class MapTileService:
+    def __init__(self, map_dir: str, cache_dir: str, tile_size: int = TILE_SIZE,
+                 max_cached_tiles: int = MAX_CACHED_TILES):
+        self.map_dir = map_dir
+        self.cache_dir = cache_dir
+        self.tile_size = tile_size
+        self.max_cached_tiles = max_cached_tiles
+        self.maps: Dict[str, MapPyramid] = {}
+        self._tiles: "OrderedDict[tuple, bytes]" = OrderedDict()  # (map_id, z, x, y) -> gzip 타일
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()  # 지도 갱신/flush (스레드에서 실행)
+        # False면 flush에서 디스크에 쓰지 않고 메모리 캐시에만 반영 (워커 모드에서 같은 캐시 디렉터리는 owner만 씀)
+        self.persist = True
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.last_build_ms = 0.0
+        self.updates = 0
+        self.changed_pixels = 0
+        self.flushed_tiles = 0
+        self.diff_bytes = 0
+
+    def scan(self) -> List[str]:
+        """map_dir의 *.yaml 지도를 모두 읽음 (블로킹 - 스레드에서 호출)"""
+        if not os.path.isdir(self.map_dir):
+            return []
+        loaded = []
+        for name in sorted(os.listdir(self.map_dir)):
+            if not name.endswith((".yaml", ".yml")):
+                continue
+            try:
+                loaded.append(self.ingest(os.path.join(self.map_dir, name)).id)
+            except Exception as e:
+                log.warning("map_ingest_failed", "지도 불러오기 실패", file=name, error=str(e))
+        return loaded
+
+    def ingest(self, yaml_path: str, map_id: Optional[str] = None) -> MapPyramid:
+        """지도 하나를 읽어 피라미드를 만들거나, 원본이 같으면 디스크 캐시를 그대로 사용 (블로킹)"""
+        map_id = map_id or os.path.splitext(os.path.basename(yaml_path))[0]
+        metadata = load_map_yaml(yaml_path)
+        image_path = os.path.join(os.path.dirname(yaml_path), str(metadata["image"]))
+        source = _source_hash(yaml_path, image_path)
+
+        root = os.path.join(self.cache_dir, map_id)
+        index_path = os.path.join(root, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+            if info.get("source") == source:
+                return self._install(MapPyramid(root, info))
+
+        started = time.perf_counter()
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"지도 이미지를 읽을 수 없습니다: {image_path}")
+        if metadata.get("negate"):
+            image = 255 - image
+        levels = build_levels(image, self.tile_size)
+        origin = (list(metadata.get("origin") or [0.0, 0.0, 0.0]) + [0.0, 0.0, 0.0])[:3]
+        info = {
+            "id": map_id,
+            "source": source,
+            "width": int(image.shape[1]),
+            "height": int(image.shape[0]),
+            "resolution": float(metadata.get("resolution", 0.05)),
+            "origin": {"x": origin[0], "y": origin[1], "yaw": origin[2]},
+            "occupied_thresh": float(metadata.get("occupied_thresh", 0.65)),
+            "free_thresh": float(metadata.get("free_thresh", 0.196)),
+            "tile_size": self.tile_size,
+            "max_zoom": len(levels) - 1,
+            "levels": [{"width": int(level.shape[1]), "height": int(level.shape[0])} for level in levels],
+        }
+
+        # 임시 디렉터리에 모두 쓴 뒤 교체 (도중에 실패해도 이전 캐시는 그대로)
+        # 워커 여러 개가 동시에 만들어도 서로의 임시 디렉터리를 지우지 않도록 프로세스별로 나눔 (결과는 같음)
+        building = f"{root}.building-{os.getpid()}"
+        shutil.rmtree(building, ignore_errors=True)
+        etags = {}
+        for z, level in enumerate(levels):
+            os.makedirs(os.path.join(building, "tiles", str(z)), exist_ok=True)
+            for y in range(-(-level.shape[0] // self.tile_size)):
+                for x in range(-(-level.shape[1] // self.tile_size)):
+                    data = cut_tile(level, x, y, self.tile_size).tobytes()
+                    etags[f"{z}/{x}/{y}"] = tile_etag(data)
+                    with open(os.path.join(building, "tiles", str(z), f"{x}_{y}.u8.gz"), "wb") as f:
+                        # mtime=0 - 같은 타일은 항상 같은 압축 결과
+                        f.write(gzip.compress(data, compresslevel=6, mtime=0))
+        with open(os.path.join(building, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({**info, "etags": etags}, f)
+        shutil.rmtree(root, ignore_errors=True)
+        os.replace(building, root)
+
+        self.builds += 1
+        self.last_build_ms = (time.perf_counter() - started) * 1000
+        log.info("map_ingested", "지도 타일 생성", map_id=map_id, width=info["width"], height=info["height"],
+                 zoom_levels=len(levels), tiles=len(etags), build_ms=round(self.last_build_ms, 1))
+        return self._install(MapPyramid(root, {**info, "etags": etags}))
+
+    def _install(self, pyramid: MapPyramid) -> MapPyramid:
+        with self._lock:
+            self.maps[pyramid.id] = pyramid
+            for key in [key for key in self._tiles if key[0] == pyramid.id]:
+                del self._tiles[key]
+        return pyramid
+
+    def update(self, map_id: str, left: int, top: int, patch: np.ndarray) -> int:
+        """지도 영역 갱신 (블로킹) - 바뀐 픽셀 수 반환, 변경분은 flush에서 만들어짐"""
+        pyramid = self.maps.get(map_id)
+        if pyramid is None:
+            raise KeyError(map_id)
+        with self._update_lock:
+            changed = pyramid.apply(left, top, np.asarray(patch, dtype=np.uint8))
+        self.updates += 1
+        self.changed_pixels += changed
+        return changed
+
+    def has_dirty(self) -> bool:
+        return any(pyramid.dirty for pyramid in list(self.maps.values()))
+
+    def flush(self) -> Dict[str, tuple]:
+        """바뀐 타일을 디스크와 캐시에 반영하고 {map_id: (revision, [TileDiff, ...])} 반환 (블로킹)"""
+        results = {}
+        with self._update_lock:
+            for pyramid in list(self.maps.values()):
+                if not pyramid.dirty:
+                    continue
+                diffs = pyramid.collect_diffs()
+                if not diffs:
+                    continue
+                for diff, tile in diffs:
+                    data = gzip.compress(tile.tobytes(), compresslevel=6, mtime=0)
+                    if self.persist:
+                        with open(pyramid.tile_path(diff.z, diff.x, diff.y), "wb") as f:
+                            f.write(data)
+                    pyramid.etags[f"{diff.z}/{diff.x}/{diff.y}"] = f'"{diff.etag}"'
+                    with self._lock:
+                        key = (pyramid.id, diff.z, diff.x, diff.y)
+                        # 디스크에 쓰지 않는 경우 owner가 쓰기 전의 파일을 읽지 않도록 캐시에 넣어 둠
+                        if key in self._tiles or not self.persist:
+                            self._tiles[key] = data
+                pyramid.info["revision"] += 1
+                if self.persist:
+                    with open(os.path.join(pyramid.root, "index.json"), "w", encoding="utf-8") as f:
+                        json.dump({**pyramid.info, "etags": pyramid.etags}, f)
+                self.flushed_tiles += len(diffs)
+                self.diff_bytes += sum(len(diff.rle) for diff, _ in diffs)
+                results[pyramid.id] = (pyramid.info["revision"], [diff for diff, _ in diffs])
+        return results
+
+    def get(self, map_id: str) -> Optional[MapPyramid]:
+        return self.maps.get(map_id)
+
+    def list(self):
+        return [pyramid.metadata() for pyramid in list(self.maps.values())]
+
+    def etag(self, map_id: str, z: int, x: int, y: int) -> Optional[str]:
+        pyramid = self.maps.get(map_id)
+        return pyramid.etags.get(f"{z}/{x}/{y}") if pyramid else None
+
+    def tile(self, map_id: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """gzip 압축된 타일 (없으면 None) - 메모리 캐시에 없을 때만 디스크에서 읽음 (블로킹)"""
+        key = (map_id, z, x, y)
+        with self._lock:
+            data = self._tiles.get(key)
+            if data is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return data
+        pyramid = self.maps.get(map_id)
+        if pyramid is None or not pyramid.has_tile(z, x, y):
+            return None
+        with open(pyramid.tile_path(z, x, y), "rb") as f:
+            data = f.read()
+        with self._lock:
+            self.misses += 1
+            self._tiles[key] = data
+            while len(self._tiles) > self.max_cached_tiles:
+                self._tiles.popitem(last=False)
+        return data
+
+    def get_stats(self):
+        return {
+            "maps": len(self.maps),
+            "cached_tiles": len(self._tiles),
+            "max_cached_tiles": self.max_cached_tiles,
+            "hits": self.hits,
+            "misses": self.misses,
+            "builds": self.builds,
+            "last_build_ms": round(self.last_build_ms, 1),
+            "updates": self.updates,
+            "changed_pixels": self.changed_pixels,
+            "flushed_tiles": self.flushed_tiles,
+            "diff_bytes": self.diff_bytes,
+        }
@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from map_tiles import MapTileService
+
+# 지도 로딩 비교: 전체 PNG 한 장을 받는 기존 방식 vs 타일 피라미드에서 보이는 타일만 받는 방식 (map_tiles.py)
+# 가상의 시설 지도(벽, 방, 미탐색 영역)를 만들어 피라미드 생성(처음/캐시 재사용) 시간과
+# 화면 크기(1280x720)만큼 보이는 타일의 전송 바이트를 전체 PNG와 비교
+# 사용법: python map_tiles_bench.py [지도 한 변 크기(픽셀)]
+
+VIEW_WIDTH, VIEW_HEIGHT = 1280, 720
+
+
+def make_map(size: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    image = np.full((size, size), 205, dtype=np.uint8)
+    margin = size // 20
+    image[margin:-margin, margin:-margin] = 254
+    # 방과 복도 벽
+    for _ in range(size // 40):
+        x, y = rng.integers(margin, size - margin, 2)
+        w, h = rng.integers(size // 40, size // 8, 2)
+        cv2.rectangle(image, (int(x), int(y)), (int(x + w), int(y + h)), 0, 2)
+    # 센서 잡음 (점 장애물)
+    noise = rng.random((size, size)) < 0.0005
+    image[noise] = 0
+    return image
+
+
+def visible_tiles(info: dict, scale: float):
+    # mapService.visibleTiles와 같은 계산 (화면 중심을 지도 중심에 맞춤)
+    reduction = max(0, int(np.floor(np.log2(1 / scale))))
+    z = max(0, info["max_zoom"] - reduction)
+    level = info["levels"][z]
+    span = info["tile_size"] * 2 ** (info["max_zoom"] - z)
+    left = (info["width"] - VIEW_WIDTH / scale) / 2
+    top = (info["height"] - VIEW_HEIGHT / scale) / 2
+    x0, y0 = max(0, int(left // span)), max(0, int(top // span))
+    x1 = min(-(-level["width"] // info["tile_size"]) - 1, int((left + VIEW_WIDTH / scale) // span))
+    y1 = min(-(-level["height"] // info["tile_size"]) - 1, int((top + VIEW_HEIGHT / scale) // span))
+    return [(z, x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    with tempfile.TemporaryDirectory() as root:
+        map_dir = os.path.join(root, "maps")
+        os.makedirs(map_dir)
+        image = make_map(size)
+        cv2.imwrite(os.path.join(map_dir, "bench.png"), image)
+        with open(os.path.join(map_dir, "bench.yaml"), "w") as f:
+            f.write("image: bench.png\nresolution: 0.05\norigin: [0.0, 0.0, 0.0]\nnegate: 0\n")
+        png_bytes = os.path.getsize(os.path.join(map_dir, "bench.png"))
+
+        service = MapTileService(map_dir, os.path.join(root, "cache"))
+        started = time.perf_counter()
+        service.scan()
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        service = MapTileService(map_dir, os.path.join(root, "cache"))
+        started = time.perf_counter()
+        service.scan()
+        warm_ms = (time.perf_counter() - started) * 1000
+
+        info = service.get("bench").metadata()
+        print(f"지도 {size}x{size} ({size * 0.05:.0f}m), 줌 단계 {info['max_zoom'] + 1}개, 타일 {info['tiles']}개")
+        print(f"피라미드 생성: 처음 {cold_ms:.0f}ms, 캐시 재사용 {warm_ms:.0f}ms")
+        print(f"기존 방식: PNG {png_bytes / 1024:.0f}KB 전체 다운로드 + 픽셀 {size * size:,}개 변환")
+        print()
+        print(f"{'배율':>6} {'줌':>3} {'타일':>5} {'전송(gzip)':>11} {'원본 대비':>9} {'디스크 읽기':>11} {'메모리 캐시':>11}")
+        for scale in (1 / 32, 1 / 8, 0.25, 0.5, 1.0):
+            tiles = visible_tiles(info, scale)
+            started = time.perf_counter()
+            sent = sum(len(service.tile("bench", *tile)) for tile in tiles)
+            disk_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            for tile in tiles:
+                service.tile("bench", *tile)
+            memory_ms = (time.perf_counter() - started) * 1000
+            print(f"{scale:>6.3f} {tiles[0][0]:>3} {len(tiles):>5} {sent / 1024:>9.0f}KB {sent / png_bytes:>8.1%}"
+                  f" {disk_ms:>9.1f}ms {memory_ms:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
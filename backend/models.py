@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, ForeignKey, LargeBinary
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, ForeignKey, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -63,6 +63,47 @@ class CameraData(Base):
     robot_id = Column(String, ForeignKey("robots.id"))
     timestamp = Column(DateTime, default=datetime.utcnow)
     frame_number = Column(Integer)
-    image_data = Column(String)  # Base64 인코딩된 이미지 데이터
+    image_data = Column(String)  # Base64 인코딩된 이미지 데이터 (새 녹화는 CameraSegment/CameraFrame 사용)
     
-    robot = relationship("Robot", back_populates="camera_data") 
\ No newline at end of file
+    robot = relationship("Robot", back_populates="camera_data") 
+
+# 시계열 저장: 로봇별로 일정 시간 구간의 센서 샘플을 열 단위 NumPy 배열로 묶어 압축한 청크 (timeseries.py)
+class SensorChunk(Base):
+    __tablename__ = "sensor_chunks"
+    __table_args__ = (Index("ix_sensor_chunks_robot_time", "robot_id", "start_time"),)
+
+    id = Column(Integer, primary_key=True)
+    robot_id = Column(String)  # 등록 전 로봇의 데이터도 저장하도록 외래 키 없음
+    start_time = Column(Float)  # 첫 샘플 시각 (유닉스 초)
+    end_time = Column(Float)    # 마지막 샘플 시각
+    sample_count = Column(Integer)
+    data = Column(LargeBinary)  # timeseries.pack_chunk 형식
+
+# 카메라 녹화: JPEG 프레임을 이어 붙인 MJPEG 세그먼트 파일 하나 (frame_store.py)
+class CameraSegment(Base):
+    __tablename__ = "camera_segments"
+    __table_args__ = (Index("ix_camera_segments_robot_time", "robot_id", "start_time"),)
+
+    id = Column(String, primary_key=True)  # "{robot_id}-{시작 시각(ms)}"
+    robot_id = Column(String)
+    path = Column(String)        # 저장 디렉터리 기준 상대 경로
+    start_time = Column(Float)   # 유닉스 초
+    end_time = Column(Float)
+    frame_count = Column(Integer)
+    size_bytes = Column(Integer)
+
+# 세그먼트 안의 프레임 위치 (파일을 열지 않고 시간/프레임 번호로 바이트 범위를 찾기 위한 인덱스)
+class CameraFrame(Base):
+    __tablename__ = "camera_frames"
+    __table_args__ = (
+        Index("ix_camera_frames_robot_time", "robot_id", "timestamp"),
+        Index("ix_camera_frames_segment", "segment_id", "frame_number"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    segment_id = Column(String)
+    robot_id = Column(String)
+    frame_number = Column(Integer)
+    timestamp = Column(Float)
+    offset = Column(Integer)
+    length = Column(Integer)
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import deque
+
+from metrics import counter, histogram
+from structured_log import log
+
+# 큐가 가득 찼을 때의 처리 방식
+POLICY_DROP_OLDEST = "drop_oldest"  # 텔레메트리: 가장 오래된 메시지를 버림
+POLICY_LATEST = "latest"            # 영상: 최신 메시지 하나만 유지
+
+# 큐 넘침이 연속으로 이어져 연결을 끊을 때 사용하는 close 코드 (Try Again Later)
+OVERFLOW_CLOSE_CODE = 1013
+
+# 연결 종류(label의 첫 부분: camera, sensor, topics ...)별 전송 메트릭
+MESSAGES_SENT = counter("ws_messages_sent_total", "전송 완료한 WebSocket 메시지 수", ["type"])
+BYTES_SENT = counter("ws_bytes_sent_total", "전송 완료한 WebSocket 메시지 크기 합계", ["type"])
+MESSAGES_DROPPED = counter("ws_messages_dropped_total", "전송 큐가 가득 차서 버린 메시지 수", ["type"])
+SEND_SECONDS = histogram("ws_send_seconds", "메시지 하나의 전송 완료 시간", ["type"])
+
+
+# 연결별 전송 큐 - 브로드캐스트는 큐에 넣기만 하고 실제 전송은 연결마다 별도 태스크가 담당
+class OutboundQueue:
+    def __init__(self, websocket, label: str, policy: str = POLICY_DROP_OLDEST,
+                 max_size: int = 100, max_overflows: int = 50, on_close=None):
+        self.websocket = websocket
+        self.label = label
+        self.kind = label.split("/", 1)[0]
+        self.policy = policy
+        self.max_size = 1 if policy == POLICY_LATEST else max_size
+        self.max_overflows = max_overflows
+        self.on_close = on_close
+
+        self._queue = deque()
+        self._ready = asyncio.Event()
+        self._task = None
+        self.closed = False
+
+        # 통계
+        self.sent = 0
+        self.dropped = 0
+        self.overflows = 0  # 큐를 다 비우기 전까지 연속으로 넘친 횟수
+        self.last_send_ms = 0.0
+        self.send_started = 0.0  # 진행 중인 전송의 시작 시각 (monotonic, 전송 중이 아니면 0)
+        self._sent_metric = MESSAGES_SENT.labels(self.kind)
+        self._bytes_metric = BYTES_SENT.labels(self.kind)
+        self._dropped_metric = MESSAGES_DROPPED.labels(self.kind)
+        self._send_seconds = SEND_SECONDS.labels(self.kind)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, payload) -> bool:
+        """미리 직렬화된 페이로드(str 또는 bytes)를 큐에 넣음 (블로킹 없음)"""
+        if self.closed:
+            return False
+        if len(self._queue) >= self.max_size:
+            self._queue.popleft()
+            self.dropped += 1
+            self._dropped_metric.inc()
+            if self.policy != POLICY_LATEST:
+                self.overflows += 1
+                if self.max_overflows and self.overflows >= self.max_overflows:
+                    log.warning("ws_queue_overflow", "전송 큐 넘침 - 연결 종료", connection=self.label,
+                                overflows=self.overflows)
+                    self.close(OVERFLOW_CLOSE_CODE)
+                    return False
+        self._queue.append(payload)
+        self._ready.set()
+        return True
+
+    def depth(self):
+        return len(self._queue)
+
+    def close(self, code: int = None):
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        current = asyncio.current_task()
+        if self._task and self._task is not current:
+            self._task.cancel()
+        if code is not None:
+            asyncio.create_task(self._close_websocket(code))
+        if self.on_close:
+            self.on_close(self)
+
+    async def _close_websocket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _run(self):
+        try:
+            while not self.closed:
+                await self._ready.wait()
+                self._ready.clear()
+                while self._queue:
+                    payload = self._queue.popleft()
+                    started = self.send_started = time.monotonic()
+                    if isinstance(payload, str):
+                        await self.websocket.send_text(payload)
+                    else:
+                        await self.websocket.send_bytes(payload)
+                    self.send_started = 0.0
+                    elapsed = time.monotonic() - started
+                    self.last_send_ms = elapsed * 1000
+                    self.sent += 1
+                    self._sent_metric.inc()
+                    # str은 UTF-8로 보내므로 인코딩된 크기로 셈 (ASCII면 글자 수와 같음)
+                    self._bytes_metric.inc(len(payload) if not isinstance(payload, str) or payload.isascii()
+                                           else len(payload.encode("utf-8")))
+                    self._send_seconds.observe(elapsed)
+                self.overflows = 0
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            log.info("ws_send_failed", "전송 실패", connection=self.label, error=str(e))
+            self.close()
+
+    def get_stats(self):
+        return {
+            "connection": self.label,
+            "policy": self.policy,
+            "depth": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "overflows": self.overflows,
+            "last_send_ms": round(self.last_send_ms, 2),
+        }
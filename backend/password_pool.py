@@ -0,0 +1,71 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# 대기열이 가득 차서 요청을 받을 수 없을 때 (핸들러에서 503으로 변환)
+class PasswordPoolBusy(Exception):
+    pass
+
+
+# bcrypt 해시/검증 전용 스레드 풀
+# bcrypt는 계산 중 GIL을 놓기 때문에 스레드에서 실행하면 이벤트 루프가 멈추지 않음
+# 동시에 max_workers개까지만 계산하고, 대기는 max_queue개까지만 허용 (로그인 폭주 시 나머지는 바로 거절)
+class PasswordPool:
+    def __init__(self, max_workers: int = None, max_queue: int = 64):
+        # CPU 코어보다 많은 스레드는 처리량을 늘리지 못하고 로그인 지연만 늘림
+        max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+        self._semaphore = None  # 이벤트 루프 안에서 처음 사용할 때 생성
+
+        # 통계
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    async def run(self, func, *args):
+        """func(*args)를 풀에서 실행하고 결과 반환 (대기열이 가득 차면 PasswordPoolBusy)"""
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordPoolBusy("비밀번호 처리 대기열이 가득 찼습니다")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.max_wait_ms = max(self.max_wait_ms, (started - queued_at) * 1000)
+
+        self.active += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self.completed += 1
+            self.total_ms += (time.perf_counter() - started) * 1000
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / self.completed, 2) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 2),
+        }
@@ -0,0 +1,144 @@
+import json
+import struct
+
+import numpy as np
+
+# 포인트 클라우드 바이너리 포맷 (little-endian)
+# [헤더 20바이트]
+#   magic(2) "PC", version(1), flags(1), point_count(uint32), timestamp(float64, 유닉스 초), meta_len(uint32)
+# [메타데이터 JSON (meta_len 바이트, 4바이트 정렬 패딩)]
+# [x float32 * N][y float32 * N][z float32 * N (FLAG_Z)][intensity float32 * N (FLAG_INTENSITY)]
+# 모든 배열이 4바이트 경계에서 시작하므로 프론트엔드에서 복사 없이 Float32Array로 읽을 수 있음
+POINTS_MAGIC = b"PC"
+POINTS_VERSION = 1
+POINTS_HEADER = struct.Struct("<2sBBIdI")
+POINTS_HEADER_SIZE = POINTS_HEADER.size
+
+FLAG_Z = 0x01
+FLAG_INTENSITY = 0x02
+
+
+def _pad4(length: int) -> int:
+    return (4 - length % 4) % 4
+
+
+def pack_points(x, y, z=None, intensity=None, timestamp: float = 0.0, meta: dict = None) -> bytes:
+    """NumPy 배열을 포인트별 파이썬 객체 없이 바로 바이너리로 변환"""
+    channels = [x, y]
+    flags = 0
+    if z is not None:
+        flags |= FLAG_Z
+        channels.append(z)
+    if intensity is not None:
+        flags |= FLAG_INTENSITY
+        channels.append(intensity)
+
+    meta_bytes = json.dumps(meta).encode('utf-8') if meta else b""
+    parts = [
+        POINTS_HEADER.pack(POINTS_MAGIC, POINTS_VERSION, flags, len(x), timestamp, len(meta_bytes)),
+        meta_bytes,
+        b"\0" * _pad4(len(meta_bytes)),
+    ]
+    for channel in channels:
+        # 이미 float32 연속 배열이면 복사 없이 버퍼를 그대로 사용
+        parts.append(memoryview(np.ascontiguousarray(channel, dtype='<f4')))
+    return b"".join(parts)
+
+
+def unpack_points(message: bytes):
+    """바이너리 메시지를 (헤더 dict, 메타데이터, 채널 배열 dict)로 분리 (배열은 복사 없는 view)"""
+    magic, version, flags, count, timestamp, meta_len = POINTS_HEADER.unpack_from(message)
+    if magic != POINTS_MAGIC:
+        raise ValueError("잘못된 포인트 클라우드 헤더입니다")
+
+    offset = POINTS_HEADER_SIZE
+    meta = json.loads(bytes(message[offset:offset + meta_len])) if meta_len else None
+    offset += meta_len + _pad4(meta_len)
+
+    names = ["x", "y"]
+    if flags & FLAG_Z:
+        names.append("z")
+    if flags & FLAG_INTENSITY:
+        names.append("intensity")
+
+    arrays = {}
+    for name in names:
+        arrays[name] = np.frombuffer(message, dtype='<f4', count=count, offset=offset)
+        offset += count * 4
+
+    header = {"version": version, "flags": flags, "count": count, "timestamp": timestamp}
+    return header, meta, arrays
+
+
+def points_to_dicts(*channels, names=("x", "y", "z", "intensity")):
+    """기존 JSON 형식 ([{"x": .., "y": ..}, ...])이 필요한 클라이언트용 변환"""
+    columns = [np.asarray(channel).tolist() for channel in channels]
+    keys = names[:len(columns)]
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+# 상세도(LOD) - (voxel 크기(m), 최대 포인트 수), 둘 다 None이면 전체 해상도
+def parse_lod(voxel=None, max_points=None):
+    """구독 파라미터를 LOD 키로 정규화 (잘못된 값은 무시, 전체 해상도면 None)"""
+    try:
+        voxel = float(voxel) if voxel is not None else None
+    except (TypeError, ValueError):
+        voxel = None
+    try:
+        max_points = int(max_points) if max_points is not None else None
+    except (TypeError, ValueError):
+        max_points = None
+    voxel = voxel if voxel and voxel > 0 else None
+    max_points = max_points if max_points and max_points > 0 else None
+    if voxel is None and max_points is None:
+        return None
+    return (voxel, max_points)
+
+
+def voxel_downsample(positions, voxel_size: float, *channels):
+    """
+    voxel 격자 다운샘플링 - 같은 voxel에 들어간 포인트를 평균 하나로 합침
+    positions: 좌표 배열 목록 (x, y[, z]), channels: 함께 평균할 추가 채널 (intensity 등)
+    """
+    columns = [np.asarray(column, dtype=np.float32) for column in (*positions, *channels)]
+    if len(columns[0]) == 0:
+        return columns
+
+    # voxel 좌표를 하나의 int64 키로 합친 뒤 np.unique로 묶음 (포인트별 파이썬 루프 없음)
+    cells = [np.floor(np.asarray(column) / voxel_size).astype(np.int64) for column in positions]
+    key = np.zeros(len(columns[0]), dtype=np.int64)
+    for cell in cells:
+        cell -= cell.min()
+        key = key * (int(cell.max()) + 1) + cell
+    _, inverse, counts = np.unique(key, return_inverse=True, return_counts=True)
+    return [
+        (np.bincount(inverse, weights=column, minlength=len(counts)) / counts).astype(np.float32)
+        for column in columns
+    ]
+
+
+def limit_points(max_points: int, *channels):
+    """포인트 수를 max_points 이하로 균등 간격 샘플링"""
+    count = len(channels[0])
+    if count <= max_points:
+        return list(channels)
+    index = np.linspace(0, count - 1, max_points).astype(np.int64)
+    return [np.asarray(channel)[index] for channel in channels]
+
+
+def apply_lod(lod, x, y, z=None, intensity=None):
+    """LOD에 맞게 다운샘플링한 (x, y, z, intensity) 반환 (없는 채널은 None 유지)"""
+    if lod is None:
+        return x, y, z, intensity
+    voxel, max_points = lod
+    positions = [x, y] + ([z] if z is not None else [])
+    extra = [intensity] if intensity is not None else []
+    columns = positions + extra
+    if voxel:
+        columns = voxel_downsample(positions, voxel, *extra)
+    if max_points:
+        columns = limit_points(max_points, *columns)
+    x, y = columns[0], columns[1]
+    z = columns[2] if len(positions) == 3 else None
+    intensity = columns[-1] if extra else None
+    return x, y, z, intensity
@@ -0,0 +1,84 @@
+import json
+import sys
+import time
+
+import numpy as np
+
+from pointcloud import apply_lod, pack_points
+
+# 포인트 클라우드 인코딩 처리량 비교: 기존 dict 목록 + JSON vs float32 바이너리 포맷
+# 이어서 LOD(voxel 다운샘플링 / 최대 포인트 수) 계산 비용과 결과 크기를 측정
+# 사용법: python pointcloud_bench.py [반복 횟수]
+
+POINT_COUNTS = [1_000, 10_000, 100_000]
+LOD_POINT_COUNTS = [100_000, 1_000_000]
+LODS = [(0.05, None), (0.2, None), (None, 5_000), (0.2, 5_000)]
+
+
+def encode_dicts(x, y, z, intensity):
+    # 기존 generate_point_cloud_data 방식: 포인트마다 dict와 float() 변환 4번
+    points = [
+        {
+            "x": float(x[i]),
+            "y": float(y[i]),
+            "z": float(z[i]),
+            "intensity": float(intensity[i])
+        }
+        for i in range(len(x))
+    ]
+    return json.dumps({"timestamp": "2024-01-01T00:00:00", "points": points}).encode('utf-8')
+
+
+def encode_packed(x, y, z, intensity):
+    return pack_points(x, y, z, intensity, timestamp=time.time())
+
+
+def measure(encode, arrays, repeat: int):
+    encode(*arrays)  # 워밍업
+    started = time.perf_counter()
+    for _ in range(repeat):
+        payload = encode(*arrays)
+    elapsed = (time.perf_counter() - started) / repeat
+    return elapsed, len(payload)
+
+
+def main(repeat: int):
+    print(f"포인트 클라우드 인코딩 벤치마크 (반복 {repeat}회 평균)")
+    print(f"{'포인트':>8} {'방식':<8}{'인코딩(ms)':>12}{'크기(KB)':>12}{'Mpts/s':>10}")
+    for count in POINT_COUNTS:
+        arrays = (
+            np.random.uniform(-5, 5, count).astype(np.float32),
+            np.random.uniform(-5, 5, count).astype(np.float32),
+            np.random.uniform(0, 3, count).astype(np.float32),
+            np.random.uniform(0, 1, count).astype(np.float32),
+        )
+        results = {}
+        for name, encode in (("dict", encode_dicts), ("packed", encode_packed)):
+            # 10만 포인트 dict 인코딩은 느리므로 반복 횟수를 줄임
+            runs = max(1, repeat // 10) if name == "dict" and count >= 100_000 else repeat
+            elapsed, size = measure(encode, arrays, runs)
+            results[name] = elapsed
+            print(f"{count:>8} {name:<8}{elapsed * 1000:>12.3f}{size / 1024:>12.1f}{count / elapsed / 1e6:>10.2f}")
+        print(f"{'':>8} 속도 향상: {results['dict'] / results['packed']:.0f}배")
+
+    print()
+    print("LOD 다운샘플링 (10m x 10m x 3m 영역)")
+    print(f"{'포인트':>9} {'voxel':>6} {'최대':>6}{'계산(ms)':>10}{'결과':>9}{'크기(KB)':>10}")
+    for count in LOD_POINT_COUNTS:
+        arrays = (
+            np.random.uniform(-5, 5, count).astype(np.float32),
+            np.random.uniform(-5, 5, count).astype(np.float32),
+            np.random.uniform(0, 3, count).astype(np.float32),
+            np.random.uniform(0, 1, count).astype(np.float32),
+        )
+        for lod in LODS:
+            runs = max(1, repeat // 10)
+            elapsed, _ = measure(lambda *channels: apply_lod(lod, *channels), arrays, runs)
+            x, y, z, intensity = apply_lod(lod, *arrays)
+            size = len(pack_points(x, y, z, intensity))
+            voxel, max_points = lod
+            print(f"{count:>9} {voxel or '-':>6} {max_points or '-':>6}{elapsed * 1000:>10.2f}{len(x):>9}{size / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
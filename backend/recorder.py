@@ -0,0 +1,132 @@
+import os
+import re
+from typing import Dict, Optional
+
+from ring_buffer import KIND_BINARY, KIND_TEXT, RingBuffer
+from structured_log import log
+
+# 로봇/스트림별 최근 기록 (사고 분석용) - 스트림마다 고정 크기 링 버퍼 파일 하나
+# 파일: {root}/{robot_id}/{stream}.ring (용량이 바뀌면 기존 기록은 버리고 새로 할당)
+# 워커 모드의 팔로워(follower=True)는 owner가 기록하는 파일을 읽기만 하므로 조회할 때마다 링 인덱스를 다시 맞춤
+
+MB = 1024 * 1024
+DEFAULT_CAPACITIES = {
+    "monitoring": 4 * MB,
+    "sensor": 64 * MB,
+    "lidar": 64 * MB,
+    "camera": 256 * MB,
+}
+DEFAULT_CAPACITY = 16 * MB
+
+# 경로에 그대로 쓰는 이름은 안전한 문자만 허용
+_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def valid_name(name: str) -> bool:
+    return bool(_NAME.match(name)) and name not in (".", "..")
+
+
+class StreamRecorder:
+    def __init__(self, root: str, capacities: Optional[Dict[str, int]] = None):
+        self.root = root
+        self.capacities = dict(DEFAULT_CAPACITIES if capacities is None else capacities)
+        self._rings: Dict[tuple, RingBuffer] = {}  # (robot_id, stream) -> 링 버퍼
+        self.follower = False
+        self.records = 0
+        self.bytes_recorded = 0
+        self.errors = 0
+
+    def capacity(self, stream: str) -> int:
+        return self.capacities.get(stream, DEFAULT_CAPACITY)
+
+    def ring(self, robot_id: str, stream: str, create: bool = True) -> Optional[RingBuffer]:
+        """(robot_id, stream)의 링 버퍼 - create=False면 이미 기록이 있는 경우에만 반환"""
+        key = (robot_id, stream)
+        ring = self._rings.get(key)
+        if ring is not None:
+            return self.sync(ring)
+        if not (valid_name(robot_id) and valid_name(stream)):
+            return None
+        path = os.path.join(self.root, robot_id, f"{stream}.ring")
+        if not create and not os.path.exists(path):
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        ring = self._rings[key] = RingBuffer(path, self.capacity(stream))
+        return ring
+
+    def sync(self, ring: RingBuffer) -> RingBuffer:
+        """팔로워면 다른 프로세스가 기록한 내용까지 인덱스를 맞춤 (읽기 전에 호출)"""
+        if self.follower:
+            ring.refresh()
+        return ring
+
+    def set_follower(self, follower: bool):
+        self.follower = follower
+        if not follower:
+            # owner를 이어받으면 이전 owner가 기록한 위치부터 이어서 기록
+            for ring in self._rings.values():
+                ring.refresh()
+
+    def record(self, robot_id: str, stream: str, timestamp: float, payload):
+        """페이로드(str은 텍스트, bytes는 바이너리 메시지)를 그대로 기록"""
+        try:
+            ring = self.ring(robot_id, stream)
+            if ring is None:
+                return
+            if isinstance(payload, str):
+                payload, kind = payload.encode("utf-8"), KIND_TEXT
+            else:
+                kind = KIND_BINARY
+            ring.append(timestamp, payload, kind)
+            self.records += 1
+            self.bytes_recorded += len(payload)
+        except Exception as e:
+            # 기록 실패가 실시간 스트림을 막지 않도록 로그만 남김
+            self.errors += 1
+            log.warning("record_error", "기록 실패", sample=5.0, key=f"{stream}/{robot_id}",
+                        stream=stream, robot_id=robot_id, error=str(e))
+
+    def recordings(self):
+        """기록이 있는 (robot_id, stream) 목록 - 디스크에 남아 있는 이전 실행의 기록 포함"""
+        if os.path.isdir(self.root):
+            for robot_id in sorted(os.listdir(self.root)):
+                directory = os.path.join(self.root, robot_id)
+                if not os.path.isdir(directory):
+                    continue
+                for name in sorted(os.listdir(directory)):
+                    if name.endswith(".ring"):
+                        self.ring(robot_id, name[:-len(".ring")], create=False)
+
+        result = []
+        for (robot_id, stream), ring in sorted(self._rings.items()):
+            start, end = ring.time_range()
+            result.append({
+                "robot_id": robot_id,
+                "stream": stream,
+                "start": start,
+                "end": end,
+                "records": len(ring),
+                "used_bytes": ring.used_bytes(),
+                "capacity": ring.capacity,
+                "overwritten": ring.overwritten,
+            })
+        return result
+
+    def flush(self):
+        for ring in self._rings.values():
+            ring.flush()
+
+    def close(self):
+        for ring in self._rings.values():
+            ring.close()
+        self._rings.clear()
+
+    def get_stats(self):
+        return {
+            "root": os.path.abspath(self.root),
+            "rings": len(self._rings),
+            "records": self.records,
+            "bytes_recorded": self.bytes_recorded,
+            "errors": self.errors,
+            "allocated_bytes": sum(ring.capacity for ring in self._rings.values()),
+        }
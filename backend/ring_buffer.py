@@ -0,0 +1,201 @@
+import bisect
+import mmap
+import os
+import struct
+from typing import List
+
+# 고정 크기 디스크 링 버퍼 (파일을 미리 할당하고 mmap으로 기록)
+# 가득 차면 가장 오래된 레코드부터 덮어쓰므로 디스크 사용량이 늘어나지 않음
+# 파일 구조: [헤더 4KB][데이터 영역 capacity 바이트]
+# 레코드: [길이 u32][종류 u8][패딩 3][timestamp f64][페이로드] (8바이트 정렬, 영역 끝을 넘으면 처음으로 돌아감)
+# 다른 프로세스가 같은 파일에 기록하는 경우(워커 모드의 팔로워) 읽기 전에 refresh()로 헤더를 다시 읽어 인덱스를 맞춤
+# 기록 측은 덮어쓰기 전에 first_pos를 헤더에 먼저 써 두고, 읽기 측은 복사한 뒤 헤더를 다시 확인해서 덮어쓴 레코드를 버림
+
+RING_MAGIC = b"RBUF"
+RING_VERSION = 1
+RING_HEADER = struct.Struct("<4sIQQQ")  # magic, version, capacity, write_pos, first_pos
+RING_HEADER_SIZE = 4096
+RECORD_HEADER = struct.Struct("<IB3xd")  # length, kind, timestamp
+RECORD_HEADER_SIZE = RECORD_HEADER.size
+PAD_LENGTH = 0xFFFFFFFF  # 영역 끝의 남은 공간을 건너뛰라는 표시
+
+KIND_TEXT = 0
+KIND_BINARY = 1
+
+
+def _align8(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class RingBuffer:
+    def __init__(self, path: str, capacity: int):
+        if capacity < 4096 or capacity % 8:
+            raise ValueError("capacity는 4096 이상인 8의 배수여야 합니다")
+        self.path = path
+        self.capacity = capacity
+
+        # 위치는 처음부터 쓴 누적 바이트 수 (물리 위치 = pos % capacity)
+        self.write_pos = 0
+        self.first_pos = 0
+        # 메모리 인덱스 - 남아 있는 레코드의 timestamp와 위치 (_head 앞은 이미 덮어쓴 레코드)
+        self._timestamps: List[float] = []
+        self._positions: List[int] = []
+        self._head = 0
+        self.first_seq = 0  # _head 위치 레코드의 순번 (커서가 덮어쓴 레코드를 감지하는 데 사용)
+        self.overwritten = 0
+
+        size = RING_HEADER_SIZE + capacity
+        exists = os.path.exists(path) and os.path.getsize(path) == size
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.truncate(size)
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(self._file.fileno(), 0, size)  # 디스크 공간을 미리 확보
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        if not (exists and self._load()):
+            self._write_header()
+
+    def _write_header(self):
+        self._mmap[:RING_HEADER.size] = RING_HEADER.pack(
+            RING_MAGIC, RING_VERSION, self.capacity, self.write_pos, self.first_pos)
+
+    def _load(self) -> bool:
+        # 기존 파일의 헤더를 읽고 레코드를 훑어서 인덱스 재구성
+        magic, version, capacity, write_pos, first_pos = RING_HEADER.unpack_from(self._mmap)
+        if magic != RING_MAGIC or version != RING_VERSION or capacity != self.capacity:
+            return False
+        self.first_pos = max(first_pos, write_pos - self.capacity)
+        self._scan(self.first_pos, write_pos)
+        return True
+
+    def _scan(self, pos: int, write_pos: int):
+        # [pos, write_pos) 구간의 레코드를 인덱스에 추가
+        self.write_pos = write_pos
+        while pos < write_pos:
+            physical = pos % self.capacity
+            if self.capacity - physical < RECORD_HEADER_SIZE:
+                pos += self.capacity - physical
+                continue
+            length, kind, timestamp = RECORD_HEADER.unpack_from(self._mmap, RING_HEADER_SIZE + physical)
+            if length == PAD_LENGTH:
+                pos += self.capacity - physical
+                continue
+            if physical + RECORD_HEADER_SIZE + length > self.capacity:
+                # 기록 도중 종료되어 깨진 레코드 - 여기까지만 사용
+                self.write_pos = pos
+                break
+            self._append_index(timestamp, pos)
+            pos += _align8(RECORD_HEADER_SIZE + length)
+
+    def refresh(self):
+        """다른 프로세스가 기록한 만큼 인덱스를 따라잡음 (순번은 이 객체 안에서 계속 이어짐)"""
+        magic, version, capacity, write_pos, first_pos = RING_HEADER.unpack_from(self._mmap)
+        if magic != RING_MAGIC or version != RING_VERSION or capacity != self.capacity or write_pos < self.write_pos:
+            # 파일을 새로 만든 경우 - 인덱스를 처음부터 다시 만듦 (기존 순번은 모두 덮어쓴 것으로 처리)
+            self.first_seq = self.next_seq
+            self._timestamps, self._positions, self._head = [], [], 0
+            self.write_pos = self.first_pos = 0
+            self._load()
+            return
+        limit = max(first_pos, write_pos - self.capacity)
+        while self._head < len(self._positions) and self._positions[self._head] < limit:
+            self._head += 1
+            self.first_seq += 1
+            self.overwritten += 1
+        self._scan(max(self.write_pos, limit), write_pos)
+        self.first_pos = self._positions[self._head] if self._head < len(self._positions) else write_pos
+
+    def _append_index(self, timestamp: float, pos: int):
+        # seek는 이진 탐색이므로 timestamp가 거꾸로 가면 직전 값으로 맞춤
+        if len(self._timestamps) > self._head:
+            timestamp = max(timestamp, self._timestamps[-1])
+        self._timestamps.append(timestamp)
+        self._positions.append(pos)
+
+    def _evict(self, end_pos: int):
+        # [end_pos - capacity, end_pos)를 덮어쓰기 전에 그 범위에 걸친 레코드를 인덱스에서 제거
+        limit = end_pos - self.capacity
+        while self._head < len(self._positions) and self._positions[self._head] < limit:
+            self._head += 1
+            self.first_seq += 1
+            self.overwritten += 1
+        self.first_pos = self._positions[self._head] if self._head < len(self._positions) else end_pos
+        if self._head > 1024 and self._head * 2 > len(self._positions):
+            del self._timestamps[:self._head]
+            del self._positions[:self._head]
+            self._head = 0
+
+    def append(self, timestamp: float, payload, kind: int = KIND_BINARY):
+        length = memoryview(payload).nbytes
+        size = _align8(RECORD_HEADER_SIZE + length)
+        if size > self.capacity:
+            raise ValueError(f"레코드가 링 버퍼보다 큽니다 ({length} bytes)")
+
+        pos = self.write_pos
+        physical = pos % self.capacity
+        if physical + size > self.capacity:
+            # 영역 끝에 들어가지 않으면 남은 공간을 건너뛰고 처음부터 기록
+            self._evict(pos + (self.capacity - physical) + size)
+            if self.capacity - physical >= RECORD_HEADER_SIZE:
+                RECORD_HEADER.pack_into(self._mmap, RING_HEADER_SIZE + physical, PAD_LENGTH, 0, 0.0)
+            pos += self.capacity - physical
+            physical = 0
+        else:
+            self._evict(pos + size)
+        # 덮어쓸 범위를 먼저 헤더에 알림 (다른 프로세스의 읽기가 덮어쓰는 중인 레코드를 버릴 수 있도록)
+        self._write_header()
+
+        offset = RING_HEADER_SIZE + physical
+        RECORD_HEADER.pack_into(self._mmap, offset, length, kind, timestamp)
+        self._mmap[offset + RECORD_HEADER_SIZE:offset + RECORD_HEADER_SIZE + length] = payload
+        self._append_index(timestamp, pos)
+        self.write_pos = pos + size
+        if self.first_pos > pos:
+            self.first_pos = pos
+        self._write_header()
+
+    # 조회 (순번 seq: 링에 기록된 순서, first_seq부터 next_seq - 1까지 읽을 수 있음)
+    @property
+    def next_seq(self) -> int:
+        return self.first_seq + len(self._positions) - self._head
+
+    def __len__(self):
+        return len(self._positions) - self._head
+
+    def time_range(self):
+        if not len(self):
+            return None, None
+        return self._timestamps[self._head], self._timestamps[-1]
+
+    def seek(self, timestamp: float) -> int:
+        """timestamp 이후 첫 레코드의 순번 (없으면 next_seq)"""
+        index = bisect.bisect_left(self._timestamps, timestamp, lo=self._head)
+        return self.first_seq + index - self._head
+
+    def timestamp_at(self, seq: int) -> float:
+        return self._timestamps[self._head + seq - self.first_seq]
+
+    def read(self, seq: int):
+        """순번의 레코드 (timestamp, kind, bytes) - 이미 덮어쓴 순번이면 IndexError"""
+        if not self.first_seq <= seq < self.next_seq:
+            raise IndexError(f"링 버퍼에 없는 레코드입니다 (seq {seq})")
+        physical = self._positions[self._head + seq - self.first_seq] % self.capacity
+        offset = RING_HEADER_SIZE + physical
+        length, kind, timestamp = RECORD_HEADER.unpack_from(self._mmap, offset)
+        start = offset + RECORD_HEADER_SIZE
+        data = self._mmap[start:start + length]
+        # 복사하는 동안 다른 프로세스가 덮어썼으면 버림
+        if RING_HEADER.unpack_from(self._mmap)[4] > self._positions[self._head + seq - self.first_seq]:
+            raise IndexError(f"링 버퍼에서 덮어쓴 레코드입니다 (seq {seq})")
+        return timestamp, kind, data
+
+    def used_bytes(self) -> int:
+        return self.write_pos - self.first_pos
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
@@ -0,0 +1,84 @@
+import json
+import sys
+import time
+
+import numpy as np
+
+from pointcloud import pack_points, points_to_dicts
+from scan_codec import ScanDecoder, ScanEncoder
+
+# LiDAR 스캔 압축 벤치마크: 스캔당 크기(압축률)와 인코딩/디코딩 비용
+# 천천히 움직이는 로봇이 방 안에서 연속으로 측정한 스캔을 시뮬레이션
+# 사용법: python scan_bench.py [스캔 수] [빔 수]
+
+ROOM_HALF = 10.0  # 20m x 20m 방
+
+
+def simulate_scans(count: int, beams: int):
+    angles = np.linspace(0, 2 * np.pi, beams, endpoint=False).astype(np.float32)
+    cos, sin = np.cos(angles), np.sin(angles)
+    scans = []
+    for i in range(count):
+        # 로봇은 틱마다 1cm 이동, 측정 잡음 1cm, 1% 빔은 측정 실패
+        px, py = -5 + 0.01 * i, 0.3 * np.sin(i / 50)
+        with np.errstate(divide='ignore'):
+            tx = np.where(cos > 0, (ROOM_HALF - px) / cos, (-ROOM_HALF - px) / cos)
+            ty = np.where(sin > 0, (ROOM_HALF - py) / sin, (-ROOM_HALF - py) / sin)
+        ranges = np.minimum(np.abs(tx), np.abs(ty)) + np.random.normal(0, 0.01, beams)
+        ranges[np.random.random(beams) < 0.01] = np.nan
+        scans.append(ranges.astype(np.float32))
+    return angles, scans
+
+
+def run(name, encode, decode, scans):
+    started = time.perf_counter()
+    messages = [encode(i, ranges) for i, ranges in enumerate(scans)]
+    encode_us = (time.perf_counter() - started) / len(scans) * 1e6
+    decode_us = None
+    if decode:
+        started = time.perf_counter()
+        for message in messages:
+            decode(message)
+        decode_us = (time.perf_counter() - started) / len(scans) * 1e6
+    size = sum(len(message) for message in messages) / len(messages)
+    return name, size, encode_us, decode_us
+
+
+def main(count: int, beams: int):
+    angles, scans = simulate_scans(count, beams)
+    cos, sin = np.cos(angles), np.sin(angles)
+    meta = {"robot_id": "robot1"}
+
+    def cartesian(ranges):
+        ranges = np.nan_to_num(ranges)
+        return ranges * cos, ranges * sin
+
+    def scan_codec(keyframe_interval, compress_level):
+        encoder, decoder = ScanEncoder(keyframe_interval, compress_level), ScanDecoder()
+        return (
+            lambda i, ranges: encoder.encode(ranges, i * 0.1, 0.0, float(angles[1]), meta),
+            decoder.decode,
+        )
+
+    results = [
+        run("json x/y", lambda i, r: json.dumps({"points": points_to_dicts(*cartesian(r))}).encode('utf-8'), None, scans),
+        run("float32 x/y", lambda i, r: pack_points(*cartesian(r), timestamp=i * 0.1, meta=meta), None, scans),
+        run("uint16 키프레임", *scan_codec(1, None), scans),
+        run("uint16 델타", *scan_codec(10, None), scans),
+        run("키프레임+zlib", *scan_codec(1, 1), scans),
+        run("델타+zlib", *scan_codec(10, 1), scans),
+    ]
+
+    baseline = results[0][1]
+    print(f"LiDAR 스캔 압축 벤치마크 (스캔 {count}개, 빔 {beams}개, 키프레임 간격 10)")
+    print(f"{'방식':<14}{'크기(B)':>10}{'JSON 대비':>10}{'인코딩(us)':>12}{'디코딩(us)':>12}")
+    for name, size, encode_us, decode_us in results:
+        decoded = f"{decode_us:>12.1f}" if decode_us is not None else f"{'-':>12}"
+        print(f"{name:<14}{size:>10.0f}{baseline / size:>9.1f}x{encode_us:>12.1f}{decoded}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 360,
+    )
@@ -0,0 +1,151 @@
+import json
+import struct
+import zlib
+from typing import Optional
+
+import numpy as np
+
+# 압축 스캔 포맷 (little-endian)
+# [헤더 32바이트]
+#   magic(2) "LS", version(1), flags(1), seq(uint32), base_seq(uint32), timestamp(float64),
+#   angle_min(float32), angle_increment(float32), count(uint16), meta_len(uint16)
+# [메타데이터 JSON (meta_len 바이트)]
+# [페이로드] uint16 * count, 하위 바이트 블록 다음 상위 바이트 블록 순서 (FLAG_ZLIB이면 zlib 압축)
+#   키프레임: 거리(mm), 0은 측정값 없음
+#   델타 프레임: 직전 프레임(base_seq) 대비 차이를 zigzag 인코딩한 값
+SCAN_MAGIC = b"LS"
+SCAN_VERSION = 1
+SCAN_HEADER = struct.Struct("<2sBBIIdffHH")
+SCAN_HEADER_SIZE = SCAN_HEADER.size
+
+FLAG_KEYFRAME = 0x01
+FLAG_ZLIB = 0x02
+
+# 연결 시 ?format=scan 으로 선택하는 압축 스캔 전송 방식
+PROTOCOL_SCAN = "scan"
+
+MAX_RANGE_MM = 65535
+
+
+def quantize_ranges(ranges) -> np.ndarray:
+    """거리(m)를 mm 단위 uint16으로 변환 (측정 실패/범위 초과는 0)"""
+    mm = np.rint(np.nan_to_num(np.asarray(ranges, dtype=np.float32), nan=0.0, posinf=0.0, neginf=0.0) * 1000)
+    mm[(mm < 0) | (mm > MAX_RANGE_MM)] = 0
+    return mm.astype(np.uint16)
+
+
+def _zigzag(delta: np.ndarray) -> np.ndarray:
+    # 부호 있는 차이를 작은 양수로 매핑 (0, -1, 1, -2, ... -> 0, 1, 2, 3, ...)
+    return ((delta << 1) ^ (delta >> 15)).astype(np.uint16)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int32)
+    return ((values >> 1) ^ -(values & 1)).astype(np.int16)
+
+
+def _shuffle(values: np.ndarray) -> bytes:
+    # 바이트 평면 분리 - 상위 바이트가 대부분 0이 되어 zlib 압축률이 좋아짐
+    return np.ascontiguousarray(values.astype('<u2').view(np.uint8).reshape(-1, 2).T).tobytes()
+
+
+def _unshuffle(payload: bytes, count: int) -> np.ndarray:
+    planes = np.frombuffer(payload, dtype=np.uint8, count=count * 2).reshape(2, count)
+    return np.ascontiguousarray(planes.T).view('<u2').reshape(count)
+
+
+def _pack(flags: int, seq: int, base_seq: int, timestamp: float, angle_min: float,
+          angle_increment: float, values: np.ndarray, meta: Optional[dict], compress_level: Optional[int]) -> bytes:
+    payload = _shuffle(values)
+    if compress_level is not None:
+        payload = zlib.compress(payload, compress_level)
+        flags |= FLAG_ZLIB
+    meta_bytes = json.dumps(meta).encode('utf-8') if meta else b""
+    header = SCAN_HEADER.pack(SCAN_MAGIC, SCAN_VERSION, flags, seq & 0xFFFFFFFF, base_seq & 0xFFFFFFFF,
+                              timestamp, angle_min, angle_increment, len(values), len(meta_bytes))
+    return b"".join((header, meta_bytes, payload))
+
+
+# 로봇 하나의 연속 스캔을 키프레임 + 델타 프레임으로 인코딩
+# 키프레임은 keyframe_interval 프레임마다 보내므로 중간에 들어온 구독자나 메시지를 잃은 구독자도 복구 가능
+class ScanEncoder:
+    def __init__(self, keyframe_interval: int = 10, compress_level: Optional[int] = 1):
+        self.keyframe_interval = keyframe_interval
+        self.compress_level = compress_level  # None이면 압축하지 않음
+        self.seq = 0
+        self._previous = None
+        self._since_keyframe = 0
+        self._last = None
+
+    def encode(self, ranges, timestamp: float, angle_min: float, angle_increment: float,
+               meta: Optional[dict] = None) -> bytes:
+        current = quantize_ranges(ranges)
+        keyframe = (
+            self._previous is None
+            or len(self._previous) != len(current)
+            or self._since_keyframe >= self.keyframe_interval
+        )
+        if keyframe:
+            flags, base_seq, values = FLAG_KEYFRAME, self.seq, current
+            self._since_keyframe = 1
+        else:
+            delta = (current.astype(np.int32) - self._previous.astype(np.int32)).astype(np.int16)
+            flags, base_seq, values = 0, self.seq - 1, _zigzag(delta)
+            self._since_keyframe += 1
+
+        message = _pack(flags, self.seq, base_seq, timestamp, angle_min, angle_increment,
+                        values, meta, self.compress_level)
+        self._previous = current
+        self._last = (self.seq, timestamp, angle_min, angle_increment, current, meta)
+        self.seq += 1
+        return message
+
+    def keyframe(self) -> Optional[bytes]:
+        """마지막 프레임을 키프레임으로 다시 인코딩 (새 구독자용, 인코더 상태는 바뀌지 않음)"""
+        if self._last is None:
+            return None
+        seq, timestamp, angle_min, angle_increment, current, meta = self._last
+        return _pack(FLAG_KEYFRAME, seq, seq, timestamp, angle_min, angle_increment,
+                     current, meta, self.compress_level)
+
+
+# 압축 스캔 디코더 (벤치마크/검증용, 프론트엔드는 scanCodec.js 사용)
+# 한 토픽에 여러 로봇 스캔이 섞일 수 있으므로 meta의 robot_id별로 직전 프레임을 보관
+class ScanDecoder:
+    def __init__(self):
+        self._streams = {}  # robot_id -> (seq, 거리 mm 배열)
+
+    def decode(self, message: bytes) -> Optional[dict]:
+        """스캔 복원, 기준 프레임이 없는 델타 프레임이면 None (다음 키프레임까지 대기)"""
+        (magic, version, flags, seq, base_seq, timestamp, angle_min,
+         angle_increment, count, meta_len) = SCAN_HEADER.unpack_from(message)
+        if magic != SCAN_MAGIC:
+            raise ValueError("잘못된 스캔 헤더입니다")
+
+        offset = SCAN_HEADER_SIZE
+        meta = json.loads(bytes(message[offset:offset + meta_len])) if meta_len else None
+        payload = bytes(message[offset + meta_len:])
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        values = _unshuffle(payload, count)
+
+        key = (meta or {}).get("robot_id")
+        previous_seq, previous = self._streams.get(key, (None, None))
+        if flags & FLAG_KEYFRAME:
+            current = values
+        elif previous is not None and previous_seq == base_seq and len(previous) == count:
+            current = (previous.astype(np.int32) + _unzigzag(values)).astype(np.uint16)
+        else:
+            return None
+
+        self._streams[key] = (seq, current)
+        ranges = current.astype(np.float32) / 1000
+        angles = angle_min + np.arange(count, dtype=np.float32) * angle_increment
+        return {
+            "seq": seq,
+            "timestamp": timestamp,
+            "meta": meta,
+            "ranges": ranges,
+            "x": ranges * np.cos(angles),
+            "y": ranges * np.sin(angles),
+        }
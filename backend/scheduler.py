@@ -0,0 +1,229 @@
+import asyncio
+import inspect
+from collections import deque
+from typing import Callable, List, Optional
+
+from structured_log import log
+
+# 공유 틱 스케줄러
+# 작업 후 고정 시간만큼 sleep 하면 실제 주기가 작업 시간만큼 늘어나므로,
+# 모든 주기 작업을 공통 기준 시각(epoch)에 맞춘 절대 마감 시각(epoch + n * interval)에 실행
+# - 같은 시각에 마감되는 스트림은 한 번의 타이머 콜백에서 함께 실행 (1Hz 모니터링과 10Hz 센서가 같은 틱에 맞춰짐)
+# - 한 주기 이상 늦으면 놓친 틱은 건너뛰고(skipped) 다음 마감 시각부터 다시 맞춤
+# - 이전 실행이 끝나기 전에 다음 틱이 오면 겹쳐 실행하지 않고 합침(coalesced)
+
+TICK_TOLERANCE = 0.001  # 이 시간 안에 마감되는 틱은 같은 배치로 실행 (초)
+STATS_WINDOW = 256      # 달성 주기/지터 계산에 쓰는 최근 틱 수
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# 주기 작업 하나의 달성 주기/지터 통계 (카메라 워커 스레드처럼 스케줄러 밖의 루프도 사용)
+class TickStats:
+    def __init__(self, name: str, interval: float, window: int = STATS_WINDOW):
+        self.name = name
+        self.interval = interval
+        self._times = deque(maxlen=window)     # 실행 시각 (단조 시계, 초)
+        self._lateness = deque(maxlen=window)  # 마감 시각 대비 지연 (ms)
+        self.ticks = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self.run_ms = 0.0
+
+    def record(self, deadline: float, now: float):
+        self._times.append(now)
+        self._lateness.append((now - deadline) * 1000)
+        self.ticks += 1
+
+    def achieved_hz(self) -> float:
+        times = list(self._times)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def get_stats(self):
+        lateness = list(self._lateness)
+        return {
+            "name": self.name,
+            "target_hz": round(1.0 / self.interval, 2),
+            "achieved_hz": round(self.achieved_hz(), 2),
+            "jitter_ms": {
+                "p50": round(_percentile(lateness, 0.5), 2),
+                "p95": round(_percentile(lateness, 0.95), 2),
+                "p99": round(_percentile(lateness, 0.99), 2),
+                "max": round(max(lateness), 2) if lateness else 0.0,
+            },
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "coalesced": self.coalesced,
+            "avg_run_ms": round(self.run_ms / self.ticks, 2) if self.ticks else 0.0,
+        }
+
+
+# 스케줄러에 등록된 주기 작업
+# callback이 있으면 틱마다 호출 (코루틴이면 태스크로 실행), 없으면 wait()/async for로 틱을 기다리는 루프에서 사용
+class Ticker:
+    def __init__(self, scheduler, name: str, interval: float, deadline: float, callback: Optional[Callable] = None):
+        self.scheduler = scheduler
+        self.interval = interval
+        self.deadline = deadline
+        self.callback = callback
+        self.stats = TickStats(name, interval)
+        self.cancelled = False
+        self._running = None   # 실행 중인 콜백 태스크
+        self._waiter = None    # 틱을 기다리는 루프의 future
+        self._pending = None   # 기다리는 루프가 없을 때 발생한 틱의 마감 시각
+        self._run_started = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.stats.name
+
+    def cancel(self):
+        self.scheduler.remove(self)
+
+    def _fire(self, now: float):
+        deadline = self.deadline
+        missed = int((now - deadline) // self.interval)
+        if missed > 0:
+            self.stats.skipped += missed
+            deadline += missed * self.interval
+        self.deadline = deadline + self.interval
+
+        if self.callback is None:
+            if self._waiter is not None and not self._waiter.done():
+                self.stats.record(deadline, now)
+                self._waiter.set_result(None)
+            elif self._pending is None:
+                self._pending = deadline
+            else:
+                self.stats.coalesced += 1
+            return
+
+        if self._running is not None and not self._running.done():
+            self.stats.coalesced += 1
+            return
+        self.stats.record(deadline, now)
+        self._run_started = now
+        try:
+            result = self.callback()
+        except Exception as e:
+            log.warning("tick_error", "틱 작업 에러", sample=5.0, key=self.name, ticker=self.name, error=str(e))
+            return
+        if inspect.isawaitable(result):
+            self._running = asyncio.ensure_future(result)
+            self._running.add_done_callback(self._on_done)
+        else:
+            self.stats.run_ms += (self.scheduler.time() - now) * 1000
+
+    def _on_done(self, task: asyncio.Task):
+        self.stats.run_ms += (self.scheduler.time() - self._run_started) * 1000
+        if task.cancelled():
+            return
+        # gather는 취소되어도 cancelled()가 아닌 CancelledError 예외로 끝날 수 있음
+        error = task.exception()
+        if error is not None and not isinstance(error, asyncio.CancelledError):
+            log.warning("tick_error", "틱 작업 에러", sample=5.0, key=self.name, ticker=self.name, error=str(error))
+
+    async def wait(self):
+        """다음 틱까지 대기 (작업이 길어져 지난 틱이 있으면 바로 반환, 여러 번 지났으면 한 번으로 합침)"""
+        if self.cancelled:
+            raise asyncio.CancelledError()
+        if self._pending is not None:
+            deadline, self._pending = self._pending, None
+            self.stats.record(deadline, self.scheduler.time())
+            return
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._waiter
+        finally:
+            self._waiter = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self.wait()
+
+
+class TickScheduler:
+    def __init__(self, tolerance: float = TICK_TOLERANCE):
+        self.tolerance = tolerance
+        self.epoch = None  # 첫 작업 등록 때 이벤트 루프 시계로 정함 (모듈 로드 시점엔 루프가 없을 수 있음)
+        self._tickers: List[Ticker] = []
+        self._timer = None
+        self._timer_at = None
+
+        # 통계
+        self.batches = 0
+        self.fired = 0
+
+    def time(self) -> float:
+        # 마감 시각은 loop.call_at에 그대로 넘기므로 이벤트 루프 시계(loop.time())로 통일
+        return asyncio.get_running_loop().time()
+
+    def every(self, name: str, interval: float, callback: Optional[Callable] = None) -> Ticker:
+        """interval초마다 실행되는 작업 등록 - 첫 틱은 기준 시각에 맞춘 다음 마감 시각"""
+        if interval <= 0:
+            raise ValueError("interval은 0보다 커야 합니다")
+        now = self.time()
+        if self.epoch is None:
+            self.epoch = now
+        periods = -(-(now - self.epoch) // interval)  # 올림
+        ticker = Ticker(self, name, interval, self.epoch + periods * interval, callback)
+        self._tickers.append(ticker)
+        self._schedule()
+        return ticker
+
+    def remove(self, ticker: Ticker):
+        ticker.cancelled = True
+        if ticker in self._tickers:
+            self._tickers.remove(ticker)
+        if ticker._waiter is not None and not ticker._waiter.done():
+            ticker._waiter.cancel()
+        if ticker._running is not None:
+            ticker._running.cancel()
+        self._schedule()
+
+    def _schedule(self):
+        # 가장 빠른 마감 시각에 타이머 하나만 걸어 둠
+        if not self._tickers:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = self._timer_at = None
+            return
+        deadline = min(ticker.deadline for ticker in self._tickers)
+        if self._timer is not None and self._timer_at == deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_at = deadline
+        self._timer = asyncio.get_running_loop().call_at(deadline, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = self._timer_at = None
+        now = self.time()
+        due = [ticker for ticker in self._tickers if ticker.deadline <= now + self.tolerance]
+        if due:
+            self.batches += 1
+            self.fired += len(due)
+            for ticker in due:
+                ticker._fire(max(now, ticker.deadline))
+        self._schedule()
+
+    def ticker_stats(self) -> List[TickStats]:
+        """등록된 주기 작업별 통계 객체 (메트릭 수집용)"""
+        return [ticker.stats for ticker in list(self._tickers)]
+
+    def get_stats(self):
+        return {
+            "tickers": len(self._tickers),
+            "batches": self.batches,
+            "avg_batch_size": round(self.fired / self.batches, 2) if self.batches else 0.0,
+            "streams": [ticker.stats.get_stats() for ticker in self._tickers],
+        }
@@ -0,0 +1,81 @@
+import asyncio
+import random
+import sys
+import time
+
+from scheduler import TickScheduler, TickStats
+
+# 스트림 주기 비교: 작업 후 고정 sleep 하는 기존 루프 vs 공유 틱 스케줄러(scheduler.py)
+# 로봇 수만큼 모니터링(1Hz)/센서(10Hz)/LiDAR(10Hz) 스트림을 돌리고, 틱마다 인코딩/전송 시간을 흉내 내는 작업을 수행
+# 사용법: python scheduler_bench.py [측정 시간(초)] [로봇 수]
+
+STREAMS = {"monitoring": 1.0, "sensor": 0.1, "lidar": 0.1}
+WORK_MS = {"monitoring": 1.0, "sensor": 2.0, "lidar": 6.0}  # 평균 작업 시간 (절반은 블로킹, 절반은 대기)
+
+
+async def work(stream: str):
+    duration = random.uniform(0.5, 1.5) * WORK_MS[stream] / 1000
+    end = time.perf_counter() + duration / 2
+    while time.perf_counter() < end:
+        pass
+    await asyncio.sleep(duration / 2)
+
+
+async def sleep_loop(stream: str, stats: TickStats, measure: bool):
+    deadline = time.monotonic()
+    while True:
+        now = time.monotonic()
+        if measure:
+            stats.record(deadline, now)
+        await work(stream)
+        await asyncio.sleep(stats.interval)
+        # 지터는 원래 의도한 주기(이전 실행 + interval) 대비로 측정
+        deadline = now + stats.interval
+
+
+async def run_sleep(seconds: float, robots: int):
+    stats = {stream: TickStats(stream, interval) for stream, interval in STREAMS.items()}
+    # 로봇마다 스트림별 루프 하나 (통계는 첫 번째 로봇의 루프만 기록)
+    tasks = [asyncio.create_task(sleep_loop(stream, stats[stream], robot == 0))
+             for stream in STREAMS for robot in range(robots)]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    return [stat.get_stats() for stat in stats.values()], None
+
+
+async def run_scheduler(seconds: float, robots: int):
+    scheduler = TickScheduler()
+
+    def tick(stream):
+        # 텔레메트리 허브처럼 스트림마다 주기 작업 하나가 모든 로봇을 같은 틱에 처리
+        return asyncio.gather(*(work(stream) for _ in range(robots)))
+
+    tickers = [scheduler.every(stream, interval, lambda stream=stream: tick(stream))
+               for stream, interval in STREAMS.items()]
+    await asyncio.sleep(seconds)
+    stats = scheduler.get_stats()
+    for ticker in tickers:
+        ticker.cancel()
+    return stats["streams"], stats
+
+
+async def bench(seconds: float, robots: int):
+    print(f"스트림 주기 벤치마크 (로봇 {robots}대, 스트림 {len(STREAMS)}종, {seconds:.0f}초)")
+    print(f"{'방식':<10}{'스트림':<12}{'목표Hz':>8}{'달성Hz':>8}{'지터p50':>9}{'p95':>8}{'p99':>8}{'건너뜀':>8}{'합침':>6}")
+    for name, run in (("sleep", run_sleep), ("scheduler", run_scheduler)):
+        streams, stats = await run(seconds, robots)
+        for stream in streams:
+            jitter = stream["jitter_ms"]
+            print(f"{name:<10}{stream['name']:<12}{stream['target_hz']:>8.1f}{stream['achieved_hz']:>8.2f}"
+                  f"{jitter['p50']:>9.2f}{jitter['p95']:>8.2f}{jitter['p99']:>8.2f}"
+                  f"{stream['skipped']:>8}{stream['coalesced']:>6}")
+        if stats:
+            print(f"(타이머 콜백 {stats['batches']}회, 콜백당 스트림 {stats['avg_batch_size']}개)")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    ))
@@ -0,0 +1,226 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from metrics import counter
+
+Cell = Tuple[int, int]
+
+UPDATES = counter("spatial_updates_total", "공간 인덱스에 반영된 로봇 위치 갱신 수", ["result"])
+GEOFENCE_EVENTS = counter("geofence_events_total", "구역 진입/이탈 이벤트 수", ["event"])
+
+
+def point_in_polygon(x: float, y: float, polygon: Sequence[Tuple[float, float]]) -> bool:
+    # 반직선 교차 횟수 (홀수면 내부)
+    inside = False
+    count = len(polygon)
+    for i in range(count):
+        x1, y1 = polygon[i]
+        x2, y2 = polygon[i - 1]
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+    return inside
+
+
+# 다각형 구역 (지오펜스) - alert=True면 진입/이탈을 경고로 표시
+class Zone:
+    def __init__(self, zone_id: str, name: str, polygon: Sequence[Sequence[float]], alert: bool = False):
+        if len(polygon) < 3 or any(len(point) != 2 for point in polygon):
+            raise ValueError("구역은 (x, y) 점 3개 이상으로 된 다각형이어야 합니다")
+        self.id = zone_id
+        self.name = name
+        self.polygon = [(float(x), float(y)) for x, y in polygon]
+        self.alert = alert
+        xs = [x for x, _ in self.polygon]
+        ys = [y for _, y in self.polygon]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def contains(self, x: float, y: float) -> bool:
+        min_x, min_y, max_x, max_y = self.bounds
+        return min_x <= x <= max_x and min_y <= y <= max_y and point_in_polygon(x, y, self.polygon)
+
+    def to_json(self):
+        return {"id": self.id, "name": self.name, "polygon": [list(point) for point in self.polygon], "alert": self.alert}
+
+
+# 로봇 최신 위치의 균일 격자 인덱스
+# 위치 갱신은 셀 이동과 그 셀에 걸친 구역 검사만 하므로 로봇 수와 관계없이 O(1)
+# 구역별 소속 로봇을 갱신 때마다 유지해서 구역 조회는 전체를 훑지 않음
+class SpatialIndex:
+    def __init__(self, cell_size: float = 5.0):
+        if cell_size <= 0:
+            raise ValueError("cell_size는 0보다 커야 합니다")
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, Set[str]] = {}
+        self.poses: Dict[str, Tuple[float, float]] = {}
+        self.robot_cells: Dict[str, Cell] = {}
+        self.zones: Dict[str, Zone] = {}
+        self.zone_cells: Dict[Cell, List[Zone]] = {}  # 구역 바운딩 박스가 걸친 셀 -> 구역 목록
+        self.memberships: Dict[str, Set[str]] = {}    # robot_id -> 들어가 있는 구역 id
+        self.members: Dict[str, Set[str]] = {}        # zone_id -> 구역 안의 robot_id
+        # 로봇이 있었던 셀 범위 (줄어들지 않음) - 최근접 탐색 종료 조건
+        self.extent: Optional[List[int]] = None
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _cell_range(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        x0, y0 = self._cell(min_x, min_y)
+        x1, y1 = self._cell(max_x, max_y)
+        return ((cx, cy) for cy in range(y0, y1 + 1) for cx in range(x0, x1 + 1))
+
+    def update(self, robot_id: str, x: float, y: float) -> List[dict]:
+        """로봇 위치 갱신 - 구역 경계를 넘었으면 진입/이탈 이벤트 목록을 반환"""
+        cell = self._cell(x, y)
+        previous = self.robot_cells.get(robot_id)
+        if previous != cell:
+            if previous is not None:
+                self._leave_cell(robot_id, previous)
+            self.cells.setdefault(cell, set()).add(robot_id)
+            self.robot_cells[robot_id] = cell
+            self._grow_extent(cell)
+        self.poses[robot_id] = (x, y)
+        UPDATES.labels("moved" if previous != cell else "same_cell").inc()
+
+        inside = {zone.id for zone in self.zone_cells.get(cell, ()) if zone.contains(x, y)}
+        before = self.memberships.get(robot_id, set())
+        if inside == before:
+            return []
+        self.memberships[robot_id] = inside
+        events = []
+        for zone_id in before - inside:
+            self.members[zone_id].discard(robot_id)
+            events.append(self._event("exit", robot_id, zone_id, x, y))
+        for zone_id in inside - before:
+            self.members[zone_id].add(robot_id)
+            events.append(self._event("enter", robot_id, zone_id, x, y))
+        return events
+
+    def remove(self, robot_id: str):
+        cell = self.robot_cells.pop(robot_id, None)
+        if cell is None:
+            return
+        self._leave_cell(robot_id, cell)
+        del self.poses[robot_id]
+        for zone_id in self.memberships.pop(robot_id, ()):
+            self.members[zone_id].discard(robot_id)
+
+    def _leave_cell(self, robot_id: str, cell: Cell):
+        robots = self.cells[cell]
+        robots.discard(robot_id)
+        if not robots:
+            del self.cells[cell]
+
+    def _grow_extent(self, cell: Cell):
+        if self.extent is None:
+            self.extent = [cell[0], cell[1], cell[0], cell[1]]
+            return
+        self.extent[0] = min(self.extent[0], cell[0])
+        self.extent[1] = min(self.extent[1], cell[1])
+        self.extent[2] = max(self.extent[2], cell[0])
+        self.extent[3] = max(self.extent[3], cell[1])
+
+    def _event(self, kind: str, robot_id: str, zone_id: str, x: float, y: float) -> dict:
+        GEOFENCE_EVENTS.labels(kind).inc()
+        zone = self.zones[zone_id]
+        return {"event": kind, "robot_id": robot_id, "zone_id": zone_id, "zone": zone.name,
+                "alert": zone.alert, "x": x, "y": y}
+
+    # 구역 추가/교체 - 이미 안에 있는 로봇은 이벤트 없이 소속만 설정
+    def set_zone(self, zone: Zone):
+        self.remove_zone(zone.id)
+        self.zones[zone.id] = zone
+        for cell in self._cell_range(*zone.bounds):
+            self.zone_cells.setdefault(cell, []).append(zone)
+        self.members[zone.id] = set(self.in_polygon(zone))
+        for robot_id in self.members[zone.id]:
+            self.memberships.setdefault(robot_id, set()).add(zone.id)
+
+    def remove_zone(self, zone_id: str) -> bool:
+        zone = self.zones.pop(zone_id, None)
+        if zone is None:
+            return False
+        for cell in self._cell_range(*zone.bounds):
+            zones = self.zone_cells.get(cell, [])
+            if zone in zones:
+                zones.remove(zone)
+            if not zones:
+                self.zone_cells.pop(cell, None)
+        for robot_id in self.members.pop(zone_id, ()):
+            self.memberships[robot_id].discard(zone_id)
+        return True
+
+    def zone_members(self, zone_id: str) -> List[str]:
+        return sorted(self.members.get(zone_id, ()))
+
+    def in_rect(self, min_x: float, min_y: float, max_x: float, max_y: float) -> List[str]:
+        results = []
+        for cell in self._cells_in(min_x, min_y, max_x, max_y):
+            for robot_id in self.cells[cell]:
+                x, y = self.poses[robot_id]
+                if min_x <= x <= max_x and min_y <= y <= max_y:
+                    results.append(robot_id)
+        return results
+
+    def in_polygon(self, zone: Zone) -> List[str]:
+        return [robot_id for robot_id in self.in_rect(*zone.bounds) if zone.contains(*self.poses[robot_id])]
+
+    def _cells_in(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        # 범위가 넓으면 범위 안의 셀을 모두 만들기보다 로봇이 있는 셀만 확인
+        x0, y0 = self._cell(min_x, min_y)
+        x1, y1 = self._cell(max_x, max_y)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.cells):
+            return [cell for cell in self.cells if x0 <= cell[0] <= x1 and y0 <= cell[1] <= y1]
+        return [cell for cell in self._cell_range(min_x, min_y, max_x, max_y) if cell in self.cells]
+
+    def nearest(self, x: float, y: float, k: int = 1, max_distance: Optional[float] = None) -> List[Tuple[str, float]]:
+        """가까운 순서로 최대 k개의 (robot_id, 거리)"""
+        if k <= 0 or not self.poses:
+            return []
+        cx, cy = self._cell(x, y)
+        min_x, min_y, max_x, max_y = self.extent
+        last_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+        best: List[Tuple[float, str]] = []  # (-거리², robot_id) 최대 힙
+        limit = math.inf if max_distance is None else max_distance * max_distance
+        ring = 0
+        while ring <= last_ring:
+            if 8 * ring > len(self.cells):
+                # 남은 고리가 로봇이 있는 셀 수보다 크면 남은 셀을 직접 훑음
+                cells = [cell for cell in self.cells if max(abs(cell[0] - cx), abs(cell[1] - cy)) >= ring]
+                ring = last_ring
+            else:
+                cells = self._ring(cx, cy, ring)
+            for cell in cells:
+                for robot_id in self.cells.get(cell, ()):
+                    px, py = self.poses[robot_id]
+                    distance = (px - x) ** 2 + (py - y) ** 2
+                    if distance > limit:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, robot_id))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, robot_id))
+            # 다음 고리의 셀은 질의 지점에서 최소 ring x cell_size 떨어져 있음
+            reach = (ring * self.cell_size) ** 2
+            if (len(best) == k and -best[0][0] <= reach) or reach > limit:
+                break
+            ring += 1
+        return [(robot_id, math.sqrt(-distance)) for distance, robot_id in sorted(best, reverse=True)]
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> List[Cell]:
+        if ring == 0:
+            return [(cx, cy)]
+        cells = [(cx + dx, cy + dy) for dx in range(-ring, ring + 1) for dy in (-ring, ring)]
+        cells.extend((cx + dx, cy + dy) for dx in (-ring, ring) for dy in range(-ring + 1, ring))
+        return cells
+
+    def get_stats(self):
+        occupied = len(self.cells)
+        return {
+            "robots": len(self.poses),
+            "cell_size": self.cell_size,
+            "occupied_cells": occupied,
+            "max_cell_robots": max((len(robots) for robots in self.cells.values()), default=0),
+            "zones": len(self.zones),
+        }
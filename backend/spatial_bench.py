@@ -0,0 +1,87 @@
+import heapq
+import math
+import random
+import sys
+import time
+
+from spatial import SpatialIndex, Zone
+
+# 위치 질의 비교: 매번 모든 로봇을 훑는 방식 vs 격자 공간 인덱스 (spatial.py)
+# 가상의 시설(500m x 500m)에서 로봇들이 무작위로 이동할 때 위치 갱신(구역 진입/이탈 판정 포함) 처리량과
+# 구역 소속/최근접 k대/사각형 영역 질의 시간을 전체 탐색과 비교하고 결과가 같은지 확인
+# 사용법: python spatial_bench.py [로봇 수] [갱신 수] [구역 수]
+
+SIZE = 500.0
+STEP = 1.0  # 갱신 한 번의 최대 이동 거리 (m) - 10Hz 위치 갱신 기준 보행 속도 정도
+
+
+def make_zone(index: int, rng: random.Random) -> Zone:
+    # 사각형 또는 삼각형 구역
+    x, y = rng.uniform(0, SIZE - 60), rng.uniform(0, SIZE - 60)
+    w, h = rng.uniform(10, 60), rng.uniform(10, 60)
+    if index % 2:
+        polygon = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+    else:
+        polygon = [(x, y), (x + w, y), (x + w / 2, y + h)]
+    return Zone(f"zone_{index}", f"구역 {index}", polygon)
+
+
+def timed(function, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    zone_count = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    rng = random.Random(0)
+    index = SpatialIndex(5.0)
+    zones = [make_zone(i, rng) for i in range(zone_count)]
+    for zone in zones:
+        index.set_zone(zone)
+    robot_ids = [f"ROBOT_{i:05d}" for i in range(count)]
+    poses = {robot_id: (rng.uniform(0, SIZE), rng.uniform(0, SIZE)) for robot_id in robot_ids}
+    for robot_id, (x, y) in poses.items():
+        index.update(robot_id, x, y)
+
+    moves = []
+    for robot_id in rng.choices(robot_ids, k=updates):
+        x, y = poses[robot_id]
+        x = min(SIZE, max(0.0, x + rng.uniform(-STEP, STEP)))
+        y = min(SIZE, max(0.0, y + rng.uniform(-STEP, STEP)))
+        poses[robot_id] = (x, y)
+        moves.append((robot_id, x, y))
+
+    started = time.perf_counter()
+    events = 0
+    for robot_id, x, y in moves:
+        events += len(index.update(robot_id, x, y))
+    update_us = (time.perf_counter() - started) / updates * 1e6
+
+    # 전체 탐색 결과와 비교
+    zone = zones[0]
+    scan_zone = lambda: sorted(r for r, (x, y) in poses.items() if zone.contains(x, y))
+    assert index.zone_members(zone.id) == scan_zone()
+    query = (SIZE / 2, SIZE / 2)
+    scan_nearest = lambda: heapq.nsmallest(5, ((math.hypot(x - query[0], y - query[1]), r) for r, (x, y) in poses.items()))
+    assert [r for r, _ in index.nearest(*query, k=5)] == [r for _, r in scan_nearest()]
+    rect = (100.0, 100.0, 150.0, 150.0)
+    scan_rect = lambda: [r for r, (x, y) in poses.items() if rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]]
+    assert sorted(index.in_rect(*rect)) == sorted(scan_rect())
+
+    print(f"로봇 {count:,}대, 구역 {zone_count}개, 위치 갱신 {updates:,}번 (셀 {index.cell_size}m)")
+    print(f"위치 갱신: {update_us:.2f}us/회 (초당 {1e6 / update_us:,.0f}회), 진입/이탈 이벤트 {events:,}개")
+    print(f"{'질의':<16} {'전체 탐색':>10} {'공간 인덱스':>11}")
+    for name, scan, indexed in (
+        ("구역 소속", scan_zone, lambda: index.zone_members(zone.id)),
+        ("최근접 5대", scan_nearest, lambda: index.nearest(*query, k=5)),
+        ("50m 사각형", scan_rect, lambda: index.in_rect(*rect)),
+    ):
+        print(f"{name:<16} {timed(scan, 20):>8.3f}ms {timed(indexed, 200):>9.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from metrics import counter
+
+# 레벨/샘플링이 적용된 구조화 로그 - 한 줄 logfmt 형식: 시각 level=.. event=.. msg=".." key=value ...
+# LOG_LEVEL 환경 변수(debug/info/warning/error, 기본 info)보다 낮은 레벨은 문자열을 만들지 않고 바로 반환
+# 핫 패스에서 반복되는 로그는 sample 간격(초)마다 (event, key)별로 한 번만 출력하고, 그 사이 생략한 건수를 suppressed로 기록
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+LOG_MESSAGES = counter("log_messages_total", "레벨별 출력한 로그 수", ["level"])
+LOG_SUPPRESSED = counter("log_messages_suppressed_total", "샘플링으로 생략한 로그 수", ["event"])
+
+
+def _format(value) -> str:
+    text = value if isinstance(value, str) else str(value)
+    if text and not any(char in text for char in ' "=\n'):
+        return text
+    return json.dumps(text, ensure_ascii=False)
+
+
+class StructuredLogger:
+    def __init__(self, level: Optional[str] = None):
+        self.level = LEVELS.get((level or os.getenv("LOG_LEVEL", "info")).lower(), LEVELS["info"])
+        self._last: Dict[Tuple[str, str], float] = {}       # (event, key) -> 마지막 출력 시각
+        self._suppressed: Dict[Tuple[str, str], int] = {}   # (event, key) -> 생략한 건수
+
+    def enabled(self, level: str) -> bool:
+        return LEVELS[level] >= self.level
+
+    def log(self, level: str, event: str, msg: str = "", sample: Optional[float] = None,
+            key: str = "", **fields):
+        if LEVELS[level] < self.level:
+            return
+        if sample:
+            sample_key = (event, key)
+            now = time.monotonic()
+            last = self._last.get(sample_key)
+            if last is not None and now - last < sample:
+                self._suppressed[sample_key] = self._suppressed.get(sample_key, 0) + 1
+                LOG_SUPPRESSED.labels(event).inc()
+                return
+            self._last[sample_key] = now
+            suppressed = self._suppressed.pop(sample_key, 0)
+            if suppressed:
+                fields["suppressed"] = suppressed
+        LOG_MESSAGES.labels(level).inc()
+        parts = [datetime.now().isoformat(timespec="milliseconds"), f"level={level}", f"event={event}"]
+        if msg:
+            parts.append(f"msg={_format(msg)}")
+        parts.extend(f"{name}={_format(value)}" for name, value in fields.items())
+        print(" ".join(parts))
+
+    def debug(self, event: str, msg: str = "", **fields):
+        self.log("debug", event, msg, **fields)
+
+    def info(self, event: str, msg: str = "", **fields):
+        self.log("info", event, msg, **fields)
+
+    def warning(self, event: str, msg: str = "", **fields):
+        self.log("warning", event, msg, **fields)
+
+    def error(self, event: str, msg: str = "", **fields):
+        self.log("error", event, msg, **fields)
+
+
+log = StructuredLogger()
@@ -0,0 +1,162 @@
+import abc
+import asyncio
+import json
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from camera_protocol import PROTOCOL_JSON
+from metrics import counter, histogram
+from scheduler import Ticker, TickScheduler
+from structured_log import log
+
+# 스트림별 기본 생성 주기 (초)
+DEFAULT_INTERVALS = {
+    "monitoring": 1.0,  # 1Hz
+    "sensor": 0.1,      # 10Hz
+    "lidar": 0.1,       # 10Hz
+}
+
+
+SNAPSHOTS = counter("telemetry_snapshots_total", "생성된 텔레메트리 스냅샷 수", ["stream"])
+ENCODE_SECONDS = histogram("telemetry_encode_seconds", "스냅샷 하나를 구독자 전송 방식별로 인코딩한 시간", ["stream"])
+ERRORS = counter("telemetry_errors_total", "텔레메트리 생성/리스너 에러 수", ["stream", "stage"])
+
+
+# 텔레메트리 소스 인터페이스 - 시뮬레이터를 실제 로봇 수신으로 바꿀 때 이 클래스를 구현
+# 로봇에서 데이터를 밀어 넣는 방식이라면 소스 대신 TelemetryHub.ingest()를 직접 호출해도 됨
+class TelemetrySource(abc.ABC):
+    @abc.abstractmethod
+    async def read(self, robot_id: str, stream: str) -> Optional[dict]:
+        """robot_id의 stream 스냅샷 하나 (없으면 None)"""
+
+
+# 시뮬레이션 데이터 소스 (스트림 이름 -> 생성 함수)
+class SimulatedTelemetrySource(TelemetrySource):
+    def __init__(self, generators: Dict[str, Callable[[str], dict]]):
+        self.generators = generators
+
+    async def read(self, robot_id: str, stream: str) -> Optional[dict]:
+        return self.generators[stream](robot_id)
+
+
+# 스트림마다 공유 틱 스케줄러의 주기 작업 하나가 구독 중인 모든 로봇의 스냅샷을 같은 틱에 만들고,
+# 최신 상태를 캐시한 뒤 ConnectionManager를 통해 모든 구독자에게 발행
+class TelemetryHub:
+    def __init__(self, manager, source: TelemetrySource, intervals: Optional[Dict[str, float]] = None,
+                 encoders: Optional[Dict[str, Callable]] = None, scheduler: Optional[TickScheduler] = None):
+        self.manager = manager
+        self.source = source
+        self.intervals = intervals or dict(DEFAULT_INTERVALS)
+        # 스트림별 인코더: encoder(snapshot, protocols, initial) -> {전송 방식: 페이로드}
+        # initial=True는 새 연결에 보내는 첫 메시지 (델타 인코딩 스트림은 키프레임을 보냄)
+        self.encoders = encoders or {}
+        self.latest: Dict[Tuple[str, str], dict] = {}       # (stream, robot_id) -> 최신 스냅샷
+        # (stream, robot_id) -> 최신 스냅샷을 인코딩한 {전송 방식: 페이로드} - 리스너가 같은 스냅샷을 다시 인코딩하지 않도록
+        self.encoded: Dict[Tuple[str, str], Dict[str, object]] = {}
+        self.subscribers: Dict[Tuple[str, str], int] = {}   # (stream, robot_id) -> 구독자 수
+        self.scheduler = scheduler or TickScheduler()
+        self.tickers: Dict[str, Ticker] = {}  # stream -> 스케줄러 주기 작업 (구독 중인 로봇이 있는 스트림만)
+        self.listeners = []  # listener(stream, robot_id, snapshot)
+        # False면 구독 수만 기록하고 생성하지 않음 (워커 모드의 팔로워 - 스냅샷은 버스로 받아서 ingest)
+        self.producing = True
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def get_latest(self, stream: str, robot_id: str) -> Optional[dict]:
+        return self.latest.get((stream, robot_id))
+
+    def subscribe(self, stream: str, robot_id: str):
+        key = (stream, robot_id)
+        self.subscribers[key] = self.subscribers.get(key, 0) + 1
+        if not self.producing:
+            return
+        if self.subscribers[key] == 1 and key not in self.latest:
+            # 처음 구독하는 로봇은 다음 틱을 기다리지 않고 바로 한 번 생성
+            asyncio.create_task(self._read(stream, robot_id))
+        self._start(stream)
+
+    def _start(self, stream: str):
+        if stream not in self.tickers:
+            self.tickers[stream] = self.scheduler.every(
+                f"telemetry/{stream}", self.intervals.get(stream, 1.0), lambda: self._tick(stream))
+
+    def set_producing(self, producing: bool):
+        self.producing = producing
+        if not producing:
+            for ticker in self.tickers.values():
+                ticker.cancel()
+            self.tickers.clear()
+            return
+        # 구독 중인 스트림의 생성을 시작 (owner를 이어받은 경우)
+        for stream, _ in list(self.subscribers):
+            self._start(stream)
+
+    def unsubscribe(self, stream: str, robot_id: str):
+        key = (stream, robot_id)
+        if key not in self.subscribers:
+            return
+        self.subscribers[key] -= 1
+        if self.subscribers[key] > 0:
+            return
+        # 마지막 구독자가 나가면 해당 로봇은 생성 중지, 스트림에 남은 로봇이 없으면 주기 작업 해제 (최신 스냅샷 캐시는 유지)
+        del self.subscribers[key]
+        if not self.robots(stream):
+            ticker = self.tickers.pop(stream, None)
+            if ticker:
+                ticker.cancel()
+
+    def robots(self, stream: str):
+        return [robot_id for (name, robot_id) in self.subscribers if name == stream]
+
+    def encode(self, stream: str, snapshot: dict, protocols, initial: bool = False) -> Dict[str, object]:
+        encoder = self.encoders.get(stream)
+        if encoder:
+            return encoder(snapshot, protocols, initial)
+        return {PROTOCOL_JSON: json.dumps(snapshot)}
+
+    def encoded_payload(self, stream: str, robot_id: str, protocol: str):
+        """최신 스냅샷의 protocol 페이로드 - ingest에서 이미 인코딩했으면 그대로, 아니면 한 번 인코딩해서 캐시 (리스너용)"""
+        key = (stream, robot_id)
+        payloads = self.encoded.setdefault(key, {})
+        if protocol not in payloads:
+            payloads.update(self.encode(stream, self.latest[key], {protocol}))
+        return payloads[protocol]
+
+    def ingest(self, stream: str, robot_id: str, snapshot: dict):
+        """새 스냅샷을 캐시에 저장하고 연결된 클라이언트와 리스너에 발행"""
+        self.latest[(stream, robot_id)] = snapshot
+        SNAPSHOTS.labels(stream).inc()
+        payloads = self.encoded[(stream, robot_id)] = {}
+        protocols = self.manager.get_protocols(stream, robot_id)
+        if protocols:
+            # 연결된 클라이언트가 쓰는 전송 방식만 한 번씩 인코딩
+            started = time.perf_counter()
+            payloads.update(self.encode(stream, snapshot, protocols))
+            ENCODE_SECONDS.labels(stream).observe(time.perf_counter() - started)
+            self.manager.send_payloads(payloads, stream, robot_id)
+        for listener in list(self.listeners):
+            try:
+                listener(stream, robot_id, snapshot)
+            except Exception as e:
+                ERRORS.labels(stream, "listener").inc()
+                log.warning("telemetry_listener_error", "텔레메트리 리스너 에러", sample=5.0,
+                            key=f"{stream}/{robot_id}", stream=stream, robot_id=robot_id, error=str(e))
+
+    async def _read(self, stream: str, robot_id: str):
+        try:
+            snapshot = await self.source.read(robot_id, stream)
+            if snapshot is not None:
+                self.ingest(stream, robot_id, snapshot)
+        except Exception as e:
+            ERRORS.labels(stream, "read").inc()
+            log.warning("telemetry_read_error", "텔레메트리 생성 에러", sample=5.0,
+                        key=f"{stream}/{robot_id}", stream=stream, robot_id=robot_id, error=str(e))
+
+    async def _tick(self, stream: str):
+        # 같은 틱에 스트림의 모든 로봇을 함께 읽음 (이전 틱이 끝나지 않았으면 스케줄러가 이번 틱을 합침)
+        await asyncio.gather(*(self._read(stream, robot_id) for robot_id in self.robots(stream)))
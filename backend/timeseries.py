@@ -0,0 +1,279 @@
+import asyncio
+import json
+import struct
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from models import SensorChunk
+
+# 센서 시계열 저장소
+# SensorData처럼 샘플마다 ORM 행을 만들지 않고, 로봇별 일정 시간 구간(기본 60초)의 샘플을
+# 열(필드) 단위 NumPy 배열로 모아 압축한 청크 하나로 저장 (sensor_chunks 테이블, (robot_id, start_time) 인덱스)
+# 조회는 필요한 필드의 열만 압축 해제해서 배열로 반환 (JSON 파싱, ORM 객체 생성 없음)
+# append는 메모리에 모으기만 하고, 닫힌 청크의 배열 변환/압축은 flush에서 스레드로 처리 (스트림 틱을 막지 않음)
+
+CHUNK_MAGIC = b"TSC1"
+CHUNK_HEADER = struct.Struct("<4sI")  # magic, manifest 길이
+
+# 필드 이름 -> dtype (lidar는 샘플마다 (점 수, 2) 배열)
+SCALAR_FIELDS = {
+    "timestamp": np.float64,
+    "acceleration_x": np.float32,
+    "acceleration_y": np.float32,
+    "acceleration_z": np.float32,
+    "gyro_x": np.float32,
+    "gyro_y": np.float32,
+    "gyro_z": np.float32,
+    "position_x": np.float32,
+    "position_y": np.float32,
+    "orientation": np.float32,
+}
+LIDAR_FIELD = "lidar"
+FIELDS = tuple(SCALAR_FIELDS) + (LIDAR_FIELD,)
+
+
+def _to_epoch(timestamp) -> float:
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp).timestamp()
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+def sample_values(sample: dict):
+    """generate_sensor_data 형식의 샘플을 (스칼라 값 튜플, lidar (N, 2) 배열)로 변환"""
+    imu = sample["imu_data"]
+    position = sample["position"]
+    scalars = (
+        _to_epoch(sample["timestamp"]),
+        imu["acceleration"]["x"], imu["acceleration"]["y"], imu["acceleration"]["z"],
+        imu["gyro"]["x"], imu["gyro"]["y"], imu["gyro"]["z"],
+        position["x"], position["y"], position["orientation"],
+    )
+    points = sample.get("lidar_data", {}).get("points", [])
+    lidar = np.array([(point["x"], point["y"]) for point in points], dtype=np.float32).reshape(-1, 2)
+    return scalars, lidar
+
+
+def _shuffle(array: np.ndarray) -> bytes:
+    # 같은 자리의 바이트끼리 모아서 zlib 압축률을 높임 (지수/상위 바이트는 샘플 간에 거의 같음)
+    itemsize = array.dtype.itemsize
+    return np.frombuffer(array.tobytes(), dtype=np.uint8).reshape(-1, itemsize).T.tobytes()
+
+
+def _unshuffle(payload: bytes, dtype, shape) -> np.ndarray:
+    itemsize = np.dtype(dtype).itemsize
+    planes = np.frombuffer(payload, dtype=np.uint8).reshape(itemsize, -1)
+    return np.ascontiguousarray(planes.T).view(dtype).reshape(shape)
+
+
+def pack_chunk(columns: Dict[str, np.ndarray], compress_level: int = 1) -> bytes:
+    """{필드: 배열} -> 청크 바이트 (manifest JSON + 필드별 압축 블록)"""
+    manifest, blocks, offset = [], [], 0
+    for name, array in columns.items():
+        block = zlib.compress(_shuffle(array), compress_level)
+        manifest.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape),
+                         "offset": offset, "size": len(block)})
+        blocks.append(block)
+        offset += len(block)
+    header = json.dumps(manifest, separators=(",", ":")).encode()
+    return CHUNK_HEADER.pack(CHUNK_MAGIC, len(header)) + header + b"".join(blocks)
+
+
+def unpack_chunk(data: bytes, fields: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """청크 바이트 -> {필드: 배열} (fields를 주면 해당 필드만 압축 해제)"""
+    magic, header_size = CHUNK_HEADER.unpack_from(data)
+    if magic != CHUNK_MAGIC:
+        raise ValueError("시계열 청크 형식이 아닙니다")
+    body = CHUNK_HEADER.size + header_size
+    wanted = None if fields is None else set(fields)
+    columns = {}
+    for entry in json.loads(data[CHUNK_HEADER.size:body]):
+        if wanted is not None and entry["name"] not in wanted:
+            continue
+        start = body + entry["offset"]
+        payload = zlib.decompress(data[start:start + entry["size"]])
+        columns[entry["name"]] = _unshuffle(payload, entry["dtype"], tuple(entry["shape"]))
+    return columns
+
+
+def empty_columns(fields: Iterable[str]) -> Dict[str, np.ndarray]:
+    return {name: (np.empty((0, 0, 2), dtype=np.float32) if name == LIDAR_FIELD
+                   else np.empty(0, dtype=SCALAR_FIELDS[name])) for name in fields}
+
+
+def _ragged(arrays: List[np.ndarray]) -> np.ndarray:
+    # 점 수가 다른 구간이 섞이면 샘플별 (N, 2) 배열을 담은 object 배열로 반환
+    samples = [sample for array in arrays for sample in array]
+    result = np.empty(len(samples), dtype=object)
+    for i, sample in enumerate(samples):
+        result[i] = sample
+    return result
+
+
+# 아직 닫히지 않은 (현재 시간 구간의) 청크
+class OpenChunk:
+    def __init__(self, bucket: int):
+        self.bucket = bucket
+        self.rows: List[tuple] = []
+        self.lidar: List[np.ndarray] = []
+
+    def append(self, scalars: tuple, lidar: np.ndarray):
+        self.rows.append(scalars)
+        self.lidar.append(lidar)
+
+    def accepts(self, bucket: int, lidar: np.ndarray, max_samples: int) -> bool:
+        # 시간 구간이 바뀌거나, 가득 찼거나, LiDAR 점 수가 바뀌면 새 청크
+        return (bucket == self.bucket and len(self.rows) < max_samples
+                and (not self.lidar or self.lidar[0].shape == lidar.shape))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        table = np.array(self.rows, dtype=np.float64)
+        columns = {name: table[:, i].astype(dtype) for i, (name, dtype) in enumerate(SCALAR_FIELDS.items())}
+        columns[LIDAR_FIELD] = np.stack(self.lidar)
+        return columns
+
+
+# 닫혀서 DB에 쓰기를 기다리는 청크
+class SealedChunk:
+    def __init__(self, robot_id: str, columns: Dict[str, np.ndarray], compress_level: int):
+        timestamps = columns["timestamp"]
+        self.robot_id = robot_id
+        self.start_time = float(timestamps[0])
+        self.end_time = float(timestamps[-1])
+        self.sample_count = len(timestamps)
+        self.raw_bytes = sum(array.nbytes for array in columns.values())
+        self.data = pack_chunk(columns, compress_level)
+
+
+class TimeSeriesStore:
+    def __init__(self, session_factory, chunk_seconds: float = 60.0, max_samples: int = 1200,
+                 compress_level: int = 1):
+        self.session_factory = session_factory  # async_sessionmaker
+        self.chunk_seconds = chunk_seconds
+        self.max_samples = max_samples
+        self.compress_level = compress_level
+        self._open: Dict[str, OpenChunk] = {}
+        self._sealing: List[tuple] = []         # 닫혔지만 아직 압축하지 않은 (robot_id, OpenChunk)
+        self._pending: List[SealedChunk] = []  # DB 쓰기가 끝나면 제거 (쓰는 중에도 조회 가능하도록)
+
+        # 통계
+        self.samples = 0
+        self.chunks_written = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.flush_ms = 0.0
+
+    def append(self, robot_id: str, sample: dict):
+        """generate_sensor_data 형식의 샘플 하나 추가 (DB 쓰기는 flush에서)"""
+        scalars, lidar = sample_values(sample)
+        bucket = int(scalars[0] // self.chunk_seconds)
+        chunk = self._open.get(robot_id)
+        if chunk is not None and not chunk.accepts(bucket, lidar, self.max_samples):
+            self._seal(robot_id)
+            chunk = None
+        if chunk is None:
+            chunk = self._open[robot_id] = OpenChunk(bucket)
+        chunk.append(scalars, lidar)
+        self.samples += 1
+
+    def _seal(self, robot_id: str):
+        # 압축은 flush에서 - 여기서는 목록만 옮김
+        chunk = self._open.pop(robot_id, None)
+        if chunk is not None and chunk.rows:
+            self._sealing.append((robot_id, chunk))
+
+    def _pack(self, sealing: List[tuple]) -> List[SealedChunk]:
+        return [SealedChunk(robot_id, chunk.columns(), self.compress_level) for robot_id, chunk in sealing]
+
+    async def flush(self, include_open: bool = False):
+        """닫힌 청크를 압축해서 한 트랜잭션으로 저장 (include_open이면 진행 중인 청크도 닫아서 저장, 종료 시 사용)"""
+        if include_open:
+            for robot_id in list(self._open):
+                self._seal(robot_id)
+        if self._sealing:
+            sealing = list(self._sealing)
+            sealed = await asyncio.to_thread(self._pack, sealing)
+            # 압축하는 동안에도 조회할 수 있도록 _pending에 넣은 뒤 _sealing에서 제거
+            self._pending.extend(sealed)
+            del self._sealing[:len(sealing)]
+        batch = list(self._pending)
+        if not batch:
+            return 0
+        started = time.perf_counter()
+        async with self.session_factory() as session:
+            session.add_all(SensorChunk(robot_id=chunk.robot_id, start_time=chunk.start_time,
+                                        end_time=chunk.end_time, sample_count=chunk.sample_count,
+                                        data=chunk.data) for chunk in batch)
+            await session.commit()
+        written = set(map(id, batch))
+        self._pending = [chunk for chunk in self._pending if id(chunk) not in written]
+        self.chunks_written += len(batch)
+        self.raw_bytes += sum(chunk.raw_bytes for chunk in batch)
+        self.stored_bytes += sum(len(chunk.data) for chunk in batch)
+        self.flush_ms += (time.perf_counter() - started) * 1000
+        return len(batch)
+
+    async def query(self, robot_id: str, start: float, end: float,
+                    fields: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """[start, end] 구간(유닉스 초)의 샘플을 {필드: 배열}로 반환 (저장 전 메모리의 샘플 포함)"""
+        fields = list(FIELDS if fields is None else fields)
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"알 수 없는 필드: {sorted(unknown)}")
+        decode_fields = fields if "timestamp" in fields else fields + ["timestamp"]
+
+        # DB를 기다리는 동안 flush가 끝나도 중복되지 않도록 메모리 청크를 먼저 확보
+        pending = [chunk for chunk in self._pending
+                   if chunk.robot_id == robot_id and chunk.end_time >= start and chunk.start_time <= end]
+        sealing = [chunk.columns() for chunk_robot_id, chunk in self._sealing if chunk_robot_id == robot_id]
+        pending_starts = {chunk.start_time for chunk in pending} | {float(columns["timestamp"][0]) for columns in sealing}
+        open_chunk = self._open.get(robot_id)
+        open_columns = open_chunk.columns() if open_chunk is not None and open_chunk.rows else None
+
+        async with self.session_factory() as session:
+            rows = (await session.execute(
+                select(SensorChunk.start_time, SensorChunk.data)
+                .where(SensorChunk.robot_id == robot_id,
+                       SensorChunk.start_time <= end,
+                       SensorChunk.end_time >= start)
+                .order_by(SensorChunk.start_time)
+            )).all()
+
+        parts = [unpack_chunk(data, decode_fields) for start_time, data in rows
+                 if start_time not in pending_starts]
+        parts += [unpack_chunk(chunk.data, decode_fields) for chunk in pending]
+        parts += [{name: columns[name] for name in decode_fields} for columns in sealing]
+        if open_columns is not None:
+            parts.append({name: open_columns[name] for name in decode_fields})
+        if not parts:
+            return empty_columns(fields)
+
+        parts.sort(key=lambda part: part["timestamp"][0])
+        result = {}
+        for name in decode_fields:
+            arrays = [part[name] for part in parts]
+            if name == LIDAR_FIELD and len({array.shape[1:] for array in arrays}) > 1:
+                result[name] = _ragged(arrays)
+            else:
+                result[name] = np.concatenate(arrays)
+        timestamps = result["timestamp"]
+        mask = (timestamps >= start) & (timestamps <= end)
+        return {name: result[name][mask] for name in fields}
+
+    def get_stats(self):
+        return {
+            "samples": self.samples,
+            "open_samples": sum(len(chunk.rows) for chunk in self._open.values()),
+            "pending_chunks": len(self._sealing) + len(self._pending),
+            "chunks_written": self.chunks_written,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "compression_ratio": round(self.raw_bytes / self.stored_bytes, 2) if self.stored_bytes else 0.0,
+            "avg_flush_ms": round(self.flush_ms / self.chunks_written, 2) if self.chunks_written else 0.0,
+        }
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database import make_async_engine, make_engine
+from models import Base, Robot, SensorData
+from timeseries import TimeSeriesStore
+
+# 센서 저장 벤치마크: 샘플당 ORM 행(SensorData, LiDAR는 JSON 문자열) vs 시계열 청크(timeseries.py)
+# 로봇 1/10/100대가 10Hz로 보낸 데이터를 1초 단위로 저장한 뒤, 로봇 한 대의 전체 구간을 조회
+# 사용법: python timeseries_bench.py [데이터 길이(초)] [LiDAR 점 수]
+
+ROBOT_COUNTS = (1, 10, 100)
+RATE_HZ = 10
+IMU_FIELDS = ["timestamp", "acceleration_x", "acceleration_y", "acceleration_z", "gyro_x", "gyro_y", "gyro_z"]
+
+
+def make_samples(seconds: int, points: int):
+    # 시간 순서의 센서 샘플 (LiDAR는 벽까지 거리가 천천히 변하는 방 형태, mm 단위로 양자화)
+    angles = np.linspace(0, 2 * math.pi, points, endpoint=False)
+    start = datetime(2024, 1, 1).timestamp()
+    samples = []
+    for i in range(seconds * RATE_HZ):
+        t = start + i / RATE_HZ
+        ranges = np.round(4 + np.sin(3 * angles + i * 0.01) + 0.002 * np.random.randn(points), 3)
+        samples.append({
+            "timestamp": t,
+            "lidar_data": {"points": [{"x": float(x), "y": float(y)} for x, y in
+                                      zip(np.round(ranges * np.cos(angles), 3), np.round(ranges * np.sin(angles), 3))]},
+            "imu_data": {"acceleration": {"x": math.sin(t), "y": math.cos(t), "z": 9.8},
+                         "gyro": {"x": 0.01 * i, "y": 0.0, "z": 0.1}},
+            "position": {"x": i * 0.01, "y": 0.0, "orientation": (i * 0.5) % 360},
+        })
+    return samples
+
+
+def sensor_row(robot_id: str, sample: dict):
+    imu, position = sample["imu_data"], sample["position"]
+    return SensorData(
+        robot_id=robot_id, timestamp=datetime.fromtimestamp(sample["timestamp"]),
+        lidar_points=json.dumps(sample["lidar_data"]["points"]),
+        acceleration_x=imu["acceleration"]["x"], acceleration_y=imu["acceleration"]["y"],
+        acceleration_z=imu["acceleration"]["z"], gyro_x=imu["gyro"]["x"], gyro_y=imu["gyro"]["y"],
+        gyro_z=imu["gyro"]["z"], position_x=position["x"], position_y=position["y"],
+        orientation=position["orientation"],
+    )
+
+
+async def ingest_rows(Session, robots, samples):
+    for second in range(0, len(samples), RATE_HZ):
+        async with Session() as db:
+            db.add_all(sensor_row(robot_id, sample) for sample in samples[second:second + RATE_HZ]
+                       for robot_id in robots)
+            await db.commit()
+
+
+async def ingest_chunks(store: TimeSeriesStore, robots, samples):
+    for second in range(0, len(samples), RATE_HZ):
+        for sample in samples[second:second + RATE_HZ]:
+            for robot_id in robots:
+                store.append(robot_id, sample)
+        await store.flush()
+    await store.flush(include_open=True)
+
+
+async def query_rows(Session, robot_id: str, with_lidar: bool):
+    async with Session() as db:
+        rows = (await db.execute(
+            select(SensorData).where(SensorData.robot_id == robot_id).order_by(SensorData.timestamp)
+        )).scalars().all()
+    columns = {
+        "timestamp": np.array([row.timestamp.timestamp() for row in rows]),
+        **{name: np.array([getattr(row, name) for row in rows], dtype=np.float32) for name in IMU_FIELDS[1:]},
+    }
+    if with_lidar:
+        columns["lidar"] = np.array([[(p["x"], p["y"]) for p in json.loads(row.lidar_points)] for row in rows],
+                                    dtype=np.float32)
+    return columns
+
+
+def database_size(url: str) -> int:
+    engine = make_engine(url)
+    with engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    engine.dispose()
+    return os.path.getsize(url[len("sqlite:///"):])
+
+
+async def timed(coroutine):
+    started = time.perf_counter()
+    result = await coroutine
+    return time.perf_counter() - started, result
+
+
+async def bench_one(directory: str, robot_count: int, samples):
+    robots = [f"ROBOT_{n:03d}" for n in range(robot_count)]
+    total = robot_count * len(samples)
+    results = {}
+    for mode in ("rows", "chunks"):
+        url = f"sqlite:///{os.path.join(directory, f'{mode}_{robot_count}.db')}"
+        engine = make_async_engine(url)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+        async with Session() as db:
+            db.add_all(Robot(id=robot_id, name=robot_id) for robot_id in robots)
+            await db.commit()
+
+        if mode == "rows":
+            ingest_s, _ = await timed(ingest_rows(Session, robots, samples))
+            imu_s, imu = await timed(query_rows(Session, robots[0], False))
+            lidar_s, lidar = await timed(query_rows(Session, robots[0], True))
+        else:
+            store = TimeSeriesStore(Session)
+            ingest_s, _ = await timed(ingest_chunks(store, robots, samples))
+            imu_s, imu = await timed(store.query(robots[0], 0, float("inf"), IMU_FIELDS))
+            lidar_s, lidar = await timed(store.query(robots[0], 0, float("inf"), IMU_FIELDS + ["lidar"]))
+        await engine.dispose()
+
+        assert len(imu["timestamp"]) == len(samples) and lidar["lidar"].shape[0] == len(samples)
+        size = database_size(url)
+        results[mode] = lidar["lidar"]
+        print(f"{robot_count:>5} {mode:<7}{total / ingest_s:>12.0f}{size / total:>12.0f}"
+              f"{size / 1e6:>10.1f}{imu_s * 1000:>11.1f}{lidar_s * 1000:>12.1f}")
+    # 저장 방식과 관계없이 같은 값을 돌려주는지 확인 (float32 비교)
+    assert np.array_equal(results["rows"], results["chunks"])
+
+
+async def bench(seconds: int, points: int):
+    samples = make_samples(seconds, points)
+    print(f"센서 저장 벤치마크 (로봇당 {seconds}초 x {RATE_HZ}Hz = {len(samples)}샘플, LiDAR {points}점, SQLite)")
+    print(f"{'로봇':>5} {'방식':<7}{'쓰기(샘플/s)':>12}{'샘플당(B)':>12}{'DB(MB)':>10}"
+          f"{'IMU조회(ms)':>11}{'+LiDAR(ms)':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for robot_count in ROBOT_COUNTS:
+            await bench_one(directory, robot_count, samples)
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 360,
+    ))
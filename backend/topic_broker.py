@@ -0,0 +1,151 @@
+import json
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from camera_protocol import PROTOCOL_BINARY, PROTOCOL_JSON
+from scheduler import TickScheduler
+
+
+# JSON과 바이너리 두 형식으로 보낼 수 있는 토픽 메시지
+# 각 형식은 해당 형식의 구독자가 있을 때만 한 번 생성됨
+# formats로 추가 바이너리 형식을 지정할 수 있음 (예: {"scan": 압축 스캔 생성 함수})
+# variants는 구독별 변형(예: 포인트 클라우드 LOD) 메시지를 만드는 함수, 변형마다 한 번만 호출됨
+class TopicMessage:
+    def __init__(self, to_json: Callable[[], dict], to_binary: Optional[Callable[[], bytes]] = None,
+                 formats: Optional[Dict[str, Callable[[], bytes]]] = None,
+                 variants: Optional[Callable[[object], "TopicMessage"]] = None):
+        self._to_json = to_json
+        self._to_binary = to_binary
+        self._formats = formats or {}
+        self._variants = variants
+        self._json = None
+        self._binary = None
+        self._encoded: Dict[str, bytes] = {}
+        self._variant_messages: Dict[object, "TopicMessage"] = {}
+
+    def json(self):
+        if self._json is None:
+            self._json = self._to_json()
+        return self._json
+
+    def binary(self):
+        if self._binary is None and self._to_binary:
+            self._binary = self._to_binary()
+        return self._binary
+
+    def variant(self, variant) -> "TopicMessage":
+        if variant is None or self._variants is None:
+            return self
+        if variant not in self._variant_messages:
+            self._variant_messages[variant] = self._variants(variant)
+        return self._variant_messages[variant]
+
+    def encoded(self, protocol: str) -> Optional[bytes]:
+        """protocol 형식의 바이너리 페이로드 (해당 형식이 없으면 None)"""
+        if protocol == PROTOCOL_BINARY:
+            return self.binary()
+        if protocol not in self._encoded and protocol in self._formats:
+            self._encoded[protocol] = self._formats[protocol]()
+        return self._encoded.get(protocol)
+
+
+def pack_topic_frame(topic: str, payload: bytes) -> bytes:
+    # [토픽 길이 uint8][토픽 UTF-8][4바이트 정렬 패딩][페이로드]
+    name = topic.encode('utf-8')
+    prefix = bytes([len(name)]) + name
+    prefix += b"\0" * ((4 - len(prefix) % 4) % 4)
+    return b"".join((prefix, payload))
+
+
+def encode_topic_message(topic: str, data, protocol: str, variant=None):
+    """구독 형식에 맞는 토픽 메시지 페이로드 (바이너리가 없는 메시지는 JSON으로 전송)"""
+    if isinstance(data, TopicMessage):
+        data = data.variant(variant)
+        payload = data.encoded(protocol) if protocol != PROTOCOL_JSON else None
+        if payload is not None:
+            return pack_topic_frame(topic, payload)
+        data = data.json()
+    return json.dumps({"topic": topic, "data": data})
+
+
+# TelemetryHub 스트림에서 파생되는 토픽 묶음
+# 별도로 데이터를 만들지 않고 로봇별 텔레메트리 프로듀서의 스냅샷을 그대로 사용
+class TelemetryFeed:
+    def __init__(self, name: str, topics: Iterable[str], hub, stream: str,
+                 robot_ids: Callable[[], Iterable[str]],
+                 derive: Callable[[dict, Set[str]], Dict[str, dict]]):
+        self.name = name
+        self.topics = set(topics)
+        self.hub = hub
+        self.stream = stream
+        self.robot_ids = robot_ids
+        # derive(스냅샷, 구독 중인 토픽 집합) -> {토픽: 메시지 데이터}
+        self.derive = derive
+        self._broker = None
+        self._subscribed = []
+
+    def start(self, broker):
+        self._broker = broker
+        self._subscribed = list(self.robot_ids())
+        self.hub.add_listener(self._on_snapshot)
+        for robot_id in self._subscribed:
+            self.hub.subscribe(self.stream, robot_id)
+
+    def stop(self):
+        self.hub.remove_listener(self._on_snapshot)
+        for robot_id in self._subscribed:
+            self.hub.unsubscribe(self.stream, robot_id)
+        self._subscribed = []
+
+    def _on_snapshot(self, stream: str, robot_id: str, snapshot: dict):
+        if stream != self.stream:
+            return
+        active_topics = self._broker.active_topics(self.topics)
+        for topic, data in self.derive(snapshot, active_topics).items():
+            self._broker.publish(topic, data)
+
+
+# 단일 /ws 엔드포인트용 토픽 브로커
+# 토픽별 구독자 관리와 전송은 ConnectionManager가 담당하고,
+# 브로커는 구독자가 있는 피드만 실행함
+class TopicBroker:
+    def __init__(self, manager, scheduler: Optional[TickScheduler] = None):
+        self.manager = manager
+        self.scheduler = scheduler or TickScheduler()
+        self.feeds: Dict[str, object] = {}
+        self.topic_feeds: Dict[str, object] = {}
+        self.running: Set[str] = set()
+
+    def register_feed(self, feed):
+        self.feeds[feed.name] = feed
+        for topic in feed.topics:
+            self.topic_feeds[topic] = feed
+
+    def active_topics(self, topics: Iterable[str]) -> Set[str]:
+        return {topic for topic in topics if self.manager.has_topic_subscribers(topic)}
+
+    def subscribe(self, websocket, topic: str, protocol: str = PROTOCOL_JSON, variant=None):
+        self.manager.subscribe_topic(websocket, topic, protocol, variant)
+        feed = self.topic_feeds.get(topic)
+        if feed and feed.name not in self.running:
+            self.running.add(feed.name)
+            feed.start(self)
+
+    def unsubscribe(self, websocket, topic: str):
+        self.manager.unsubscribe_topic(websocket, topic)
+        self._stop_idle_feeds()
+
+    def disconnect(self, websocket):
+        self.manager.disconnect_topics(websocket)
+        self._stop_idle_feeds()
+
+    def publish(self, topic: str, data):
+        # 피드가 없는 토픽 (예: timeline/events)은 다른 코드에서 직접 발행
+        self.manager.publish(topic, data)
+
+    def _stop_idle_feeds(self):
+        # 구독자가 하나도 남지 않은 피드는 중지
+        for name in list(self.running):
+            feed = self.feeds[name]
+            if not self.active_topics(feed.topics):
+                self.running.discard(name)
+                feed.stop()
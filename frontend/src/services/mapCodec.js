@@ -0,0 +1,58 @@
+// 지도 타일 변경분 디코더 (backend/map_codec.py와 동일한 little-endian 구조)
+// [헤더 12바이트] magic "MD", version, flags, revision(uint32), count(uint16), 예약(2)
+// [타일 헤더 36바이트] z(uint8), 예약, x, y, rx, ry, rw, rh(uint16), 예약(2), base(8), etag(8), rle_len(uint32)
+// [RLE] 변경 영역(rw x rh, 행 우선)의 새 값을 (반복 수, 값) uint8 쌍으로 나열
+const DIFF_HEADER_SIZE = 12
+const TILE_HEADER_SIZE = 36
+
+const toHex = (bytes) => Array.from(bytes, value => value.toString(16).padStart(2, '0')).join('')
+
+export const decodeMapDiff = (buffer, byteOffset = 0) => {
+  const view = new DataView(buffer, byteOffset)
+  if (view.getUint8(0) !== 0x4d || view.getUint8(1) !== 0x44) {
+    throw new Error('잘못된 지도 변경분 헤더입니다')
+  }
+  const revision = view.getUint32(4, true)
+  const count = view.getUint16(8, true)
+
+  const tiles = []
+  let offset = DIFF_HEADER_SIZE
+  for (let i = 0; i < count; i++) {
+    const length = view.getUint32(offset + 32, true)
+    tiles.push({
+      z: view.getUint8(offset),
+      x: view.getUint16(offset + 2, true),
+      y: view.getUint16(offset + 4, true),
+      rect: [
+        view.getUint16(offset + 6, true),
+        view.getUint16(offset + 8, true),
+        view.getUint16(offset + 10, true),
+        view.getUint16(offset + 12, true)
+      ],
+      base: toHex(new Uint8Array(buffer, byteOffset + offset + 16, 8)),
+      etag: toHex(new Uint8Array(buffer, byteOffset + offset + 24, 8)),
+      rle: new Uint8Array(buffer, byteOffset + offset + TILE_HEADER_SIZE, length)
+    })
+    offset += TILE_HEADER_SIZE + length
+  }
+  return { revision, tiles }
+}
+
+// JSON 구독으로 받은 변경분 (rle는 base64)
+export const mapDiffFromJson = (data) => ({
+  revision: data.revision,
+  tiles: data.tiles.map(tile => ({
+    ...tile,
+    rle: Uint8Array.from(atob(tile.rle), char => char.charCodeAt(0))
+  }))
+})
+
+export const decodeRle = (rle, count) => {
+  const values = new Uint8Array(count)
+  let index = 0
+  for (let i = 0; i < rle.length; i += 2) {
+    values.fill(rle[i + 1], index, index + rle[i])
+    index += rle[i]
+  }
+  return values
+}
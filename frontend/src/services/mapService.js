@@ -1,72 +1,196 @@
+import { webSocketService } from './websocket'
+import { decodeMapDiff, mapDiffFromJson, decodeRle } from './mapCodec'
+
+const API_URL = 'http://localhost:8080'
+
+const stripEtag = (etag) => (etag || '').replace(/^W\//, '').replace(/"/g, '')
+
+// 서버 지도 타일 클라이언트
+// 지도 전체 PNG를 받아 픽셀마다 변환하는 대신, 서버가 만들어 둔 타일 피라미드(/api/maps)에서
+// 화면에 보이는 타일만 받아 캔버스로 만들어 둠 (타일: 단일 채널 uint8, tile_size x tile_size)
+// 같은 타일을 다시 요청하면 브라우저가 ETag로 재검증 (바뀌지 않았으면 304)
+// 지도가 갱신되면 map/{mapId} 토픽의 타일 변경분으로 받아 둔 타일의 바뀐 영역만 덮어씀
 class MapService {
   constructor() {
-    this.mapCache = new Map()
+    this.mapCache = new Map()   // mapId -> 메타데이터
+    this.tileCache = new Map()  // `${mapId}/${z}/${x}/${y}` -> { canvas, gray, etag }
+    this.pending = new Map()    // 받는 중인 타일 -> Promise
+    this.stale = new Set()      // 받는 중에 변경분이 온 타일 (받은 내용을 캐시하지 않고 다시 받음)
+    this.maxTiles = 512
+  }
+
+  // 지도 메타데이터 (크기, resolution, origin, tile_size, max_zoom, 단계별 크기)
+  async loadMap(mapId) {
+    if (this.mapCache.has(mapId)) {
+      return this.mapCache.get(mapId)
+    }
+    try {
+      const response = await fetch(`${API_URL}/api/maps/${encodeURIComponent(mapId)}`)
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`)
+      }
+      const metadata = await response.json()
+      const mapData = { ...metadata, tileSize: metadata.tile_size, maxZoom: metadata.max_zoom }
+      this.mapCache.set(mapId, mapData)
+      return mapData
+    } catch (error) {
+      console.error('지도 로드 실패:', error)
+      throw error
+    }
+  }
+
+  // 화면 배율(scale, 화면 픽셀 / 원본 픽셀)에 맞는 줌 단계 - 화면 한 픽셀에 타일 픽셀이 하나 이상 대응하는 가장 낮은 해상도
+  zoomFor(mapData, scale) {
+    const reduction = Math.max(0, Math.floor(Math.log2(1 / Math.max(scale, 1e-6))))
+    return Math.max(0, mapData.maxZoom - reduction)
+  }
+
+  // 보이는 타일 목록 - view: { scale, offsetX, offsetY, width, height } (원본 픽셀 좌표에 scale, offset을 적용해 그림)
+  // 각 항목의 px, py, size, sw, sh는 원본 픽셀 좌표 기준 위치/크기와 타일 안의 유효 영역
+  visibleTiles(mapData, view) {
+    const z = this.zoomFor(mapData, view.scale)
+    const factor = 2 ** (mapData.maxZoom - z)
+    const tileSize = mapData.tileSize
+    const span = tileSize * factor
+    const level = mapData.levels[z]
+
+    const left = -view.offsetX / view.scale
+    const top = -view.offsetY / view.scale
+    const right = left + view.width / view.scale
+    const bottom = top + view.height / view.scale
+
+    const columns = Math.ceil(level.width / tileSize)
+    const rows = Math.ceil(level.height / tileSize)
+    const x0 = Math.max(0, Math.floor(left / span))
+    const y0 = Math.max(0, Math.floor(top / span))
+    const x1 = Math.min(columns - 1, Math.floor(right / span))
+    const y1 = Math.min(rows - 1, Math.floor(bottom / span))
+
+    const tiles = []
+    for (let y = y0; y <= y1; y++) {
+      for (let x = x0; x <= x1; x++) {
+        tiles.push({
+          z, x, y,
+          px: x * span,
+          py: y * span,
+          size: span,
+          sw: Math.min(tileSize, level.width - x * tileSize),
+          sh: Math.min(tileSize, level.height - y * tileSize)
+        })
+      }
+    }
+    return tiles
+  }
+
+  tileKey(mapId, z, x, y) {
+    return `${mapId}/${z}/${x}/${y}`
+  }
+
+  // 이미 받은 타일 캔버스 (없으면 null)
+  cachedTile(mapId, z, x, y) {
+    return this.tileCache.get(this.tileKey(mapId, z, x, y))?.canvas || null
   }
 
-  // PNG 형식의 지도 이미지를 로드하고 캔버스에서 사용할 수 있는 데이터로 변환
-  async loadMapImage(url) {
-    if (this.mapCache.has(url)) {
-      return this.mapCache.get(url)
+  // 타일 받기 - 그레이스케일을 RGBA 캔버스로 한 번만 변환해 둠
+  loadTile(mapData, z, x, y) {
+    const key = this.tileKey(mapData.id, z, x, y)
+    if (this.tileCache.has(key)) {
+      return Promise.resolve(this.tileCache.get(key).canvas)
+    }
+    if (this.pending.has(key)) {
+      return this.pending.get(key)
     }
 
-    return new Promise((resolve, reject) => {
-      const img = new Image()
-      img.crossOrigin = 'anonymous'
-      
-      img.onload = () => {
+    const promise = fetch(`${API_URL}/api/maps/${encodeURIComponent(mapData.id)}/tiles/${z}/${x}/${y}`)
+      .then(async response => {
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`)
+        }
+        return { etag: stripEtag(response.headers.get('ETag')), buffer: await response.arrayBuffer() }
+      })
+      .then(({ etag, buffer }) => {
+        const gray = new Uint8Array(buffer)
         const canvas = document.createElement('canvas')
-        canvas.width = img.width
-        canvas.height = img.height
-        const ctx = canvas.getContext('2d')
-        ctx.drawImage(img, 0, 0)
-        
-        const imageData = ctx.getImageData(0, 0, canvas.width, canvas.height)
-        const mapData = {
-          width: img.width,
-          height: img.height,
-          resolution: 0.05, // 기본값, 서버에서 받아와야 함
-          origin: { x: 0, y: 0 }, // 기본값, 서버에서 받아와야 함
-          data: new Uint8Array(img.width * img.height)
+        canvas.width = mapData.tileSize
+        canvas.height = mapData.tileSize
+        this.paint(canvas, gray, mapData.tileSize, [0, 0, mapData.tileSize, mapData.tileSize])
+        if (this.stale.delete(key)) {
+          // 받는 동안 지도가 바뀜 - 다음에 그릴 때 다시 받음
+          return canvas
         }
-
-        // RGBA 데이터를 그레이스케일로 변환
-        for (let i = 0; i < imageData.data.length; i += 4) {
-          const gray = Math.round((imageData.data[i] + imageData.data[i + 1] + imageData.data[i + 2]) / 3)
-          mapData.data[i / 4] = gray
+        this.tileCache.set(key, { canvas, gray, etag })
+        if (this.tileCache.size > this.maxTiles) {
+          // 가장 먼저 받은 타일부터 버림
+          this.tileCache.delete(this.tileCache.keys().next().value)
         }
+        return canvas
+      })
+      .finally(() => this.pending.delete(key))
+    this.pending.set(key, promise)
+    return promise
+  }
 
-        this.mapCache.set(url, mapData)
-        resolve(mapData)
+  // 그레이스케일 타일의 rect [x, y, w, h] 영역을 캔버스에 그림
+  paint(canvas, gray, tileSize, rect) {
+    const [rx, ry, rw, rh] = rect
+    const ctx = canvas.getContext('2d')
+    const imageData = ctx.createImageData(rw, rh)
+    // 픽셀당 4바이트를 한 번에 씀 (리틀 엔디언: ABGR)
+    const pixels = new Uint32Array(imageData.data.buffer)
+    for (let row = 0; row < rh; row++) {
+      const start = (ry + row) * tileSize + rx
+      for (let col = 0; col < rw; col++) {
+        const value = gray[start + col]
+        pixels[row * rw + col] = 0xff000000 | (value << 16) | (value << 8) | value
       }
+    }
+    ctx.putImageData(imageData, rx, ry)
+  }
 
-      img.onerror = reject
-      img.src = url
-    })
+  // 지도 변경분 구독 - 받아 둔 타일을 덮어쓰고 onChange 호출, 구독 해제 함수 반환
+  watch(mapData, onChange) {
+    return webSocketService.subscribe(`map/${mapData.id}`, (data) => {
+      try {
+        const diff = data?.buffer ? decodeMapDiff(data.buffer, data.byteOffset) : mapDiffFromJson(data)
+        this.applyDiff(mapData, diff)
+        onChange?.(diff)
+      } catch (error) {
+        console.error('지도 변경분 처리 실패:', error)
+      }
+    }, { format: 'binary' })
   }
 
-  // YAML/JSON 형식의 지도 메타데이터 로드
-  async loadMapMetadata(url) {
-    const response = await fetch(url)
-    const metadata = await response.json()
-    return metadata
+  applyDiff(mapData, diff) {
+    mapData.revision = diff.revision
+    for (const tile of diff.tiles) {
+      const key = this.tileKey(mapData.id, tile.z, tile.x, tile.y)
+      if (this.pending.has(key)) {
+        this.stale.add(key)
+      }
+      const entry = this.tileCache.get(key)
+      if (!entry) continue
+      if (entry.etag !== tile.base) {
+        // 받아 둔 타일이 변경분의 기준과 다름 (중간 변경분 유실) - 버리고 다시 받음
+        this.tileCache.delete(key)
+        continue
+      }
+      const [rx, ry, rw, rh] = tile.rect
+      const values = decodeRle(tile.rle, rw * rh)
+      for (let row = 0; row < rh; row++) {
+        entry.gray.set(values.subarray(row * rw, (row + 1) * rw), (ry + row) * mapData.tileSize + rx)
+      }
+      this.paint(entry.canvas, entry.gray, mapData.tileSize, tile.rect)
+      entry.etag = tile.etag
+    }
   }
 
-  // 지도 데이터와 메타데이터 결합
-  async loadMap(imageUrl, metadataUrl) {
-    try {
-      const [mapData, metadata] = await Promise.all([
-        this.loadMapImage(imageUrl),
-        this.loadMapMetadata(metadataUrl)
-      ])
-
-      return {
-        ...mapData,
-        resolution: metadata.resolution,
-        origin: metadata.origin
+  // 지도가 바뀌었을 때 받아 둔 타일 비우기
+  clear(mapId) {
+    this.mapCache.delete(mapId)
+    for (const key of [...this.tileCache.keys()]) {
+      if (key.startsWith(`${mapId}/`)) {
+        this.tileCache.delete(key)
       }
-    } catch (error) {
-      console.error('지도 로드 실패:', error)
-      throw error
     }
   }
 
@@ -85,4 +209,4 @@ class MapService {
   }
 }
 
-export const mapService = new MapService() 
\ No newline at end of file
+export const mapService = new MapService()
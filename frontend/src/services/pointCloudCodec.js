@@ -0,0 +1,38 @@
+// 포인트 클라우드 바이너리 포맷 디코더 (backend/pointcloud.py와 동일한 little-endian 구조)
+// [헤더 20바이트] magic "PC", version, flags, point_count(uint32), timestamp(float64), meta_len(uint32)
+// [메타데이터 JSON + 4바이트 정렬 패딩][x][y][z?][intensity?] float32 배열
+const POINTS_HEADER_SIZE = 20
+const FLAG_Z = 0x01
+const FLAG_INTENSITY = 0x02
+
+const textDecoder = new TextDecoder()
+
+// 배열은 수신 버퍼를 그대로 참조하는 Float32Array (복사 없음)
+export const decodePointCloud = (buffer, byteOffset = 0) => {
+  const view = new DataView(buffer, byteOffset)
+  if (view.getUint8(0) !== 0x50 || view.getUint8(1) !== 0x43) {
+    throw new Error('잘못된 포인트 클라우드 헤더입니다')
+  }
+
+  const flags = view.getUint8(3)
+  const count = view.getUint32(4, true)
+  const timestamp = view.getFloat64(8, true)
+  const metaLength = view.getUint32(16, true)
+
+  let offset = byteOffset + POINTS_HEADER_SIZE
+  const meta = metaLength
+    ? JSON.parse(textDecoder.decode(new Uint8Array(buffer, offset, metaLength)))
+    : null
+  offset += Math.ceil(metaLength / 4) * 4
+
+  const readChannel = () => {
+    const channel = new Float32Array(buffer, offset, count)
+    offset += count * 4
+    return channel
+  }
+
+  const cloud = { count, timestamp, meta, x: readChannel(), y: readChannel(), z: null, intensity: null }
+  if (flags & FLAG_Z) cloud.z = readChannel()
+  if (flags & FLAG_INTENSITY) cloud.intensity = readChannel()
+  return cloud
+}
@@ -0,0 +1,81 @@
+// 압축 LiDAR 스캔 디코더 (backend/scan_codec.py와 동일한 little-endian 구조)
+// [헤더 32바이트] magic "LS", version, flags, seq(uint32), base_seq(uint32), timestamp(float64),
+//                 angle_min(float32), angle_increment(float32), count(uint16), meta_len(uint16)
+// [메타데이터 JSON][페이로드] uint16 하위 바이트 블록 + 상위 바이트 블록 (FLAG_ZLIB이면 zlib 압축)
+// 키프레임은 거리(mm), 델타 프레임은 직전 프레임 대비 zigzag 인코딩된 차이
+const SCAN_HEADER_SIZE = 32
+const FLAG_KEYFRAME = 0x01
+const FLAG_ZLIB = 0x02
+
+const textDecoder = new TextDecoder()
+
+const inflate = async (bytes) => {
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'))
+  return new Uint8Array(await new Response(stream).arrayBuffer())
+}
+
+// 로봇(meta.robot_id)별로 직전 프레임을 보관하고 델타 프레임을 복원
+// 기준 프레임이 없는 델타 프레임(중간 접속, 메시지 유실)은 다음 키프레임까지 null 반환
+export class ScanDecoder {
+  constructor() {
+    this.streams = new Map()
+    this.pending = Promise.resolve()
+  }
+
+  // 압축 해제가 비동기라서 수신 순서대로 복원되도록 직렬화
+  decode(buffer, byteOffset = 0) {
+    const result = this.pending.then(() => this.decodeFrame(buffer, byteOffset))
+    this.pending = result.catch(() => null)
+    return result
+  }
+
+  async decodeFrame(buffer, byteOffset) {
+    const view = new DataView(buffer, byteOffset)
+    if (view.getUint8(0) !== 0x4c || view.getUint8(1) !== 0x53) {
+      throw new Error('잘못된 스캔 헤더입니다')
+    }
+
+    const flags = view.getUint8(3)
+    const seq = view.getUint32(4, true)
+    const baseSeq = view.getUint32(8, true)
+    const timestamp = view.getFloat64(12, true)
+    const angleMin = view.getFloat32(20, true)
+    const angleIncrement = view.getFloat32(24, true)
+    const count = view.getUint16(28, true)
+    const metaLength = view.getUint16(30, true)
+
+    const offset = byteOffset + SCAN_HEADER_SIZE
+    const meta = metaLength
+      ? JSON.parse(textDecoder.decode(new Uint8Array(buffer, offset, metaLength)))
+      : null
+    let payload = new Uint8Array(buffer, offset + metaLength)
+    if (flags & FLAG_ZLIB) payload = await inflate(payload)
+
+    const key = meta?.robot_id ?? ''
+    const previous = this.streams.get(key)
+    const values = new Uint16Array(count)
+    if (flags & FLAG_KEYFRAME) {
+      for (let i = 0; i < count; i++) values[i] = payload[i] | (payload[count + i] << 8)
+    } else if (previous && previous.seq === baseSeq && previous.values.length === count) {
+      for (let i = 0; i < count; i++) {
+        const zigzag = payload[i] | (payload[count + i] << 8)
+        const delta = (zigzag >>> 1) ^ -(zigzag & 1)
+        values[i] = previous.values[i] + delta
+      }
+    } else {
+      return null
+    }
+    this.streams.set(key, { seq, values })
+
+    const ranges = new Float32Array(count)
+    const x = new Float32Array(count)
+    const y = new Float32Array(count)
+    for (let i = 0; i < count; i++) {
+      const angle = angleMin + i * angleIncrement
+      ranges[i] = values[i] / 1000
+      x[i] = ranges[i] * Math.cos(angle)
+      y[i] = ranges[i] * Math.sin(angle)
+    }
+    return { seq, timestamp, meta, angleMin, angleIncrement, ranges, x, y }
+  }
+}
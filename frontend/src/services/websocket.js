@@ -1,5 +1,17 @@
 import { ref } from 'vue'
 
+const textDecoder = new TextDecoder()
+
+// 바이너리 토픽 프레임: [토픽 길이 uint8][토픽 UTF-8][4바이트 정렬 패딩][페이로드]
+// 콜백에는 { buffer, byteOffset } 를 넘겨서 페이로드를 복사 없이 읽을 수 있게 함
+const parseTopicFrame = (buffer) => {
+  const bytes = new Uint8Array(buffer)
+  const length = bytes[0]
+  const topic = textDecoder.decode(bytes.subarray(1, 1 + length))
+  const byteOffset = Math.ceil((1 + length) / 4) * 4
+  return { topic, data: { buffer, byteOffset } }
+}
+
 class WebSocketService {
   constructor() {
     this.ws = null
@@ -16,6 +28,7 @@ class WebSocketService {
     return new Promise((resolve, reject) => {
       try {
         this.ws = new WebSocket(url)
+        this.ws.binaryType = 'arraybuffer'
 
         this.ws.onopen = () => {
           console.log('WebSocket 연결됨')
@@ -38,6 +51,10 @@ class WebSocketService {
 
         this.ws.onmessage = (event) => {
           try {
+            if (event.data instanceof ArrayBuffer) {
+              this.handleMessage(parseTopicFrame(event.data))
+              return
+            }
             const message = JSON.parse(event.data)
             this.handleMessage(message)
           } catch (error) {
@@ -60,14 +77,15 @@ class WebSocketService {
     }
   }
 
-  subscribe(topic, callback) {
+  // options.format === 'binary' 이면 지원하는 토픽은 바이너리 프레임으로 받음
+  subscribe(topic, callback, options = {}) {
     if (!this.subscriptions.has(topic)) {
       this.subscriptions.set(topic, new Set())
     }
     this.subscriptions.get(topic).add(callback)
 
     // 구독 시작 메시지 전송
-    this.send('subscribe', { topic })
+    this.send('subscribe', { topic, ...options })
 
     // 구독 해제 함수 반환
     return () => {
@@ -75,6 +93,13 @@ class WebSocketService {
     }
   }
 
+  // 구독 중인 토픽의 옵션 변경 (예: 포인트 클라우드 상세도 { voxel, max_points })
+  updateSubscription(topic, options = {}) {
+    if (this.subscriptions.has(topic)) {
+      this.send('subscribe', { topic, ...options })
+    }
+  }
+
   unsubscribe(topic, callback) {
     if (this.subscriptions.has(topic)) {
       this.subscriptions.get(topic).delete(callback)